@@ -18,6 +18,7 @@ from models.department import Department
 from models.doctor import Doctor
 
 from services.hospital_service import HospitalService
+from services.hospital_load_summary import hospital_load_summary
 
 
 class ChatbotOrchestratorAgent(BaseAgent):
@@ -181,9 +182,14 @@ class ChatbotOrchestratorAgent(BaseAgent):
                 "Please try describing your symptoms differently."
             )
 
+        # Soonest-seen first, from the in-memory load summary (no queries)
+        by_id = {h.id: h for h in hospitals}
+        ranking = hospital_load_summary.rank(list(by_id), self.state.department_hint)
+
         # Build hospital options with doctor info
         options: List[HospitalOption] = []
-        for hospital in hospitals:
+        for hospital_id, load in ranking:
+            hospital = by_id[hospital_id]
             doctors = await self._get_doctors_for_hospital(
                 hospital.id, self.state.department_hint
             )
@@ -192,6 +198,8 @@ class ChatbotOrchestratorAgent(BaseAgent):
                     hospital_id=hospital.id,
                     hospital_name=hospital.name,
                     location=hospital.location,
+                    shortest_wait_minutes=load["shortest_wait_minutes"] if load else None,
+                    accepting=not load or load["accepting_doctors"] > 0,
                     doctors=[
                         {
                             "id": str(d.id),
@@ -219,7 +227,8 @@ class ChatbotOrchestratorAgent(BaseAgent):
                 else "Doctors available"
             )
             msg += f"**{i}. {opt.hospital_name}** ({opt.location})\n"
-            msg += f"   Doctors: {doctor_names}\n\n"
+            msg += f"   Doctors: {doctor_names}\n"
+            msg += self._wait_line(opt) + "\n"
 
         msg += (
             "Would you like to proceed with booking at one of these hospitals? (yes/no)"
@@ -248,7 +257,8 @@ class ChatbotOrchestratorAgent(BaseAgent):
                     else "Doctors available"
                 )
                 msg += f"**{i}. {opt.hospital_name}** ({opt.location})\n"
-                msg += f"   Doctors: {doctor_names}\n\n"
+                msg += f"   Doctors: {doctor_names}\n"
+                msg += self._wait_line(opt) + "\n"
 
             msg += "Please reply with the **hospital number** (e.g., `1`) to proceed."
             return self._reply(msg)
@@ -394,9 +404,18 @@ class ChatbotOrchestratorAgent(BaseAgent):
                     doctors = response_data["doctors"]
                     doc_list = "\n".join(
                         f"  {i + 1}. **{d['name']}** ({d['specialization']})"
+                        + (
+                            f" — {d['queue_length']} in queue, ~{d['estimated_wait_minutes']} min"
+                            if "queue_length" in d
+                            else ""
+                        )
                         for i, d in enumerate(doctors)
                     )
-                    display_message = f"{bot_message}\n\n{doc_list}\n\nReply with the doctor **number** to select."
+                    display_message = (
+                        f"{bot_message}\n\n{doc_list}\n\n"
+                        "Reply with the doctor **number** to select, "
+                        "or **any** for the shortest wait."
+                    )
                     # Store doctor list for mapping index -> ID
                     self.state.messages.append(
                         {
@@ -457,6 +476,10 @@ class ChatbotOrchestratorAgent(BaseAgent):
 
         # SELECT_DOCTOR → parse doctor number or ID
         if reg_step == "select_doctor":
+            # "any" → doctor with the shortest predicted wait
+            if message.strip().lower() in ("any", "auto", "any doctor"):
+                return {"auto_assign": True}
+
             # Try to map number to doctor ID from stored list
             try:
                 choice = int(message)
@@ -503,6 +526,14 @@ class ChatbotOrchestratorAgent(BaseAgent):
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    @staticmethod
+    def _wait_line(option: HospitalOption) -> str:
+        if not option.accepting:
+            return "   Queues full for today\n"
+        if option.shortest_wait_minutes is not None:
+            return f"   Estimated wait: ~{option.shortest_wait_minutes} min\n"
+        return ""
+
     def _reply(self, message: str) -> Dict[str, Any]:
         """Build a standard reply and track in conversation history."""
         self.state.last_bot_message = message
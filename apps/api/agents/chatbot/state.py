@@ -22,6 +22,9 @@ class HospitalOption(BaseModel):
     hospital_name: str
     location: str
     doctors: List[Dict[str, Any]] = []  # [{name, specialization, id}]
+    # From the live load summary; None when unknown
+    shortest_wait_minutes: Optional[int] = None
+    accepting: bool = True
 
 
 class ChatbotOrchestratorState(BaseModel):
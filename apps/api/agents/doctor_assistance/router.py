@@ -1,13 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from pydantic import BaseModel
 from uuid import UUID
 
 from db.session import get_db_session
 from agents.doctor_assistance.agent import DoctorAssistanceAgent
 from agents.doctor_assistance.state import DoctorAssistanceState
-from services.agent_session_service import AgentSessionService, agent_sessions
+from services.agent_session_service import AgentSessionService
 
 router = APIRouter(
     prefix="/agents/doctor-assistance",
@@ -48,33 +47,19 @@ async def handle_doctor_action_by_visit(
             f"[DoctorAssistance Router] Looking for session with visit_id={request.visit_id}"
         )
         
-        result = await db.execute(
-            select(agent_sessions)
-            .where(agent_sessions.c.state["visit_id"].astext == str(request.visit_id))
-            .order_by(agent_sessions.c.created_at.desc())
-            .limit(1)
+        session = await AgentSessionService.get_latest_by_visit(
+            db,
+            request.visit_id,
+            agent_name=DoctorAssistanceState.model_fields["agent_name"].default,
         )
-        row = result.first()
-        
-        print(f"[DoctorAssistance Router] Query result: {row}")
 
-        if not row:
-            # Debug: fetch all sessions to see what's there
-            all_result = await db.execute(
-                select(agent_sessions).order_by(agent_sessions.c.created_at.desc()).limit(5)
-            )
-            all_rows = all_result.fetchall()
-            print(f"[DoctorAssistance Router] Available sessions (last 5):")
-            for r in all_rows:
-                print(f"  - session_id={r[0]}, agent_name={r[1]}, state={r[2]}")
-            
+        if not session:
             raise HTTPException(
                 status_code=404,
                 detail=f"No doctor assistance session found for visit_id: {request.visit_id}. The doctor must call next patient first to initialize the consultation session.",
             )
 
-        session_id = row[0]
-        state_dict = row[2]
+        session_id, state_dict = session
         print(f"[DoctorAssistance Router] Found session {session_id}, state={state_dict}")
         
         state = DoctorAssistanceState(**state_dict)
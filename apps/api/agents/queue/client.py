@@ -5,6 +5,22 @@ from datetime import date
 QUEUE_AGENT_URL = "http://localhost:8000/api/agents/queue/intake"
 
 
+def _intake_json(payload: Dict[str, Any]) -> Dict[str, Any]:
+    body = {
+        "visit_id": str(payload["visit_id"]),
+        "patient_id": str(payload["patient_id"]),
+        "doctor_id": str(payload["doctor_id"]),
+        "hospital_id": str(payload["hospital_id"]),
+        "queue_date": payload["queue_date"].isoformat()
+        if isinstance(payload["queue_date"], date)
+        else payload["queue_date"],
+    }
+    # Priority class, resolved to a lane by the hospital's policy
+    if payload.get("priority"):
+        body["priority"] = payload["priority"]
+    return body
+
+
 async def handoff_to_queue_agent(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Sends visit to Queue Agent for intake.
@@ -14,16 +30,9 @@ async def handoff_to_queue_agent(payload: Dict[str, Any]) -> Dict[str, Any]:
     async with httpx.AsyncClient(timeout=5.0) as client:
         response = await client.post(
             QUEUE_AGENT_URL,
-            json={
-                "visit_id": str(payload["visit_id"]),
-                "patient_id": str(payload["patient_id"]),
-                "doctor_id": str(payload["doctor_id"]),
-                "hospital_id": str(payload["hospital_id"]),
-                "queue_date": payload["queue_date"].isoformat()
-                if isinstance(payload["queue_date"], date)
-                else payload["queue_date"],
-            },
+            json=_intake_json(payload),
         )
 
     response.raise_for_status()
     return response.json()
+
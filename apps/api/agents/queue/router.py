@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from uuid import UUID
 
 from db.session import get_db_session
 from services.queue_service import QueueService
-from agents.queue.schemas import QueueIntakeRequest, QueueIntakeResponse,CallNextRequest,CallNextResponse,EndConsultationRequest,EndConsultationResponse, CheckInRequest,CheckInResponse,SkipRequest,SkipResponse,StartConsultationRequest,StartConsultationResponse,QueueStatusRequest
+from agents.queue.schemas import QueueIntakeRequest, QueueIntakeResponse,QueueIntakeBatchRequest,QueueIntakeBatchResponse,CallNextRequest,CallNextResponse,EndConsultationRequest,EndConsultationResponse, CheckInRequest,CheckInResponse,SkipRequest,SkipResponse,StartConsultationRequest,StartConsultationResponse,AdvanceRequest,AdvanceResponse,QueueStatusRequest,QueuePositionRequest,QueuePositionResponse,AgentSyncStatus,QueueEventsRequest,QueueEventsPage
 
 router = APIRouter(prefix="/agents/queue", tags=["Queue Agent"])
 
@@ -21,6 +22,16 @@ async def queue_intake(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/intake/batch", response_model=QueueIntakeBatchResponse)
+async def queue_intake_batch(
+    request: QueueIntakeBatchRequest,
+    db: AsyncSession = Depends(get_db_session),
+):
+    try:
+        return await QueueService.intake_batch(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/call-next", response_model=CallNextResponse)
 async def call_next_patient(
     request: CallNextRequest,
@@ -72,6 +83,16 @@ async def start_consultation(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/advance", response_model=AdvanceResponse)
+async def advance_queue(
+    request: AdvanceRequest,
+    db: AsyncSession = Depends(get_db_session),
+):
+    try:
+        return await QueueService.advance(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/status")
 async def queue_status(
     request: QueueStatusRequest = Depends(),
@@ -80,4 +101,59 @@ async def queue_status(
     try:
         return await QueueService.get_status(db, request)
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/position", response_model=QueuePositionResponse)
+async def queue_position(
+    request: QueuePositionRequest = Depends(),
+    db: AsyncSession = Depends(get_db_session),
+):
+    try:
+        return await QueueService.get_position(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/events", response_model=QueueEventsPage)
+async def queue_events(
+    request: QueueEventsRequest = Depends(),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Incremental read of a queue's event log: pass the last next_cursor
+    as `after` to receive only newer events.
+    """
+    try:
+        return await QueueService.get_events(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/agent-sync", response_model=AgentSyncStatus)
+async def agent_sync_status(visit_id: UUID):
+    """
+    Progress of the background Doctor Assistance handoff for a visit
+    (pending | running | retrying | done | failed).
+    """
+    try:
+        return QueueService.agent_sync_status(visit_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/stream")
+async def queue_status_stream(
+    http_request: Request,
+    request: QueueStatusRequest = Depends(),
+):
+    """
+    Server-sent events version of /status. A new snapshot is pushed only
+    when a queue mutation touches this doctor's queue; /status remains
+    available for clients that cannot hold a stream open.
+    """
+    return StreamingResponse(
+        QueueService.stream_status(request, http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
 from typing import Optional,List
 
 
@@ -10,16 +10,39 @@ class QueueIntakeRequest(BaseModel):
     doctor_id: UUID
     hospital_id: UUID
     queue_date: date
+    # Priority class from the hospital's policy (e.g. "emergency");
+    # None lets the policy decide (elderly by age, else normal)
+    priority: str | None = None
 
 
 class QueueIntakeResponse(BaseModel):
     accepted: bool
     token_number: int | None = None
     position: int | None = None
+    priority: str | None = None
     estimated_wait_minutes: int | None = None
     reason: str | None = None
 
 
+# Upper bound on one /intake/batch call (a camp registers in bursts)
+MAX_INTAKE_BATCH = 1000
+
+
+class QueueIntakeBatchRequest(BaseModel):
+    visits: List[QueueIntakeRequest] = Field(min_length=1, max_length=MAX_INTAKE_BATCH)
+
+
+class QueueIntakeBatchResult(QueueIntakeResponse):
+    visit_id: UUID
+
+
+class QueueIntakeBatchResponse(BaseModel):
+    # One result per requested visit, in request order
+    results: List[QueueIntakeBatchResult]
+    accepted_count: int
+    rejected_count: int
+
+
 class CallNextRequest(BaseModel):
     doctor_id: UUID
     queue_date: date
@@ -35,6 +58,9 @@ class CallNextResponse(BaseModel):
     patient_age: Optional[int] = None
     patient_contact: str
     symptoms_summary: Optional[str] = None
+    # Doctor Assistance handoff runs in the background; see /agent-sync
+    agent_sync: Optional[str] = None
+
 
 class EndConsultationRequest(BaseModel):
     doctor_id: UUID
@@ -46,6 +72,9 @@ class EndConsultationResponse(BaseModel):
     success: bool
     visit_id: UUID
     message: str
+    # Doctor Assistance handoff runs in the background; see /agent-sync
+    agent_sync: Optional[str] = None
+
 
 class CheckInRequest(BaseModel):
     visit_id: UUID
@@ -79,8 +108,25 @@ class StartConsultationResponse(BaseModel):
     success: bool
     visit_id: UUID
     status: str
+    # Doctor Assistance handoff runs in the background; see /agent-sync
+    agent_sync: Optional[str] = None
 
 
+class AdvanceRequest(BaseModel):
+    doctor_id: UUID
+    queue_date: date
+    # Consultation being closed; None when the doctor has none open
+    visit_id: Optional[UUID] = None
+    # Also start the consultation of the patient called next
+    start: bool = False
+
+
+class AdvanceResponse(BaseModel):
+    ended_visit_id: Optional[UUID] = None
+    # None when nobody was left to call
+    next_patient: Optional[CallNextResponse] = None
+    message: str
+
 
 class QueueStatusRequest(BaseModel):
     queue_date: date
@@ -117,9 +163,29 @@ class PatientQueueStatus(BaseModel):
     present_ahead: int
     waiting_ahead: int
     estimated_wait_minutes: int
+    estimated_wait_p90_minutes: Optional[int] = None  # once enough history exists
     message: Optional[str] = None
 
 
+# ---------- Patient position (lightweight tracker poll) ----------
+class QueuePositionRequest(BaseModel):
+    visit_id: UUID
+    doctor_id: UUID
+    queue_date: date
+
+
+class QueuePositionResponse(BaseModel):
+    visit_id: UUID
+    token_number: int
+    status: str
+    current_token: Optional[int]
+    patients_ahead: int
+    present_ahead: int
+    waiting_ahead: int
+    estimated_wait_minutes: int
+    estimated_wait_p90_minutes: Optional[int] = None  # once enough history exists
+
+
 # ---------- Reception ----------
 class ReceptionQueueStatus(BaseModel):
     role: str
@@ -129,4 +195,38 @@ class ReceptionQueueStatus(BaseModel):
     completed: int
     in_progress: int
     waiting: int
-    skipped: int
\ No newline at end of file
+    skipped: int
+
+# ---------- Doctor Assistance handoff ----------
+class AgentSyncStatus(BaseModel):
+    visit_id: UUID
+    action: str  # call_next | start_consultation | end_consultation
+    status: str  # pending | running | retrying | done | failed
+    attempts: int
+    error: Optional[str] = None
+    updated_at: datetime
+
+
+# ---------- Queue event log ----------
+class QueueEventsRequest(BaseModel):
+    doctor_id: UUID
+    queue_date: date
+    after: int = 0  # cursor: last version already seen
+    limit: int = 100
+
+
+class QueueEventOut(BaseModel):
+    version: int
+    event_type: str
+    visit_id: Optional[UUID] = None
+    token_number: Optional[int] = None
+    entry_status: Optional[str] = None
+    reason: Optional[str] = None
+    actor: Optional[str] = None
+    occurred_at: datetime
+
+
+class QueueEventsPage(BaseModel):
+    queue_id: UUID
+    events: List[QueueEventOut]
+    next_cursor: int
@@ -27,6 +27,8 @@ from services.patient_service import PatientService
 from services.department_service import DepartmentService
 from services.doctor_service import DoctorService
 from services.visit_service import VisitService
+from services.department_load_index import department_load_index
+from schemas.hospital import DoctorLoad
 
 from services.llm.symptom_summarizer import SymptomSummarizerService
 from services.llm.department_resolver import DepartmentResolverService
@@ -314,12 +316,29 @@ class RegistrationAgent(BaseAgent[RegistrationAgentState]):
             "departments": dept_names,
         }
 
-    async def _handle_select_doctor(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _ranked_doctors(self) -> List[DoctorLoad]:
+        """
+        Available doctors of the chosen department, shortest predicted
+        wait first (alphabetical when the hospital is unknown).
+        """
+        if self.state.hospital_id:
+            return await department_load_index.ranked(
+                self.db,
+                self.state.hospital_id,
+                self.state.department_id,
+                datetime.utcnow().date(),
+            )
+
         doctors = await DoctorService.list_available_by_department(
-            self.db,
-            self.state.department_id,
-            hospital_id=self.state.hospital_id,
+            self.db, self.state.department_id
         )
+        return [
+            DoctorLoad(doctor_id=d.id, doctor_name=d.name, specialization=d.specialization)
+            for d in doctors
+        ]
+
+    async def _handle_select_doctor(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        doctors = await self._ranked_doctors()
 
         if not doctors:
             return {
@@ -327,21 +346,30 @@ class RegistrationAgent(BaseAgent[RegistrationAgentState]):
             }
 
         doctor_id = input_data.get("doctor_id")
+        suggested = next((d for d in doctors if d.accepting), None)
+
+        if not doctor_id and input_data.get("auto_assign") and suggested:
+            # Shortest queue that still admits patients
+            doctor_id = str(suggested.doctor_id)
 
         if not doctor_id:
             return {
                 "message": "Please select a doctor.",
                 "doctors": [
                     {
-                        "id": str(d.id),
-                        "name": d.name,
+                        "id": str(d.doctor_id),
+                        "name": d.doctor_name,
                         "specialization": d.specialization,
+                        "queue_length": d.queue_length,
+                        "estimated_wait_minutes": d.estimated_wait_minutes,
+                        "accepting": d.accepting,
                     }
                     for d in doctors
                 ],
+                "suggested_doctor_id": str(suggested.doctor_id) if suggested else None,
             }
 
-        selected = next((d for d in doctors if str(d.id) == doctor_id), None)
+        selected = next((d for d in doctors if str(d.doctor_id) == doctor_id), None)
 
         if not selected:
             return {
@@ -349,8 +377,8 @@ class RegistrationAgent(BaseAgent[RegistrationAgentState]):
             }
 
         self.update_state(
-            doctor_id=selected.id,
-            doctor_name=selected.name
+            doctor_id=selected.doctor_id,
+            doctor_name=selected.doctor_name
         )
         self.transition_to(RegistrationStep.CREATE_VISIT)
 
@@ -0,0 +1,20 @@
+-- Per-queue token counter, allocated with UPDATE ... RETURNING in QueueService.intake
+
+ALTER TABLE doctor_queues
+    ADD COLUMN IF NOT EXISTS last_token_number INT NOT NULL DEFAULT 0;
+
+UPDATE doctor_queues q
+SET last_token_number = COALESCE(
+    (SELECT max(e.token_number) FROM queue_entries e WHERE e.queue_id = q.id),
+    0
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_queue_token'
+    ) THEN
+        ALTER TABLE queue_entries
+            ADD CONSTRAINT uq_queue_token UNIQUE (queue_id, token_number);
+    END IF;
+END $$;
@@ -0,0 +1,4 @@
+-- Per-queue version, bumped on every mutation and sent on the queue_changes NOTIFY channel
+
+ALTER TABLE doctor_queues
+    ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 0;
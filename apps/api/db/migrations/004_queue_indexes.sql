@@ -0,0 +1,37 @@
+-- Composite and partial indexes for the QueueService hot paths.
+-- Names are unqualified so scripts/bench_queue_indexes.py can replay this
+-- file against its scratch schema via search_path.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_doctor_queue'
+          AND conrelid = 'doctor_queues'::regclass
+    ) THEN
+        ALTER TABLE doctor_queues
+            ADD CONSTRAINT uq_doctor_queue UNIQUE (doctor_id, queue_date);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_queue_visit'
+          AND conrelid = 'queue_entries'::regclass
+    ) THEN
+        ALTER TABLE queue_entries
+            ADD CONSTRAINT uq_queue_visit UNIQUE (queue_id, visit_id);
+    END IF;
+END $$;
+
+-- Status filters and patients-ahead range counts
+CREATE INDEX IF NOT EXISTS ix_queue_entries_queue_status_token
+    ON queue_entries (queue_id, status, token_number);
+
+-- call_next / next-waiting: callable entries only, in token order
+CREATE INDEX IF NOT EXISTS ix_queue_entries_callable
+    ON queue_entries (queue_id, token_number)
+    WHERE status IN ('waiting', 'present', 'called');
+
+-- check_in finds an entry by visit alone
+CREATE INDEX IF NOT EXISTS ix_queue_entries_visit
+    ON queue_entries (visit_id);
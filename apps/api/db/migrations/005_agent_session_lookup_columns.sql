@@ -0,0 +1,26 @@
+-- First-class visit_id / hospital_id on agent_sessions, replacing state->>'visit_id' scans
+
+ALTER TABLE agent_sessions
+    ADD COLUMN IF NOT EXISTS visit_id UUID,
+    ADD COLUMN IF NOT EXISTS hospital_id UUID;
+
+-- Session state is free-form: values that are not UUIDs backfill as NULL
+-- rather than aborting the migration
+UPDATE agent_sessions
+SET
+    visit_id = CASE
+        WHEN state->>'visit_id' ~* '^[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}$'
+        THEN (state->>'visit_id')::uuid
+    END,
+    hospital_id = CASE
+        WHEN state->>'hospital_id' ~* '^[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}$'
+        THEN (state->>'hospital_id')::uuid
+    END
+WHERE state->>'visit_id' IS NOT NULL
+   OR state->>'hospital_id' IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_agent_sessions_visit_created
+    ON agent_sessions (visit_id, created_at);
+
+CREATE INDEX IF NOT EXISTS ix_agent_sessions_hospital_agent
+    ON agent_sessions (hospital_id, agent_name);
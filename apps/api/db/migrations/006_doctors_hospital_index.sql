@@ -0,0 +1,3 @@
+-- Reception dashboard lists every doctor of a hospital in one query
+
+CREATE INDEX IF NOT EXISTS ix_doctors_hospital ON doctors (hospital_id);
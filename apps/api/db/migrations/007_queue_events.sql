@@ -0,0 +1,42 @@
+-- Append-only queue_events log replaces the last_event_* columns that every
+-- mutation overwrote on doctor_queues
+
+CREATE TABLE IF NOT EXISTS queue_events (
+    id BIGSERIAL PRIMARY KEY,
+
+    queue_id UUID NOT NULL,
+    hospital_id UUID NOT NULL,
+    doctor_id UUID NOT NULL,
+    queue_date DATE NOT NULL,
+
+    version INT NOT NULL,
+
+    event_type TEXT NOT NULL,
+    visit_id UUID,
+    token_number INT,
+    entry_status TEXT,
+    reason TEXT,
+    actor TEXT,
+
+    occurred_at TIMESTAMPTZ NOT NULL,
+
+    CONSTRAINT uq_queue_event_version UNIQUE (queue_id, version)
+);
+
+-- Keep the one event each queue still remembers
+INSERT INTO queue_events (
+    queue_id, hospital_id, doctor_id, queue_date, version,
+    event_type, reason, actor, occurred_at
+)
+SELECT
+    id, hospital_id, doctor_id, queue_date, version,
+    last_event_type, last_event_reason, last_updated_by,
+    COALESCE(updated_at, created_at, now())
+FROM doctor_queues
+WHERE last_event_type IS NOT NULL
+ON CONFLICT ON CONSTRAINT uq_queue_event_version DO NOTHING;
+
+ALTER TABLE doctor_queues
+    DROP COLUMN IF EXISTS last_event_type,
+    DROP COLUMN IF EXISTS last_event_reason,
+    DROP COLUMN IF EXISTS last_updated_by;
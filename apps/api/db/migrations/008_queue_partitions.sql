@@ -0,0 +1,172 @@
+-- Range-partition doctor_queues and queue_entries by queue_date (one
+-- partition per month), so the hot path only touches the current month and
+-- closed months can be detached and archived without a bulk DELETE.
+--
+-- Postgres requires the partition key in every primary key and unique
+-- constraint, so queue_entries carries queue_date (copied from its queue)
+-- and references doctor_queues by (id, queue_date).
+
+-- Monthly partitions for both tables covering [p_from, p_to]; existing
+-- ones are left alone. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION create_queue_partitions(p_from DATE, p_to DATE)
+RETURNS INT
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    suffix TEXT;
+    parent TEXT;
+    created INT := 0;
+BEGIN
+    -- Serialise with other workers running the same maintenance
+    PERFORM pg_advisory_xact_lock(hashtext('queue_partitions'));
+
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        suffix := to_char(month_start, '"y"YYYY"m"MM');
+
+        FOREACH parent IN ARRAY ARRAY['doctor_queues', 'queue_entries'] LOOP
+            IF to_regclass(parent || '_' || suffix) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    parent || '_' || suffix, parent, month_start, month_end
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+
+        month_start := month_end;
+    END LOOP;
+
+    RETURN created;
+END $$;
+
+-- Detach the monthly partitions that end on or before p_before and move
+-- them to the queue_archive schema (or drop them when p_drop). Returns the
+-- number of partitions detached.
+CREATE OR REPLACE FUNCTION archive_queue_partitions(p_before DATE, p_drop BOOLEAN DEFAULT false)
+RETURNS INT
+LANGUAGE plpgsql AS $$
+DECLARE
+    part RECORD;
+    fk RECORD;
+    archived INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('queue_partitions'));
+
+    IF NOT p_drop THEN
+        CREATE SCHEMA IF NOT EXISTS queue_archive;
+    END IF;
+
+    -- Entries first: their FK still points at the queue partitions
+    FOR part IN
+        SELECT child.relname AS name, parent.relname AS parent
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE i.inhparent IN ('queue_entries'::regclass, 'doctor_queues'::regclass)
+          AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+          AND (
+              to_date(right(child.relname, 8), '"y"YYYY"m"MM') + INTERVAL '1 month'
+          )::date <= p_before
+        ORDER BY parent.relname = 'queue_entries' DESC, child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', part.parent, part.name);
+
+        -- A detached table keeps its FKs, which would block detaching the
+        -- queue partition it references next
+        FOR fk IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = part.name::regclass AND contype = 'f'
+        LOOP
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', part.name, fk.conname);
+        END LOOP;
+
+        IF p_drop THEN
+            EXECUTE format('DROP TABLE %I', part.name);
+        ELSE
+            EXECUTE format('ALTER TABLE %I SET SCHEMA queue_archive', part.name);
+        END IF;
+
+        archived := archived + 1;
+    END LOOP;
+
+    RETURN archived;
+END $$;
+
+-- 1️⃣ Entries carry their queue's date
+ALTER TABLE queue_entries ADD COLUMN IF NOT EXISTS queue_date DATE;
+
+UPDATE queue_entries e
+SET queue_date = q.queue_date
+FROM doctor_queues q
+WHERE q.id = e.queue_id
+  AND e.queue_date IS NULL;
+
+-- 2️⃣ Partitioned copies of both tables (same columns and defaults)
+ALTER TABLE queue_entries RENAME TO queue_entries_unpartitioned;
+ALTER TABLE doctor_queues RENAME TO doctor_queues_unpartitioned;
+
+CREATE TABLE doctor_queues (LIKE doctor_queues_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (queue_date);
+
+CREATE TABLE queue_entries (LIKE queue_entries_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (queue_date);
+
+SELECT create_queue_partitions(
+    LEAST(
+        COALESCE((SELECT min(queue_date) FROM doctor_queues_unpartitioned), current_date),
+        current_date
+    ),
+    GREATEST(
+        COALESCE((SELECT max(queue_date) FROM doctor_queues_unpartitioned), current_date),
+        (current_date + INTERVAL '3 months')::date
+    )
+);
+
+-- 3️⃣ Move the rows
+INSERT INTO doctor_queues SELECT * FROM doctor_queues_unpartitioned;
+INSERT INTO queue_entries SELECT * FROM queue_entries_unpartitioned;
+
+DROP TABLE queue_entries_unpartitioned;
+DROP TABLE doctor_queues_unpartitioned;
+
+-- 4️⃣ Keys, constraints and indexes (created on every partition)
+ALTER TABLE doctor_queues
+    ADD PRIMARY KEY (id, queue_date),
+    ADD CONSTRAINT uq_doctor_queue UNIQUE (doctor_id, queue_date),
+    ADD CONSTRAINT doctor_queues_hospital_id_fkey
+        FOREIGN KEY (hospital_id) REFERENCES hospitals(id);
+
+ALTER TABLE queue_entries
+    ALTER COLUMN queue_date SET NOT NULL,
+    ADD PRIMARY KEY (id, queue_date),
+    ADD CONSTRAINT fk_queue_entries_queue
+        FOREIGN KEY (queue_id, queue_date)
+        REFERENCES doctor_queues (id, queue_date) ON DELETE CASCADE,
+    ADD CONSTRAINT queue_entries_hospital_id_fkey
+        FOREIGN KEY (hospital_id) REFERENCES hospitals(id),
+    ADD CONSTRAINT queue_entries_status_check CHECK (
+        status IN (
+            'waiting',
+            'present',
+            'called',
+            'in_consultation',
+            'skipped',
+            'completed'
+        )
+    ),
+    ADD CONSTRAINT uq_queue_visit UNIQUE (queue_id, visit_id, queue_date),
+    ADD CONSTRAINT uq_queue_token UNIQUE (queue_id, token_number, queue_date);
+
+-- Status filters and patients-ahead range counts
+CREATE INDEX ix_queue_entries_queue_status_token
+    ON queue_entries (queue_id, status, token_number);
+
+-- call_next / next-waiting: callable entries only, in token order
+CREATE INDEX ix_queue_entries_callable
+    ON queue_entries (queue_id, token_number)
+    WHERE status IN ('waiting', 'present', 'called');
+
+-- check_in finds an entry by visit alone
+CREATE INDEX ix_queue_entries_visit ON queue_entries (visit_id);
@@ -0,0 +1,12 @@
+-- Per-doctor shift and consult-time defaults, copied into each day's
+-- doctor_queues row by the nightly pre-creation job (and by intake when a
+-- queue is still missing)
+
+ALTER TABLE doctors
+    ADD COLUMN IF NOT EXISTS shift_start_time TIME NOT NULL DEFAULT '09:00',
+    ADD COLUMN IF NOT EXISTS shift_end_time TIME NOT NULL DEFAULT '17:00',
+    ADD COLUMN IF NOT EXISTS avg_consult_time_minutes INT NOT NULL DEFAULT 10;
+
+-- Slot capacity divides by it
+ALTER TABLE doctors
+    ADD CONSTRAINT ck_doctors_consult_time CHECK (avg_consult_time_minutes > 0);
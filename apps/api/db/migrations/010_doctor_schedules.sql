@@ -0,0 +1,34 @@
+-- Weekly doctor schedules, and max_queue_size as each queue's precomputed
+-- slot capacity (intake admission compares live counters against it)
+
+CREATE TABLE IF NOT EXISTS doctor_schedules (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    doctor_id UUID NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+
+    weekday INT NOT NULL,  -- 0 = Monday .. 6 = Sunday
+
+    shift_start_time TIME NOT NULL,
+    shift_end_time TIME NOT NULL,
+    break_start_time TIME,
+    break_end_time TIME,
+
+    avg_consult_time_minutes INT,  -- null: the doctor's default
+    max_patients INT,              -- optional cap below slot capacity
+
+    CONSTRAINT uq_doctor_schedule_day UNIQUE (doctor_id, weekday),
+    CONSTRAINT ck_doctor_schedule_weekday CHECK (weekday BETWEEN 0 AND 6),
+    CONSTRAINT ck_doctor_schedule_shift CHECK (shift_end_time > shift_start_time),
+    CONSTRAINT ck_doctor_schedule_break
+        CHECK ((break_start_time IS NULL) = (break_end_time IS NULL)),
+    CONSTRAINT ck_doctor_schedule_consult_time
+        CHECK (avg_consult_time_minutes > 0),
+    CONSTRAINT ck_doctor_schedule_max_patients CHECK (max_patients >= 0)
+);
+
+-- Existing queues: the capacity intake used to derive on every call
+UPDATE doctor_queues
+SET max_queue_size = floor(
+    extract(epoch FROM shift_end_time - shift_start_time) / 60
+    / NULLIF(avg_consult_time_minutes, 0)
+)::int
+WHERE max_queue_size IS NULL;
@@ -0,0 +1,23 @@
+-- Priority lanes: entries are called in (priority_rank, token_number) order
+-- within the present / waiting split, with ranks from a per-hospital policy
+
+ALTER TABLE hospitals
+    ADD COLUMN IF NOT EXISTS queue_priority_policy JSONB;
+
+-- Existing entries join the default policy's "normal" lane
+ALTER TABLE queue_entries
+    ADD COLUMN IF NOT EXISTS priority TEXT NOT NULL DEFAULT 'normal',
+    ADD COLUMN IF NOT EXISTS priority_rank INT NOT NULL DEFAULT 3;
+
+-- The token-ordered indexes become lane-then-token ordered
+DROP INDEX IF EXISTS ix_queue_entries_queue_status_token;
+DROP INDEX IF EXISTS ix_queue_entries_callable;
+
+-- Status filters and patients-ahead range counts
+CREATE INDEX IF NOT EXISTS ix_queue_entries_queue_status_rank_token
+    ON queue_entries (queue_id, status, priority_rank, token_number);
+
+-- call_next / next-waiting: callable entries only, in lane order
+CREATE INDEX IF NOT EXISTS ix_queue_entries_callable_rank
+    ON queue_entries (queue_id, priority_rank, token_number)
+    WHERE status IN ('waiting', 'present', 'called');
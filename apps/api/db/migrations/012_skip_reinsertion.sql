@@ -0,0 +1,37 @@
+-- Reinsertion of skipped patients who check in again. The skip columns
+-- were written by skip_patient but never declared on every database.
+
+ALTER TABLE queue_entries
+    ADD COLUMN IF NOT EXISTS skipped_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS skip_reason TEXT,
+    ADD COLUMN IF NOT EXISTS skip_position_token INT,
+    ADD COLUMN IF NOT EXISTS eligible_after_token INT,
+    ADD COLUMN IF NOT EXISTS reinsert_requested_at TIMESTAMPTZ;
+
+ALTER TABLE doctor_queues
+    ADD COLUMN IF NOT EXISTS reinsert_pending_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS highest_called_token INT NOT NULL DEFAULT 0;
+
+-- Entries skipped before this migration have no threshold yet
+UPDATE queue_entries
+SET skip_position_token = COALESCE(skip_position_token, token_number),
+    eligible_after_token = COALESCE(skip_position_token, token_number) + 2
+WHERE status = 'skipped'
+  AND eligible_after_token IS NULL;
+
+-- Called entries have a consultation_start_time (set by call_next)
+UPDATE doctor_queues q
+SET highest_called_token = c.highest
+FROM (
+    SELECT queue_id, queue_date, MAX(token_number) AS highest
+    FROM queue_entries
+    WHERE consultation_start_time IS NOT NULL
+    GROUP BY queue_id, queue_date
+) c
+WHERE q.id = c.queue_id
+  AND q.queue_date = c.queue_date;
+
+-- call_next reinsertion: checked-in skipped entries by threshold
+CREATE INDEX IF NOT EXISTS ix_queue_entries_reinsert
+    ON queue_entries (queue_id, eligible_after_token)
+    WHERE status = 'skipped' AND reinsert_requested_at IS NOT NULL;
@@ -8,7 +8,9 @@ CREATE TABLE hospitals (
     address TEXT NOT NULL,
     contact_number TEXT NOT NULL,
     is_active BOOLEAN DEFAULT true,
-    created_at TIMESTAMPTZ DEFAULT now()
+    created_at TIMESTAMPTZ DEFAULT now(),
+    -- QueuePriorityPolicy (class -> rank, elderly_min_age); null = default
+    queue_priority_policy JSONB
 );
 
 
@@ -25,7 +27,41 @@ CREATE TABLE doctors (
     department_id UUID NOT NULL REFERENCES departments(id),
     specialization TEXT,
     is_available BOOLEAN DEFAULT true,
-    hospital_id UUID NOT NULL REFERENCES hospitals(id)
+    hospital_id UUID NOT NULL REFERENCES hospitals(id),
+
+    -- Defaults copied into each day's doctor_queues row
+    shift_start_time TIME NOT NULL DEFAULT '09:00',
+    shift_end_time TIME NOT NULL DEFAULT '17:00',
+    avg_consult_time_minutes INT NOT NULL DEFAULT 10,
+
+    CONSTRAINT ck_doctors_consult_time CHECK (avg_consult_time_minutes > 0)
+);
+
+CREATE INDEX ix_doctors_hospital ON doctors (hospital_id);
+
+-- Weekly schedule: a doctor with rows here works only on those weekdays
+CREATE TABLE doctor_schedules (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    doctor_id UUID NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+
+    weekday INT NOT NULL,  -- 0 = Monday .. 6 = Sunday
+
+    shift_start_time TIME NOT NULL,
+    shift_end_time TIME NOT NULL,
+    break_start_time TIME,
+    break_end_time TIME,
+
+    avg_consult_time_minutes INT,  -- null: the doctor's default
+    max_patients INT,              -- optional cap below slot capacity
+
+    CONSTRAINT uq_doctor_schedule_day UNIQUE (doctor_id, weekday),
+    CONSTRAINT ck_doctor_schedule_weekday CHECK (weekday BETWEEN 0 AND 6),
+    CONSTRAINT ck_doctor_schedule_shift CHECK (shift_end_time > shift_start_time),
+    CONSTRAINT ck_doctor_schedule_break
+        CHECK ((break_start_time IS NULL) = (break_end_time IS NULL)),
+    CONSTRAINT ck_doctor_schedule_consult_time
+        CHECK (avg_consult_time_minutes > 0),
+    CONSTRAINT ck_doctor_schedule_max_patients CHECK (max_patients >= 0)
 );
 
 CREATE TABLE patients (
@@ -71,12 +107,21 @@ CREATE TABLE agent_sessions (
     session_id UUID PRIMARY KEY,
     agent_name TEXT NOT NULL,
     state JSONB NOT NULL,
+    -- Lifted out of state on every write so lookups don't scan JSONB
+    visit_id UUID,
+    hospital_id UUID,
     created_at TIMESTAMPTZ DEFAULT now(),
     updated_at TIMESTAMPTZ DEFAULT now()
 );
 
+CREATE INDEX ix_agent_sessions_visit_created ON agent_sessions (visit_id, created_at);
+CREATE INDEX ix_agent_sessions_hospital_agent ON agent_sessions (hospital_id, agent_name);
+
+-- doctor_queues and queue_entries are range-partitioned by queue_date, one
+-- partition per month (see create_queue_partitions below). Postgres needs
+-- the partition key in every primary key and unique constraint.
 CREATE TABLE doctor_queues (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
 
     doctor_id UUID NOT NULL,
     hospital_id UUID NOT NULL REFERENCES hospitals(id),
@@ -88,34 +133,49 @@ CREATE TABLE doctor_queues (
 
     -- Queue control
     queue_open BOOLEAN DEFAULT true,
-    max_queue_size INT,
+    max_queue_size INT,  -- slot capacity, precomputed from the schedule
     avg_consult_time_minutes INT NOT NULL DEFAULT 10,
 
     -- Progress tracking
     current_token INT DEFAULT 0,
     current_visit_id UUID,
+    last_token_number INT NOT NULL DEFAULT 0,  -- per-queue token counter
+    highest_called_token INT NOT NULL DEFAULT 0,  -- skip reinsertion threshold
+
+    -- Live per-status counters (maintained by QueueService transitions)
+    waiting_count INT NOT NULL DEFAULT 0,
+    present_count INT NOT NULL DEFAULT 0,
+    called_count INT NOT NULL DEFAULT 0,
+    in_consultation_count INT NOT NULL DEFAULT 0,
+    completed_count INT NOT NULL DEFAULT 0,
+    skipped_count INT NOT NULL DEFAULT 0,
+    reinsert_pending_count INT NOT NULL DEFAULT 0,  -- skipped, checked in again
 
-    -- Explainability & audit
-    last_event_type TEXT,
-    last_event_reason TEXT,
-    last_updated_by TEXT,
+    -- Bumped on every mutation; carried in cross-worker NOTIFY payloads
+    version INT NOT NULL DEFAULT 0,
 
     created_at TIMESTAMPTZ DEFAULT now(),
     updated_at TIMESTAMPTZ DEFAULT now(),
 
+    PRIMARY KEY (id, queue_date),
     CONSTRAINT uq_doctor_queue UNIQUE (doctor_id, queue_date)
-);
+) PARTITION BY RANGE (queue_date);
 
 CREATE TABLE queue_entries (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
 
-    queue_id UUID NOT NULL REFERENCES doctor_queues(id) ON DELETE CASCADE,
+    queue_id UUID NOT NULL,
+    queue_date DATE NOT NULL,  -- copied from the queue (partition key)
     visit_id UUID NOT NULL,
     hospital_id UUID NOT NULL REFERENCES hospitals(id),
 
     token_number INT NOT NULL,
     position INT NOT NULL,
 
+    -- Priority lane from the hospital's policy; lower ranks are called first
+    priority TEXT NOT NULL DEFAULT 'normal',
+    priority_rank INT NOT NULL DEFAULT 3,
+
     status TEXT NOT NULL CHECK (
         status IN (
             'waiting',
@@ -134,12 +194,149 @@ CREATE TABLE queue_entries (
     skip_reason TEXT,
     skip_position_token INT,
     eligible_after_token INT,
+    reinsert_requested_at TIMESTAMPTZ,
 
     created_at TIMESTAMPTZ DEFAULT now(),
     updated_at TIMESTAMPTZ DEFAULT now(),
 
-    CONSTRAINT uq_queue_visit UNIQUE (queue_id, visit_id),
-    CONSTRAINT uq_queue_token UNIQUE (queue_id, token_number)
+    PRIMARY KEY (id, queue_date),
+    CONSTRAINT fk_queue_entries_queue FOREIGN KEY (queue_id, queue_date)
+        REFERENCES doctor_queues (id, queue_date) ON DELETE CASCADE,
+    CONSTRAINT uq_queue_visit UNIQUE (queue_id, visit_id, queue_date),
+    CONSTRAINT uq_queue_token UNIQUE (queue_id, token_number, queue_date)
+) PARTITION BY RANGE (queue_date);
+
+-- Status filters and patients-ahead range counts
+CREATE INDEX ix_queue_entries_queue_status_rank_token
+    ON queue_entries (queue_id, status, priority_rank, token_number);
+
+-- call_next / next-waiting: callable entries only, in lane order
+CREATE INDEX ix_queue_entries_callable_rank
+    ON queue_entries (queue_id, priority_rank, token_number)
+    WHERE status IN ('waiting', 'present', 'called');
+
+-- check_in finds an entry by visit alone
+CREATE INDEX ix_queue_entries_visit ON queue_entries (visit_id);
+
+-- call_next reinsertion: checked-in skipped entries by threshold
+CREATE INDEX ix_queue_entries_reinsert
+    ON queue_entries (queue_id, eligible_after_token)
+    WHERE status = 'skipped' AND reinsert_requested_at IS NOT NULL;
+
+-- Monthly partitions for both tables covering [p_from, p_to]; existing
+-- ones are left alone. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION create_queue_partitions(p_from DATE, p_to DATE)
+RETURNS INT
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    suffix TEXT;
+    parent TEXT;
+    created INT := 0;
+BEGIN
+    -- Serialise with other workers running the same maintenance
+    PERFORM pg_advisory_xact_lock(hashtext('queue_partitions'));
+
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        suffix := to_char(month_start, '"y"YYYY"m"MM');
+
+        FOREACH parent IN ARRAY ARRAY['doctor_queues', 'queue_entries'] LOOP
+            IF to_regclass(parent || '_' || suffix) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    parent || '_' || suffix, parent, month_start, month_end
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+
+        month_start := month_end;
+    END LOOP;
+
+    RETURN created;
+END $$;
+
+-- Detach the monthly partitions that end on or before p_before and move
+-- them to the queue_archive schema (or drop them when p_drop). Returns the
+-- number of partitions detached.
+CREATE OR REPLACE FUNCTION archive_queue_partitions(p_before DATE, p_drop BOOLEAN DEFAULT false)
+RETURNS INT
+LANGUAGE plpgsql AS $$
+DECLARE
+    part RECORD;
+    fk RECORD;
+    archived INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('queue_partitions'));
+
+    IF NOT p_drop THEN
+        CREATE SCHEMA IF NOT EXISTS queue_archive;
+    END IF;
+
+    -- Entries first: their FK still points at the queue partitions
+    FOR part IN
+        SELECT child.relname AS name, parent.relname AS parent
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE i.inhparent IN ('queue_entries'::regclass, 'doctor_queues'::regclass)
+          AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+          AND (
+              to_date(right(child.relname, 8), '"y"YYYY"m"MM') + INTERVAL '1 month'
+          )::date <= p_before
+        ORDER BY parent.relname = 'queue_entries' DESC, child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', part.parent, part.name);
+
+        -- A detached table keeps its FKs, which would block detaching the
+        -- queue partition it references next
+        FOR fk IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = part.name::regclass AND contype = 'f'
+        LOOP
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', part.name, fk.conname);
+        END LOOP;
+
+        IF p_drop THEN
+            EXECUTE format('DROP TABLE %I', part.name);
+        ELSE
+            EXECUTE format('ALTER TABLE %I SET SCHEMA queue_archive', part.name);
+        END IF;
+
+        archived := archived + 1;
+    END LOOP;
+
+    RETURN archived;
+END $$;
+
+-- Current month and the next three; scripts/maintain_queue_partitions.py
+-- keeps the window rolling
+SELECT create_queue_partitions(current_date, (current_date + INTERVAL '3 months')::date);
+
+-- Append-only queue history (written in batches by QueueEventLog).
+-- version is DoctorQueue.version after the event: the per-queue cursor.
+CREATE TABLE queue_events (
+    id BIGSERIAL PRIMARY KEY,
+
+    queue_id UUID NOT NULL,
+    hospital_id UUID NOT NULL,
+    doctor_id UUID NOT NULL,
+    queue_date DATE NOT NULL,
+
+    version INT NOT NULL,
+
+    event_type TEXT NOT NULL,
+    visit_id UUID,
+    token_number INT,
+    entry_status TEXT,
+    reason TEXT,
+    actor TEXT,
+
+    occurred_at TIMESTAMPTZ NOT NULL,
+
+    CONSTRAINT uq_queue_event_version UNIQUE (queue_id, version)
 );
 
 
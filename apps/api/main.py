@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from agents.registration.router import router as registration_router
@@ -6,10 +8,39 @@ from agents.doctor_assistance.router import router as doctor_assistance_router
 from agents.chatbot.router import router as chatbot_router
 from routers.doctor_router import router as doctor_router
 from routers.hospital_router import router as hospital_router
+from services.agent_dispatcher import agent_dispatcher
+from services.hospital_load_summary import hospital_load_summary
+from services.queue_event_log import queue_event_log
+from services.queue_notifications import queue_change_listener
+from services.queue_partitions import ensure_partitions_at_startup
+from services.queue_scheduler import queue_scheduler
+from services.queue_warmup import warm_start
+from services.wait_time_estimator import wait_time_estimator
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    queue_change_listener.start()
+    agent_dispatcher.start()
+    queue_event_log.start()
+    await ensure_partitions_at_startup()
+    queue_scheduler.start()
+    wait_time_estimator.start()
+    hospital_load_summary.start()
+    app.state.queue_warmup = await warm_start()
+    yield
+    await hospital_load_summary.stop()
+    await wait_time_estimator.stop()
+    await queue_scheduler.stop()
+    await agent_dispatcher.stop()
+    await queue_event_log.stop()
+    await queue_change_listener.stop()
+
 
 app = FastAPI(
     title="HMS Multi-Agent API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(registration_router, prefix="/api")
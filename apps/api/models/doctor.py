@@ -1,7 +1,8 @@
-from sqlalchemy import String, Boolean, ForeignKey
+from sqlalchemy import String, Boolean, CheckConstraint, ForeignKey, Index, Integer, Time
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+from datetime import time
 
 from db.base import Base
 
@@ -39,9 +40,35 @@ class Doctor(Base):
         nullable=False,
     )
 
+    # Defaults copied into each day's DoctorQueue when it is created
+    shift_start_time: Mapped[time] = mapped_column(
+        Time,
+        default=time(9, 0),
+        nullable=False,
+    )
+
+    shift_end_time: Mapped[time] = mapped_column(
+        Time,
+        default=time(17, 0),
+        nullable=False,
+    )
+
+    avg_consult_time_minutes: Mapped[int] = mapped_column(
+        Integer,
+        default=10,
+        nullable=False,
+    )
+
     # Relationships
     department = relationship("Department", back_populates="doctors")
     visits = relationship("Visit", back_populates="doctor")
 
+    __table_args__ = (
+        # Hospital-wide reception dashboard
+        Index("ix_doctors_hospital", "hospital_id"),
+        # Slot capacity divides by it
+        CheckConstraint("avg_consult_time_minutes > 0", name="ck_doctors_consult_time"),
+    )
+
     def __repr__(self) -> str:
         return f"<Doctor(name={self.name}, dept={self.department_id})>"
@@ -5,8 +5,8 @@ from sqlalchemy import (
     Time,
     Boolean,
     Integer,
-    Text,
     ForeignKey,
+    UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -23,21 +23,38 @@ class DoctorQueue(Base):
 
     doctor_id = Column(UUID(as_uuid=True), nullable=False)
     hospital_id = Column(UUID(as_uuid=True), nullable=False)
-    queue_date = Column(Date, nullable=False)
+    # Partition key (monthly ranges), so it is part of the primary key
+    queue_date = Column(Date, primary_key=True)
 
     shift_start_time = Column(Time, nullable=False)
     shift_end_time = Column(Time, nullable=False)
 
     queue_open = Column(Boolean, default=True)
+    # Slot capacity precomputed from the doctor's schedule; intake admits
+    # while the active counters stay below it
     max_queue_size = Column(Integer)
     avg_consult_time_minutes = Column(Integer, default=10)
 
     current_token = Column(Integer, default=0)
     current_visit_id = Column(UUID(as_uuid=True))
+    last_token_number = Column(Integer, nullable=False, default=0)
+    # Highest token called so far; current_token is cleared between
+    # consultations, so skip reinsertion compares against this
+    highest_called_token = Column(Integer, nullable=False, default=0)
 
-    last_event_type = Column(Text)
-    last_event_reason = Column(Text)
-    last_updated_by = Column(Text)
+    # Live per-status counters, maintained by QueueService transitions
+    waiting_count = Column(Integer, nullable=False, default=0)
+    present_count = Column(Integer, nullable=False, default=0)
+    called_count = Column(Integer, nullable=False, default=0)
+    in_consultation_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+    # Skipped entries that checked in again and await reinsertion; call_next
+    # only looks for them while this is non-zero
+    reinsert_pending_count = Column(Integer, nullable=False, default=0)
+
+    # Bumped on every mutation; carried in cross-worker NOTIFY payloads
+    version = Column(Integer, nullable=False, default=0)
 
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
@@ -54,3 +71,8 @@ class DoctorQueue(Base):
         back_populates="queue",
         cascade="all, delete-orphan",
     )
+
+    __table_args__ = (
+        UniqueConstraint("doctor_id", "queue_date", name="uq_doctor_queue"),
+        {"postgresql_partition_by": "RANGE (queue_date)"},
+    )
@@ -0,0 +1,62 @@
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    ForeignKey,
+    Integer,
+    Time,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from db.base import Base
+
+
+class DoctorSchedule(Base):
+    """
+    One working day of a doctor's weekly schedule. A doctor with schedule
+    rows works only on those weekdays; a doctor without any uses the
+    shift defaults on the doctors row every day.
+    """
+
+    __tablename__ = "doctor_schedules"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    doctor_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("doctors.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # 0 = Monday .. 6 = Sunday (date.weekday())
+    weekday = Column(Integer, nullable=False)
+
+    shift_start_time = Column(Time, nullable=False)
+    shift_end_time = Column(Time, nullable=False)
+
+    # Optional break inside the shift, excluded from slot capacity
+    break_start_time = Column(Time)
+    break_end_time = Column(Time)
+
+    # Falls back to Doctor.avg_consult_time_minutes when null
+    avg_consult_time_minutes = Column(Integer)
+
+    # Optional cap below the slot capacity
+    max_patients = Column(Integer)
+
+    __table_args__ = (
+        UniqueConstraint("doctor_id", "weekday", name="uq_doctor_schedule_day"),
+        CheckConstraint("weekday BETWEEN 0 AND 6", name="ck_doctor_schedule_weekday"),
+        CheckConstraint(
+            "shift_end_time > shift_start_time", name="ck_doctor_schedule_shift"
+        ),
+        CheckConstraint(
+            "(break_start_time IS NULL) = (break_end_time IS NULL)",
+            name="ck_doctor_schedule_break",
+        ),
+        CheckConstraint(
+            "avg_consult_time_minutes > 0", name="ck_doctor_schedule_consult_time"
+        ),
+        CheckConstraint("max_patients >= 0", name="ck_doctor_schedule_max_patients"),
+    )
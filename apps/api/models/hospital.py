@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, Boolean, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
 from datetime import datetime
@@ -16,3 +16,5 @@ class Hospital(Base):
     contact_number = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # QueuePriorityPolicy as JSON; null means the default policy
+    queue_priority_policy = Column(JSONB)
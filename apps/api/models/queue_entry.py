@@ -1,9 +1,13 @@
 from sqlalchemy import (
     Column,
+    Date,
     Integer,
     Text,
-    ForeignKey,
+    ForeignKeyConstraint,
     DateTime,
+    UniqueConstraint,
+    Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -18,11 +22,9 @@ class QueueEntry(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    queue_id = Column(
-        UUID(as_uuid=True),
-        ForeignKey("doctor_queues.id", ondelete="CASCADE"),
-        nullable=False,
-    )
+    queue_id = Column(UUID(as_uuid=True), nullable=False)
+    # Copied from the queue: partition key, and half of the FK to doctor_queues
+    queue_date = Column(Date, primary_key=True)
 
     visit_id = Column(UUID(as_uuid=True), nullable=False)
     hospital_id = Column(UUID(as_uuid=True), nullable=False)
@@ -30,6 +32,11 @@ class QueueEntry(Base):
     token_number = Column(Integer, nullable=False)
     position = Column(Integer, nullable=False)
 
+    # Priority lane, resolved at intake from the hospital's policy; entries
+    # are called in (priority_rank, token_number) order
+    priority = Column(Text, nullable=False, default="normal")
+    priority_rank = Column(Integer, nullable=False, default=3)
+
     status = Column(
         Text,
         nullable=False,
@@ -39,6 +46,14 @@ class QueueEntry(Base):
     consultation_start_time = Column(DateTime(timezone=True))
     consultation_end_time = Column(DateTime(timezone=True))
 
+    # Skip and reinsertion: a skipped patient who checks in again is put
+    # back (as present) once the doctor calls eligible_after_token or later
+    skipped_at = Column(DateTime(timezone=True))
+    skip_reason = Column(Text)
+    skip_position_token = Column(Integer)
+    eligible_after_token = Column(Integer)
+    reinsert_requested_at = Column(DateTime(timezone=True))
+
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -50,3 +65,43 @@ class QueueEntry(Base):
     )
 
     queue = relationship("DoctorQueue", back_populates="entries")
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["queue_id", "queue_date"],
+            ["doctor_queues.id", "doctor_queues.queue_date"],
+            name="fk_queue_entries_queue",
+            ondelete="CASCADE",
+        ),
+        # Unique keys on a partitioned table must include queue_date
+        UniqueConstraint("queue_id", "visit_id", "queue_date", name="uq_queue_visit"),
+        UniqueConstraint("queue_id", "token_number", "queue_date", name="uq_queue_token"),
+        # Status filters and patients-ahead range counts
+        Index(
+            "ix_queue_entries_queue_status_rank_token",
+            "queue_id",
+            "status",
+            "priority_rank",
+            "token_number",
+        ),
+        # call_next / next-waiting: callable entries only, in lane order
+        Index(
+            "ix_queue_entries_callable_rank",
+            "queue_id",
+            "priority_rank",
+            "token_number",
+            postgresql_where=text("status IN ('waiting', 'present', 'called')"),
+        ),
+        # check_in finds an entry by visit alone
+        Index("ix_queue_entries_visit", "visit_id"),
+        # call_next reinsertion: checked-in skipped entries by threshold
+        Index(
+            "ix_queue_entries_reinsert",
+            "queue_id",
+            "eligible_after_token",
+            postgresql_where=text(
+                "status = 'skipped' AND reinsert_requested_at IS NOT NULL"
+            ),
+        ),
+        {"postgresql_partition_by": "RANGE (queue_date)"},
+    )
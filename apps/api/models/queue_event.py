@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from db.base import Base
+
+
+class QueueEvent(Base):
+    """
+    Append-only history of queue mutations, written in batches by
+    QueueEventLog after each transaction commits.
+    """
+
+    __tablename__ = "queue_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # No FK to doctor_queues: the log is written after commit and outlives
+    # the queue rows it describes
+    queue_id = Column(UUID(as_uuid=True), nullable=False)
+    hospital_id = Column(UUID(as_uuid=True), nullable=False)
+    doctor_id = Column(UUID(as_uuid=True), nullable=False)
+    queue_date = Column(Date, nullable=False)
+
+    # DoctorQueue.version after this event; the per-queue read cursor
+    version = Column(Integer, nullable=False)
+
+    event_type = Column(Text, nullable=False)
+    visit_id = Column(UUID(as_uuid=True))
+    token_number = Column(Integer)
+    entry_status = Column(Text)
+    reason = Column(Text)
+    actor = Column(Text)
+
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("queue_id", "version", name="uq_queue_event_version"),
+    )
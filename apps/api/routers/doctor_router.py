@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
+from datetime import time
 
 from db.session import get_db_session
 from models.doctor import Doctor
 from models.department import Department
+from services.doctor_service import DoctorService
 
 router = APIRouter(prefix="/doctors", tags=["Doctors"])
 
@@ -26,6 +28,26 @@ class DoctorLoginResponse(BaseModel):
     is_available: bool
 
 
+class DoctorScheduleDay(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = Monday
+    shift_start_time: time
+    shift_end_time: time
+    break_start_time: Optional[time] = None
+    break_end_time: Optional[time] = None
+    avg_consult_time_minutes: Optional[int] = Field(default=None, gt=0)
+    max_patients: Optional[int] = Field(default=None, ge=0)
+
+
+class DoctorScheduleRequest(BaseModel):
+    # Replaces the whole week; an empty list means "every day, doctor defaults"
+    days: List[DoctorScheduleDay]
+
+
+class DoctorScheduleResponse(BaseModel):
+    doctor_id: UUID
+    days: List[DoctorScheduleDay]
+
+
 @router.post("/login", response_model=DoctorLoginResponse)
 async def doctor_login(
     request: DoctorLoginRequest,
@@ -106,3 +128,40 @@ async def get_doctor(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{doctor_id}/schedule", response_model=DoctorScheduleResponse)
+async def get_doctor_schedule(
+    doctor_id: UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Weekly schedule used to pre-create the doctor's queues"""
+    days = await DoctorService.get_schedule(db, doctor_id)
+    return DoctorScheduleResponse(
+        doctor_id=doctor_id,
+        days=[DoctorScheduleDay.model_validate(day, from_attributes=True) for day in days],
+    )
+
+
+@router.put("/{doctor_id}/schedule", response_model=DoctorScheduleResponse)
+async def replace_doctor_schedule(
+    doctor_id: UUID,
+    request: DoctorScheduleRequest,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Replace the weekly schedule. Takes effect for queues not yet started,
+    including tomorrow's if it is already pre-created.
+    """
+    try:
+        days = await DoctorService.replace_schedule(
+            db, doctor_id, [day.model_dump() for day in request.days]
+        )
+    except ValueError as e:
+        status = 404 if str(e) == "Doctor not found" else 400
+        raise HTTPException(status_code=status, detail=str(e))
+
+    return DoctorScheduleResponse(
+        doctor_id=doctor_id,
+        days=[DoctorScheduleDay.model_validate(day, from_attributes=True) for day in days],
+    )
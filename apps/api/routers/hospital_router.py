@@ -1,11 +1,14 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.hospital_service import HospitalService
+from services.queue_simulator import simulate_hospital_queues
 from db.session import get_db_session
 from models.hospital import Hospital
 from typing import List
+from datetime import datetime
 import uuid
-from schemas.hospital import HospitalOut, HospitalCreate, HospitalLoginRequest
+from schemas.hospital import HospitalOut, HospitalCreate, HospitalLoginRequest, HospitalQueuesToday, QueuePriorityPolicy, QueueSimulationRequest, HospitalQueueSimulation
 
 router = APIRouter(prefix="/hospitals", tags=["hospitals"])
 
@@ -65,3 +68,49 @@ async def get_hospital(hospital_id: uuid.UUID, db: AsyncSession = Depends(get_db
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     return hospital
+
+
+@router.get("/{hospital_id}/queues/today", response_model=HospitalQueuesToday)
+async def hospital_queues_today(
+    hospital_id: uuid.UUID, db: AsyncSession = Depends(get_db_session)
+):
+    """Reception dashboard: every doctor's queue summary for today in one call."""
+    service = HospitalService(db)
+    return await service.queues_for_day(hospital_id, datetime.utcnow().date())
+
+
+@router.post("/{hospital_id}/queues/simulate", response_model=HospitalQueueSimulation)
+async def simulate_queues(
+    hospital_id: uuid.UUID,
+    request: QueueSimulationRequest,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """What-if Monte Carlo of the day's doctor queues: finish times and overrun risk."""
+    try:
+        return await simulate_hospital_queues(db, hospital_id, request)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503, detail="Simulation exceeded its latency budget"
+        )
+
+
+@router.get("/{hospital_id}/queue-priority-policy", response_model=QueuePriorityPolicy)
+async def get_queue_priority_policy(
+    hospital_id: uuid.UUID, db: AsyncSession = Depends(get_db_session)
+):
+    """Priority lanes used when registering patients into doctor queues."""
+    service = HospitalService(db)
+    return await service.get_queue_priority_policy(hospital_id)
+
+
+@router.put("/{hospital_id}/queue-priority-policy", response_model=QueuePriorityPolicy)
+async def set_queue_priority_policy(
+    hospital_id: uuid.UUID,
+    policy: QueuePriorityPolicy,
+    db: AsyncSession = Depends(get_db_session),
+):
+    service = HospitalService(db)
+    stored = await service.set_queue_priority_policy(hospital_id, policy)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    return stored
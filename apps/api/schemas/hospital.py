@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from uuid import UUID
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 
 class HospitalCreate(BaseModel):
@@ -28,3 +28,121 @@ class HospitalOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class QueuePriorityPolicy(BaseModel):
+    # Priority class -> rank; lower ranks are called first, ties by token
+    ranks: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "emergency": 0,
+            "elderly": 1,
+            "follow_up": 2,
+            "normal": 3,
+        }
+    )
+    # Patients at least this old are classed "elderly" unless a class is given
+    elderly_min_age: Optional[int] = 75
+
+    @field_validator("ranks")
+    @classmethod
+    def check_ranks(cls, ranks: Dict[str, int]) -> Dict[str, int]:
+        if "normal" not in ranks:
+            raise ValueError("ranks must include 'normal'")
+        if any(rank < 0 for rank in ranks.values()):
+            raise ValueError("ranks must be non-negative")
+        return ranks
+
+
+class DoctorQueueSummary(BaseModel):
+    doctor_id: UUID
+    doctor_name: str
+    specialization: Optional[str] = None
+    is_available: bool
+    department_id: UUID
+    department_name: str
+    # None when the doctor has no queue for the day yet
+    queue_open: Optional[bool] = None
+    current_token: Optional[int] = None
+    last_token_number: int = 0
+    avg_consult_time_minutes: Optional[int] = None
+    total_visits: int = 0
+    waiting: int = 0
+    present: int = 0
+    called: int = 0
+    in_consultation: int = 0
+    completed: int = 0
+    skipped: int = 0
+
+
+class DoctorLoad(BaseModel):
+    doctor_id: UUID
+    doctor_name: str
+    specialization: Optional[str] = None
+    # Patients not yet seen (waiting, present, called, in consultation)
+    queue_length: int = 0
+    estimated_wait_minutes: int = 0
+    # False when the queue is closed or at its slot capacity
+    accepting: bool = True
+
+
+class HospitalQueuesToday(BaseModel):
+    hospital_id: UUID
+    queue_date: date
+    doctors: List[DoctorQueueSummary]
+
+
+class QueueSimulationRequest(BaseModel):
+    # Defaults to today
+    queue_date: Optional[date] = None
+    # Only these doctors (default: every doctor with a queue that day)
+    doctor_ids: Optional[List[UUID]] = None
+    # What-if: mean consultation minutes per doctor, replacing the observed mean
+    consult_minutes: Dict[UUID, float] = Field(default_factory=dict)
+    # What-if: further patients joining each doctor's queue
+    extra_patients: Dict[UUID, int] = Field(default_factory=dict)
+    trials: int = Field(2000, ge=100, le=20000)
+    # Fixed seed for reproducible runs
+    seed: Optional[int] = None
+
+    @field_validator("consult_minutes")
+    @classmethod
+    def check_consult_minutes(cls, minutes: Dict[UUID, float]) -> Dict[UUID, float]:
+        if any(m <= 0 for m in minutes.values()):
+            raise ValueError("consult_minutes must be positive")
+        return minutes
+
+    @field_validator("extra_patients")
+    @classmethod
+    def check_extra_patients(cls, extra: Dict[UUID, int]) -> Dict[UUID, int]:
+        if any(n < 0 for n in extra.values()):
+            raise ValueError("extra_patients must be non-negative")
+        return extra
+
+
+class DoctorQueueSimulation(BaseModel):
+    doctor_id: UUID
+    doctor_name: str
+    patients_remaining: int
+    # May be below the requested trials to stay within the latency budget
+    trials: int
+    mean_consult_minutes: float
+    # Observed durations behind the run; 0 means a lognormal around the
+    # configured consult time
+    history_samples: int
+    shift_end: datetime
+    # When the last remaining patient is done
+    finish_p10: datetime
+    finish_p50: datetime
+    finish_p90: datetime
+    # Closing-time risk
+    overrun_probability: float
+    expected_overtime_minutes: float
+    expected_unserved_at_shift_end: float
+
+
+class HospitalQueueSimulation(BaseModel):
+    hospital_id: UUID
+    queue_date: date
+    simulated_at: datetime
+    elapsed_ms: float
+    doctors: List[DoctorQueueSimulation]
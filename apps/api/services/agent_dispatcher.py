@@ -0,0 +1,242 @@
+"""
+Background delivery of queue transitions to the Doctor Assistance agent.
+
+QueueService commits the queue mutation, submits a job here and responds
+straight away; a small pool of workers then loads, advances and persists
+the agent session in its own database session. Jobs for the same visit run
+in submission order, transient failures are retried with backoff, and the
+latest sync status per visit is kept for the /agent-sync lookup.
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from agents.base.agent import InvalidStepTransition
+from agents.doctor_assistance.agent import DoctorAssistanceAgent
+from agents.doctor_assistance.state import DoctorAssistanceState
+from agents.queue.schemas import AgentSyncStatus
+from db.session import AsyncSessionLocal
+from services.agent_session_service import AgentSessionService
+
+
+AGENT_WORKERS = 4
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 0.5
+DRAIN_TIMEOUT_SECONDS = 10
+# Sync statuses remembered per worker process (oldest dropped first)
+STATUS_HISTORY = 10_000
+
+DOCTOR_ASSISTANCE_AGENT = DoctorAssistanceState.model_fields["agent_name"].default
+
+
+class AgentSyncJob:
+
+    def __init__(
+        self,
+        visit_id: UUID,
+        action: str,
+        queue_date: date,
+        context: Dict[str, Any],
+    ):
+        self.visit_id = visit_id
+        self.action = action
+        self.queue_date = queue_date
+        # Visit context captured inside the queue transaction, used when
+        # no agent session exists yet
+        self.context = context
+        self.attempts = 0
+
+
+class AgentDispatcher:
+
+    def __init__(self, workers: int = AGENT_WORKERS):
+        self.workers = workers
+        self._jobs: asyncio.Queue[AgentSyncJob] | None = None
+        self._tasks: List[asyncio.Task] = []
+        self._visit_locks: Dict[UUID, asyncio.Lock] = {}
+        self._visit_pending: Dict[UUID, int] = {}
+        self._statuses: "OrderedDict[UUID, AgentSyncStatus]" = OrderedDict()
+
+    def start(self) -> None:
+        self._jobs = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> None:
+        """
+        Let queued handoffs finish (up to timeout), then stop the workers.
+        """
+        if self._jobs is not None:
+            try:
+                await asyncio.wait_for(self._jobs.join(), timeout)
+            except asyncio.TimeoutError:
+                print(
+                    "[AgentDispatcher] Stopping with undelivered handoffs | "
+                    f"pending={self._jobs.qsize()}"
+                )
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._jobs = None
+
+    def submit(
+        self,
+        visit_id: UUID,
+        action: str,
+        queue_date: date,
+        context: Dict[str, Any],
+    ) -> str:
+        """
+        Queue an agent notification; returns the initial sync status.
+        """
+        job = AgentSyncJob(visit_id, action, queue_date, context)
+        self._set_status(job, "pending")
+        self._visit_pending[visit_id] = self._visit_pending.get(visit_id, 0) + 1
+
+        if self._jobs is None:
+            # Not started (scripts, tests): deliver on the current loop
+            asyncio.ensure_future(self._run(job))
+        else:
+            self._jobs.put_nowait(job)
+
+        return "pending"
+
+    def status(self, visit_id: UUID) -> Optional[AgentSyncStatus]:
+        return self._statuses.get(visit_id)
+
+    # -------------------------------------------------
+    # Workers
+    # -------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._jobs.get()
+            try:
+                await self._run(job)
+            finally:
+                self._jobs.task_done()
+
+    async def _run(self, job: AgentSyncJob) -> None:
+        # Locks are acquired in dequeue order, so one visit's jobs apply in order
+        lock = self._visit_locks.setdefault(job.visit_id, asyncio.Lock())
+        try:
+            async with lock:
+                await self._deliver_with_retry(job)
+        finally:
+            remaining = self._visit_pending[job.visit_id] - 1
+            if remaining:
+                self._visit_pending[job.visit_id] = remaining
+            else:
+                del self._visit_pending[job.visit_id]
+                self._visit_locks.pop(job.visit_id, None)
+
+    async def _deliver_with_retry(self, job: AgentSyncJob) -> None:
+        while True:
+            job.attempts += 1
+            self._set_status(job, "running")
+            try:
+                await self._deliver(job)
+            except (InvalidStepTransition, ValueError) as e:
+                # The agent rejected the transition; retrying will not help
+                self._set_status(job, "failed", str(e))
+                print(
+                    "[AgentDispatcher] Rejected | "
+                    f"visit_id={job.visit_id} action={job.action} error={e}"
+                )
+                return
+            except Exception as e:
+                if job.attempts >= MAX_ATTEMPTS:
+                    self._set_status(job, "failed", str(e))
+                    print(
+                        "[AgentDispatcher] Giving up | "
+                        f"visit_id={job.visit_id} action={job.action} "
+                        f"attempts={job.attempts} error={e}"
+                    )
+                    return
+
+                delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+                self._set_status(job, "retrying", str(e))
+                print(
+                    "[AgentDispatcher] Retrying | "
+                    f"visit_id={job.visit_id} action={job.action} "
+                    f"attempt={job.attempts} delay={delay}s error={e}"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self._set_status(job, "done")
+            return
+
+    async def _deliver(self, job: AgentSyncJob) -> None:
+        async with AsyncSessionLocal() as db:
+            session = None
+            if job.action != "call_next":
+                session = await AgentSessionService.get_latest_by_visit(
+                    db, job.visit_id, agent_name=DOCTOR_ASSISTANCE_AGENT
+                )
+
+            if session:
+                session_id, state_data = session
+                state = DoctorAssistanceState(**state_data)
+            else:
+                session_id = None
+                state = DoctorAssistanceState(**job.context)
+
+            agent = DoctorAssistanceAgent(state, db=db)
+
+            if session_id is None and job.action != "call_next":
+                # The call_next handoff never landed: receive the visit first
+                await agent.handle({})
+
+            if job.action == "call_next":
+                await agent.handle({})
+            elif job.action == "start_consultation":
+                await agent.handle(
+                    {
+                        "action": "start_consultation",
+                        "queue_date": job.queue_date.isoformat(),
+                        "skip_queue_call": True,  # Already applied by QueueService
+                    }
+                )
+            elif job.action == "end_consultation":
+                await agent.handle(
+                    {
+                        "action": "end_consultation",
+                        "skip_queue_call": True,  # Prevent recursion into QueueService
+                    }
+                )
+            else:
+                raise ValueError(f"Unknown agent action: {job.action}")
+
+            if session_id:
+                await AgentSessionService.update(
+                    db, session_id, agent.state.model_dump()
+                )
+            else:
+                await AgentSessionService.create(
+                    db,
+                    agent_name=agent.state.agent_name,
+                    state=agent.state.model_dump(),
+                )
+
+    def _set_status(self, job: AgentSyncJob, status: str, error: str | None = None) -> None:
+        self._statuses[job.visit_id] = AgentSyncStatus(
+            visit_id=job.visit_id,
+            action=job.action,
+            status=status,
+            attempts=job.attempts,
+            error=error,
+            updated_at=datetime.utcnow(),
+        )
+        self._statuses.move_to_end(job.visit_id)
+
+        while len(self._statuses) > STATUS_HISTORY:
+            self._statuses.popitem(last=False)
+
+
+agent_dispatcher = AgentDispatcher()
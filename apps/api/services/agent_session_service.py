@@ -1,5 +1,5 @@
 import uuid
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime
 from uuid import UUID as PythonUUID
 
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy import Table, Column, Text, DateTime
+from sqlalchemy import Table, Column, Text, DateTime, Index
 
 from db.session import engine
 from db.base import Base
@@ -39,11 +39,33 @@ agent_sessions = Table(
     Column("session_id", UUID(as_uuid=True), primary_key=True),
     Column("agent_name", Text, nullable=False),
     Column("state", JSONB, nullable=False),
+    # Lifted out of state on every write so lookups don't scan JSONB
+    Column("visit_id", UUID(as_uuid=True)),
+    Column("hospital_id", UUID(as_uuid=True)),
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
     Column("updated_at", DateTime(timezone=True), onupdate=func.now()),
+    Index("ix_agent_sessions_visit_created", "visit_id", "created_at"),
+    Index("ix_agent_sessions_hospital_agent", "hospital_id", "agent_name"),
 )
 
 
+def _indexed_columns(state: dict) -> dict:
+    """
+    Pull the indexed lookup columns out of an agent state dict. The state
+    is free-form, so a value that is not a UUID is left out.
+    """
+    columns = {}
+    for column in ("visit_id", "hospital_id"):
+        value = state.get(column)
+        if value is None:
+            continue
+        try:
+            columns[column] = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+        except ValueError:
+            continue
+    return columns
+
+
 # -------------------------------------------------
 # Service
 # -------------------------------------------------
@@ -62,6 +84,7 @@ class AgentSessionService:
             session_id=session_id,
             agent_name=agent_name,
             state=_serialize_state(state),
+            **_indexed_columns(state),
         )
         await db.execute(stmt)
         await db.commit()
@@ -80,6 +103,28 @@ class AgentSessionService:
         row = result.first()
         return row[0] if row else None
 
+    @staticmethod
+    async def get_latest_by_visit(
+        db: AsyncSession,
+        visit_id: uuid.UUID,
+        agent_name: Optional[str] = None,
+    ) -> Optional[Tuple[uuid.UUID, dict]]:
+        """
+        Most recent session for a visit as (session_id, state), optionally
+        restricted to one agent.
+        """
+        stmt = select(agent_sessions.c.session_id, agent_sessions.c.state).where(
+            agent_sessions.c.visit_id == visit_id
+        )
+        if agent_name:
+            stmt = stmt.where(agent_sessions.c.agent_name == agent_name)
+
+        result = await db.execute(
+            stmt.order_by(agent_sessions.c.created_at.desc()).limit(1)
+        )
+        row = result.first()
+        return (row[0], row[1]) if row else None
+
     @staticmethod
     async def update(
         db: AsyncSession,
@@ -92,6 +137,7 @@ class AgentSessionService:
             .values(
                 state=_serialize_state(state),
                 updated_at=func.now(),
+                **_indexed_columns(state),
             )
         )
         await db.execute(stmt)
@@ -0,0 +1,120 @@
+"""
+Per-department doctor load, for suggesting doctors at registration.
+
+For each department the available doctors are ranked by the live state of
+their queue for the day: accepting patients first, then predicted wait
+(wait_time_estimator over the patients not yet seen), then queue length.
+The ranking is cached per department and reused while the hospital's
+queue-board version is unchanged. Every queue mutation bumps that version,
+on this worker and (through the queue_changes listener) on the others.
+"""
+from datetime import date
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.doctor import Doctor
+from models.doctor_queue import DoctorQueue
+from schemas.hospital import DoctorLoad
+from services.hospital_queue_board import hospital_queue_board
+from services.wait_time_estimator import wait_time_estimator
+
+
+class DepartmentLoadIndex:
+
+    def __init__(self):
+        # (hospital_id, department_id) -> (queue_date, board version, ranking)
+        self._rankings: Dict[Tuple[UUID, UUID], Tuple[date, int, List[DoctorLoad]]] = {}
+
+    async def ranked(
+        self,
+        db: AsyncSession,
+        hospital_id: UUID,
+        department_id: UUID,
+        queue_date: date,
+    ) -> List[DoctorLoad]:
+        """
+        Available doctors of the department, least loaded first.
+        """
+        key = (hospital_id, department_id)
+        version = hospital_queue_board.version(hospital_id)
+
+        cached = self._rankings.get(key)
+        if cached is not None and cached[:2] == (queue_date, version):
+            return cached[2]
+
+        ranking = await self._load(db, hospital_id, department_id, queue_date)
+        self._rankings[key] = (queue_date, version, ranking)
+        return ranking
+
+    async def _load(self, db, hospital_id, department_id, queue_date) -> List[DoctorLoad]:
+        result = await db.execute(
+            select(
+                Doctor.id,
+                Doctor.name,
+                Doctor.specialization,
+                Doctor.avg_consult_time_minutes,
+                DoctorQueue.queue_open,
+                DoctorQueue.max_queue_size,
+                DoctorQueue.avg_consult_time_minutes.label("queue_consult_minutes"),
+                DoctorQueue.waiting_count,
+                DoctorQueue.present_count,
+                DoctorQueue.called_count,
+                DoctorQueue.in_consultation_count,
+            )
+            .outerjoin(
+                DoctorQueue,
+                and_(
+                    DoctorQueue.doctor_id == Doctor.id,
+                    DoctorQueue.queue_date == queue_date,
+                ),
+            )
+            .where(
+                Doctor.hospital_id == hospital_id,
+                Doctor.department_id == department_id,
+                Doctor.is_available.is_(True),
+            )
+        )
+
+        loads = []
+        for row in result.all():
+            # No queue yet: nobody registered with this doctor today
+            queue_length = (
+                (row.waiting_count or 0)
+                + (row.present_count or 0)
+                + (row.called_count or 0)
+                + (row.in_consultation_count or 0)
+            )
+            consult = row.queue_consult_minutes or row.avg_consult_time_minutes or 10
+            # Same admission rule as QueueService.intake
+            admitted = queue_length - (row.called_count or 0)
+            accepting = row.queue_open is not False and (
+                row.max_queue_size is None or admitted < row.max_queue_size
+            )
+            loads.append(
+                DoctorLoad(
+                    doctor_id=row.id,
+                    doctor_name=row.name,
+                    specialization=row.specialization,
+                    queue_length=queue_length,
+                    estimated_wait_minutes=wait_time_estimator.estimate(
+                        row.id, queue_length, consult
+                    )[0],
+                    accepting=accepting,
+                )
+            )
+
+        loads.sort(
+            key=lambda d: (
+                not d.accepting,
+                d.estimated_wait_minutes,
+                d.queue_length,
+                d.doctor_name,
+            )
+        )
+        return loads
+
+
+department_load_index = DepartmentLoadIndex()
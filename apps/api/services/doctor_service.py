@@ -1,9 +1,10 @@
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 
 from models.doctor import Doctor
 from models.department import Department
+from models.doctor_schedule import DoctorSchedule
 
 from typing import Optional
 
@@ -37,3 +38,65 @@ class DoctorService:
         stmt = select(Doctor).where(Doctor.id == doctor_id)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_schedule(
+        db: AsyncSession,
+        doctor_id,
+    ) -> List[DoctorSchedule]:
+        stmt = (
+            select(DoctorSchedule)
+            .where(DoctorSchedule.doctor_id == doctor_id)
+            .order_by(DoctorSchedule.weekday)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def replace_schedule(
+        db: AsyncSession,
+        doctor_id,
+        days: List[dict],
+    ) -> List[DoctorSchedule]:
+        """
+        Replace the doctor's weekly schedule and re-derive capacity on
+        queues already pre-created but not yet started. Each refreshed
+        queue is versioned and propagated like any other queue mutation.
+        """
+        weekdays = [day["weekday"] for day in days]
+        if len(set(weekdays)) != len(weekdays):
+            raise ValueError("Each weekday may appear only once")
+
+        for day in days:
+            if day["shift_end_time"] <= day["shift_start_time"]:
+                raise ValueError(f"Shift must end after it starts (weekday {day['weekday']})")
+            if (day.get("break_start_time") is None) != (day.get("break_end_time") is None):
+                raise ValueError(f"Break needs both start and end (weekday {day['weekday']})")
+            if day.get("break_start_time") is not None and not (
+                day["shift_start_time"]
+                <= day["break_start_time"]
+                < day["break_end_time"]
+                <= day["shift_end_time"]
+            ):
+                raise ValueError(f"Break must lie within the shift (weekday {day['weekday']})")
+
+        # queue_service imports the agents, which import this module
+        from services.queue_service import QueueService
+
+        async with db.begin():
+            doctor = await db.get(Doctor, doctor_id)
+            if not doctor:
+                raise ValueError("Doctor not found")
+
+            await db.execute(
+                delete(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor_id)
+            )
+            schedule = [DoctorSchedule(doctor_id=doctor_id, **day) for day in days]
+            db.add_all(schedule)
+            await db.flush()
+
+            refreshed = await QueueService.refresh_schedule(db, doctor_id)
+
+        QueueService.publish_refreshed(refreshed)
+
+        return sorted(schedule, key=lambda day: day.weekday)
@@ -0,0 +1,259 @@
+"""
+In-memory load summary of today's doctor queues, per hospital and department.
+
+Lets the chatbot rank hospitals by how soon a new patient would be seen
+without querying on each request. A background task rebuilds the summary
+from Postgres at startup, every REBUILD_SECONDS (new doctors, schedule
+changes, a new day) and after the queue listener reconnects. Between
+rebuilds each committed queue mutation updates its doctor's figures:
+QueueService does this on the worker that made the change, and the
+queue_changes NOTIFY carries the queue's load to the other workers.
+"""
+import asyncio
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, select
+
+from db.session import AsyncSessionLocal
+from models.department import Department
+from models.doctor import Doctor
+from models.doctor_queue import DoctorQueue
+from services.wait_time_estimator import wait_time_estimator
+
+
+REBUILD_SECONDS = 300
+
+
+def queue_load(queue) -> Tuple[int, bool]:
+    """
+    (patients not yet seen, whether intake still admits) for a queue row.
+    """
+    length = (
+        queue.waiting_count
+        + queue.present_count
+        + queue.called_count
+        + queue.in_consultation_count
+    )
+    # Same admission rule as QueueService.intake
+    admitted = length - queue.called_count
+    accepting = bool(queue.queue_open) and (
+        queue.max_queue_size is None or admitted < queue.max_queue_size
+    )
+    return length, accepting
+
+
+class HospitalLoadSummary:
+
+    def __init__(self):
+        # doctor_id -> (hospital_id, department name, default consult minutes)
+        self._doctors: Dict[UUID, Tuple[UUID, str, float]] = {}
+        # doctor_id -> (queue_date, queue length, accepting, consult minutes)
+        self._queues: Dict[UUID, Tuple[date, int, bool, float]] = {}
+        # Updates made while a rebuild loads, replayed on top of it
+        self._replay: List[tuple] | None = None
+        self._task: asyncio.Task | None = None
+        self._rebuild: asyncio.Event | None = None
+
+    # -------------------------------------------------
+    # Incremental updates
+    # -------------------------------------------------
+
+    def apply(self, queue) -> None:
+        """
+        Write-through hook, called by QueueService after a commit.
+        """
+        length, accepting = queue_load(queue)
+        self.update(
+            queue.doctor_id,
+            queue.queue_date,
+            length,
+            accepting,
+            queue.avg_consult_time_minutes,
+        )
+
+    def update(
+        self,
+        doctor_id: UUID,
+        queue_date: date,
+        length: int,
+        accepting: bool,
+        consult_minutes: Optional[float] = None,
+    ) -> None:
+        if queue_date != datetime.utcnow().date():
+            return
+        if self._replay is not None:
+            self._replay.append((doctor_id, queue_date, length, accepting, consult_minutes))
+
+        if consult_minutes is None:
+            # Not in the notification: keep the known figure
+            previous = self._queues.get(doctor_id)
+            doctor = self._doctors.get(doctor_id)
+            if previous is not None:
+                consult_minutes = previous[3]
+            elif doctor is not None:
+                consult_minutes = doctor[2]
+        self._queues[doctor_id] = (queue_date, length, accepting, consult_minutes or 10)
+
+    def request_rebuild(self) -> None:
+        """
+        Rebuild soon, e.g. after queue notifications may have been missed.
+        """
+        if self._rebuild is not None:
+            self._rebuild.set()
+
+    # -------------------------------------------------
+    # Ranking
+    # -------------------------------------------------
+
+    def summarize(
+        self,
+        hospital_id: UUID,
+        department_name: Optional[str] = None,
+    ) -> Optional[dict]:
+        """
+        Load of a hospital's available doctors (of one department, or all):
+        shortest predicted wait among doctors still accepting patients
+        (None if none is), total queue length and accepting doctors.
+        None when the summary knows no such doctors.
+        """
+        today = datetime.utcnow().date()
+        waits = []
+        queued = 0
+        doctors = 0
+
+        for doctor_id, (hospital, department, default_consult) in self._doctors.items():
+            if hospital != hospital_id:
+                continue
+            if department_name is not None and department != department_name:
+                continue
+
+            doctors += 1
+            length, accepting, consult = 0, True, default_consult
+            queue = self._queues.get(doctor_id)
+            if queue is not None and queue[0] == today:
+                _, length, accepting, consult = queue
+
+            queued += length
+            if accepting:
+                waits.append(wait_time_estimator.estimate(doctor_id, length, consult)[0])
+
+        if not doctors:
+            return None
+
+        return {
+            "shortest_wait_minutes": min(waits) if waits else None,
+            "queue_length": queued,
+            "accepting_doctors": len(waits),
+        }
+
+    def rank(
+        self,
+        hospital_ids: List[UUID],
+        department_name: Optional[str] = None,
+    ) -> List[Tuple[UUID, Optional[dict]]]:
+        """
+        hospital_ids ordered by shortest predicted wait; hospitals with no
+        accepting doctor, then unknown ones, go last (otherwise stable).
+        """
+        summaries = [(h, self.summarize(h, department_name)) for h in hospital_ids]
+
+        def key(item):
+            summary = item[1]
+            if summary is None:
+                return (2, 0, 0)
+            if summary["shortest_wait_minutes"] is None:
+                return (1, 0, summary["queue_length"])
+            return (0, summary["shortest_wait_minutes"], summary["queue_length"])
+
+        return sorted(summaries, key=key)
+
+    # -------------------------------------------------
+    # Rebuilds
+    # -------------------------------------------------
+
+    def start(self) -> None:
+        self._rebuild = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._rebuild.clear()
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"[HospitalLoadSummary] Rebuild failed | error={e}")
+
+            try:
+                await asyncio.wait_for(self._rebuild.wait(), REBUILD_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def rebuild(self) -> int:
+        """
+        Reload available doctors and today's queue counters in one query.
+        Returns the number of doctors.
+        """
+        today = datetime.utcnow().date()
+        self._replay = []
+
+        try:
+            rows = await self._load(today)
+        except Exception:
+            self._replay = None
+            raise
+
+        doctors = {}
+        queues = {}
+        for doctor_id, hospital_id, department, consult, queue in rows:
+            doctors[doctor_id] = (hospital_id, department, consult or 10)
+            if queue is not None:
+                length, accepting = queue_load(queue)
+                queues[doctor_id] = (
+                    today,
+                    length,
+                    accepting,
+                    queue.avg_consult_time_minutes or consult or 10,
+                )
+
+        replay, self._replay = self._replay, None
+        self._doctors = doctors
+        self._queues = queues
+        for update in replay:
+            self.update(*update)
+        return len(doctors)
+
+    async def _load(self, today: date):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    Doctor.id,
+                    Doctor.hospital_id,
+                    Department.name,
+                    Doctor.avg_consult_time_minutes,
+                    DoctorQueue,
+                )
+                .join(Department, Department.id == Doctor.department_id)
+                .outerjoin(
+                    DoctorQueue,
+                    and_(
+                        DoctorQueue.doctor_id == Doctor.id,
+                        DoctorQueue.queue_date == today,
+                    ),
+                )
+                .where(Doctor.is_available.is_(True))
+            )
+            return result.all()
+
+
+hospital_load_summary = HospitalLoadSummary()
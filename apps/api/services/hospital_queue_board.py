@@ -0,0 +1,63 @@
+"""
+Per-hospital cache for the reception dashboard.
+
+Every committed queue mutation bumps its hospital's version, both here
+(via QueueService) and on other workers (via the queue_changes listener).
+A cached board is served only while its hospital's version is unchanged,
+so dashboard refreshes between mutations never reach Postgres.
+"""
+from datetime import date
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from schemas.hospital import HospitalQueuesToday
+
+
+class HospitalQueueBoard:
+
+    def __init__(self):
+        self._versions: Dict[UUID, int] = {}
+        # hospital_id -> (queue_date, version, board)
+        self._boards: Dict[UUID, Tuple[date, int, HospitalQueuesToday]] = {}
+
+    def version(self, hospital_id: UUID) -> int:
+        return self._versions.get(hospital_id, 0)
+
+    def touch(self, hospital_id: UUID) -> None:
+        self._versions[hospital_id] = self.version(hospital_id) + 1
+
+    def get(self, hospital_id: UUID, queue_date: date) -> Optional[HospitalQueuesToday]:
+        cached = self._boards.get(hospital_id)
+
+        if cached is None:
+            return None
+
+        cached_date, version, board = cached
+        if cached_date != queue_date or version != self.version(hospital_id):
+            return None
+
+        return board
+
+    def put(
+        self,
+        hospital_id: UUID,
+        queue_date: date,
+        version: int,
+        board: HospitalQueuesToday,
+    ) -> None:
+        """
+        Cache a board built at `version`. If a mutation landed while it was
+        being built, the version check in get() keeps it from being served.
+        """
+        self._boards[hospital_id] = (queue_date, version, board)
+
+    def clear(self) -> None:
+        """
+        Invalidate every board, e.g. after missing cross-worker notifications.
+        """
+        for hospital_id in self._boards:
+            self.touch(hospital_id)
+        self._boards.clear()
+
+
+hospital_queue_board = HospitalQueueBoard()
@@ -1,6 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from models.hospital import Hospital
+from models.doctor import Doctor
+from models.department import Department
+from models.doctor_queue import DoctorQueue
+from schemas.hospital import DoctorQueueSummary, HospitalQueuesToday, QueuePriorityPolicy
+from services.hospital_queue_board import hospital_queue_board
+from services.queue_priority import queue_priority_policies
+from datetime import date
 from typing import List, Optional
 import uuid
 
@@ -59,3 +66,104 @@ class HospitalService:
             select(Hospital).where(Hospital.code == code)
         )
         return result.scalar_one_or_none()
+
+    async def get_queue_priority_policy(
+        self, hospital_id: uuid.UUID
+    ) -> QueuePriorityPolicy:
+        return await queue_priority_policies.get(self.db, hospital_id)
+
+    async def set_queue_priority_policy(
+        self, hospital_id: uuid.UUID, policy: QueuePriorityPolicy
+    ) -> Optional[QueuePriorityPolicy]:
+        """
+        Store a hospital's priority policy; applies to entries registered
+        from now on (other workers pick it up within the policy cache TTL).
+        """
+        hospital = await self.db.get(Hospital, hospital_id)
+        if not hospital:
+            return None
+
+        hospital.queue_priority_policy = policy.model_dump()
+        await self.db.commit()
+        queue_priority_policies.invalidate(hospital_id)
+        return policy
+
+    async def queues_for_day(
+        self, hospital_id: uuid.UUID, queue_date: date
+    ) -> HospitalQueuesToday:
+        """
+        Every doctor's queue summary for one day, for the reception dashboard.
+
+        One statement: doctors of the hospital joined with their department
+        and (outer) with the day's queue row, whose live counters carry the
+        per-status totals. Cached until a queue in this hospital changes.
+        """
+        board = hospital_queue_board.get(hospital_id, queue_date)
+        if board is not None:
+            return board
+
+        version = hospital_queue_board.version(hospital_id)
+
+        result = await self.db.execute(
+            select(
+                Doctor.id,
+                Doctor.name,
+                Doctor.specialization,
+                Doctor.is_available,
+                Department.id.label("department_id"),
+                Department.name.label("department_name"),
+                DoctorQueue.queue_open,
+                DoctorQueue.current_token,
+                DoctorQueue.last_token_number,
+                DoctorQueue.avg_consult_time_minutes,
+                DoctorQueue.waiting_count,
+                DoctorQueue.present_count,
+                DoctorQueue.called_count,
+                DoctorQueue.in_consultation_count,
+                DoctorQueue.completed_count,
+                DoctorQueue.skipped_count,
+            )
+            .join(Department, Department.id == Doctor.department_id)
+            .outerjoin(
+                DoctorQueue,
+                and_(
+                    DoctorQueue.doctor_id == Doctor.id,
+                    DoctorQueue.queue_date == queue_date,
+                ),
+            )
+            .where(Doctor.hospital_id == hospital_id)
+            .order_by(Department.name, Doctor.name)
+        )
+
+        doctors = []
+        for row in result.all():
+            counts = {
+                "waiting": row.waiting_count or 0,
+                "present": row.present_count or 0,
+                "called": row.called_count or 0,
+                "in_consultation": row.in_consultation_count or 0,
+                "completed": row.completed_count or 0,
+                "skipped": row.skipped_count or 0,
+            }
+            doctors.append(
+                DoctorQueueSummary(
+                    doctor_id=row.id,
+                    doctor_name=row.name,
+                    specialization=row.specialization,
+                    is_available=bool(row.is_available),
+                    department_id=row.department_id,
+                    department_name=row.department_name,
+                    queue_open=row.queue_open,
+                    current_token=row.current_token,
+                    last_token_number=row.last_token_number or 0,
+                    avg_consult_time_minutes=row.avg_consult_time_minutes,
+                    total_visits=sum(counts.values()),
+                    **counts,
+                )
+            )
+
+        board = HospitalQueuesToday(
+            hospital_id=hospital_id, queue_date=queue_date, doctors=doctors
+        )
+        hospital_queue_board.put(hospital_id, queue_date, version, board)
+        return board
@@ -0,0 +1,107 @@
+"""
+Fan-out of queue status snapshots to streaming subscribers.
+
+QueueService publishes after every committed mutation, and the
+cross-worker listener publishes for mutations made elsewhere. Each queue key
+carries a version number; subscribers sleep until the version moves and
+then share one serialized snapshot per view and version, however many
+browser tabs are watching the same queue.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from services.queue_state import QueueKey
+
+
+class QueueBroadcaster:
+
+    def __init__(self):
+        self._versions: Dict[QueueKey, int] = {}
+        # Highest DoctorQueue.version published per key (see queue_notifications)
+        self._queue_versions: Dict[QueueKey, int] = {}
+        self._events: Dict[QueueKey, asyncio.Event] = {}
+        self._subscribers: Dict[QueueKey, int] = {}
+        # key -> view -> (version, shared serialization task)
+        self._snapshots: Dict[QueueKey, Dict[Hashable, Tuple[int, asyncio.Future]]] = {}
+
+    def version(self, key: QueueKey) -> int:
+        return self._versions.get(key, 0)
+
+    def queue_version(self, key: QueueKey) -> int:
+        return self._queue_versions.get(key, 0)
+
+    def publish(self, key: QueueKey, queue_version: int | None = None) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+        if queue_version is not None:
+            self._queue_versions[key] = max(queue_version, self.queue_version(key))
+
+        event = self._events.pop(key, None)
+        if event:
+            event.set()
+
+    def publish_all(self) -> None:
+        for key in list(self._subscribers):
+            self.publish(key)
+
+    async def wait(self, key: QueueKey, seen_version: int, timeout: float) -> None:
+        """
+        Return once the key moves past seen_version, or after timeout.
+        """
+        if self.version(key) != seen_version:
+            return
+
+        event = self._events.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def snapshot(
+        self,
+        key: QueueKey,
+        view: Hashable,
+        version: int,
+        build: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        Serialized snapshot of one view at one version, built at most once.
+        """
+        views = self._snapshots.setdefault(key, {})
+        cached = views.get(view)
+
+        if cached is None or cached[0] != version:
+            future = asyncio.ensure_future(build())
+            future.add_done_callback(lambda f: self._drop_failed(key, view, f))
+            cached = (version, future)
+            views[view] = cached
+
+        # Shielded so one subscriber disconnecting does not cancel the shared build
+        return await asyncio.shield(cached[1])
+
+    def _drop_failed(self, key: QueueKey, view: Hashable, future: asyncio.Future) -> None:
+        """
+        Forget a build that failed, so the next subscriber retries it.
+        """
+        if not future.cancelled() and future.exception() is None:
+            return
+
+        views = self._snapshots.get(key)
+        if views is not None and views.get(view, (None, None))[1] is future:
+            del views[view]
+
+    def subscribe(self, key: QueueKey) -> None:
+        self._subscribers[key] = self._subscribers.get(key, 0) + 1
+
+    def unsubscribe(self, key: QueueKey) -> None:
+        remaining = self._subscribers.get(key, 0) - 1
+
+        if remaining > 0:
+            self._subscribers[key] = remaining
+            return
+
+        self._subscribers.pop(key, None)
+        self._snapshots.pop(key, None)
+
+
+queue_broadcaster = QueueBroadcaster()
@@ -0,0 +1,124 @@
+"""
+Buffered, batched writer for the append-only queue_events table.
+
+QueueService hands each committed mutation to the log instead of
+overwriting audit columns on the hot doctor_queues row. Events are held
+in memory and inserted in one multi-row statement every EVENT_FLUSH_SIZE
+events or EVENT_FLUSH_INTERVAL_MS, whichever comes first. A failed flush
+keeps its events for the next attempt; (queue_id, version) makes replays
+harmless.
+"""
+import asyncio
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db.session import AsyncSessionLocal
+from models.queue_event import QueueEvent
+
+
+EVENT_FLUSH_SIZE = 200
+EVENT_FLUSH_INTERVAL_MS = 250
+# Beyond this many unflushed events (database unreachable) the oldest are dropped
+EVENT_BUFFER_LIMIT = 50_000
+
+
+class QueueEventLog:
+
+    def __init__(
+        self,
+        flush_size: int = EVENT_FLUSH_SIZE,
+        flush_interval_ms: int = EVENT_FLUSH_INTERVAL_MS,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            print(
+                "[QueueEventLog] Final flush failed | "
+                f"dropped={len(self._buffer)} error={e}"
+            )
+
+    def append(self, event: Dict[str, Any]) -> None:
+        self._buffer.append(event)
+
+        overflow = len(self._buffer) - EVENT_BUFFER_LIMIT
+        if overflow > 0:
+            del self._buffer[:overflow]
+            print(f"[QueueEventLog] Buffer full, dropped {overflow} oldest event(s)")
+
+        if self._wakeup is not None and len(self._buffer) >= self.flush_size:
+            self._wakeup.set()
+
+    def pending(self, queue_id: UUID, after_version: int) -> List[Dict[str, Any]]:
+        """
+        Events for one queue still waiting in this worker's buffer.
+        """
+        return [
+            event
+            for event in self._buffer
+            if event["queue_id"] == queue_id and event["version"] > after_version
+        ]
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+
+            batch, self._buffer = self._buffer, []
+            try:
+                async with AsyncSessionLocal() as db:
+                    async with db.begin():
+                        await db.execute(
+                            pg_insert(QueueEvent)
+                            .values(batch)
+                            .on_conflict_do_nothing(
+                                constraint="uq_queue_event_version"
+                            )
+                        )
+            except Exception:
+                # Put the batch back in front of anything appended meanwhile
+                self._buffer[:0] = batch
+                raise
+
+            return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print(
+                    "[QueueEventLog] Flush failed, will retry | "
+                    f"buffered={len(self._buffer)} error={e}"
+                )
+
+
+queue_event_log = QueueEventLog()
@@ -0,0 +1,230 @@
+"""
+Cross-worker queue change notifications over Postgres LISTEN/NOTIFY.
+
+QueueService emits a compact NOTIFY inside each mutating transaction, so
+it is delivered only on commit. Every worker runs a QueueChangeListener
+that drops its in-memory copy of a queue changed elsewhere, wakes the
+streaming subscribers of that queue, invalidates the hospital's
+reception dashboard and updates its load summary. A worker's own
+notifications are skipped: QueueService writes those changes through.
+"""
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Set, Tuple
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db.session import DATABASE_URL
+from services.hospital_load_summary import hospital_load_summary, queue_load
+from services.hospital_queue_board import hospital_queue_board
+from services.queue_broadcaster import queue_broadcaster
+from services.queue_state import queue_state
+from services.wait_time_estimator import wait_time_estimator
+
+
+QUEUE_CHANNEL = "queue_changes"
+RECONNECT_DELAY_SECONDS = 2
+# Session.info key: (transaction, change) for changes notified in it
+PENDING_CHANGES = "queue_changes"
+
+# (queue id, version) notified by this worker and not yet written through.
+# The NOTIFY can reach our own listener before QueueService's
+# _after_commit runs, which would otherwise evict the queue state and
+# feed the wait-time estimator the same consultation twice.
+_local_changes: Set[Tuple[str, int]] = set()
+
+
+async def notify_queue_change(
+    db: AsyncSession,
+    queue,
+    event_type: str,
+    consultation=None,
+) -> None:
+    """
+    Queue a NOTIFY for this mutation; Postgres delivers it at commit.
+    consultation is the (start, end) of a consultation that just ended, so
+    other workers' wait-time estimators learn from it too. The queue's
+    load keeps their hospital load summaries current.
+    """
+    length, accepting = queue_load(queue)
+    change = {
+        "q": str(queue.id),
+        "d": str(queue.doctor_id),
+        "h": str(queue.hospital_id),
+        "day": queue.queue_date.isoformat(),
+        "e": event_type,
+        "v": queue.version,
+        "n": length,
+        "o": int(accepting),
+    }
+    if consultation is not None:
+        change["cs"], change["ce"] = (t.isoformat() for t in consultation)
+
+    payload = json.dumps(change, separators=(",", ":"))
+    await db.execute(select(func.pg_notify(QUEUE_CHANNEL, payload)))
+
+    local = (change["q"], change["v"])
+    _local_changes.add(local)
+    session = db.sync_session
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    db.info.setdefault(PENDING_CHANGES, []).append((transaction, local))
+
+
+def written_through(queue) -> None:
+    """
+    Called by QueueService once a committed change is applied locally.
+    """
+    _local_changes.discard((str(queue.id), queue.version))
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _reset_pending(session, transaction) -> None:
+    # A new outer transaction: the previous one committed or was handled below
+    if transaction.parent is None:
+        session.info.pop(PENDING_CHANGES, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session, previous_transaction) -> None:
+    """
+    Postgres drops the NOTIFYs of a rolled-back transaction or savepoint;
+    forget their changes so the same version committed by another worker
+    is not mistaken for ours.
+    """
+    pending = session.info.get(PENDING_CHANGES)
+    if not pending:
+        return
+
+    kept = []
+    for transaction, local in pending:
+        ancestor = transaction
+        while ancestor is not None and ancestor is not previous_transaction:
+            ancestor = ancestor.parent
+        if ancestor is None:
+            kept.append((transaction, local))
+        else:
+            _local_changes.discard(local)
+    session.info[PENDING_CHANGES] = kept
+
+
+def handle_queue_change(payload: str) -> None:
+    """
+    Apply one notification to this worker's local queue state.
+    """
+    change = json.loads(payload)
+    key = (UUID(change["d"]), date.fromisoformat(change["day"]))
+    version = change["v"]
+
+    # Mutations made by this worker are (or are about to be) written through
+    local = (change["q"], version)
+    if local in _local_changes:
+        _local_changes.discard(local)
+        return
+    if version <= queue_broadcaster.queue_version(key):
+        return
+
+    # Also bumps the epoch of a queue not held, so a hydration or warm-up
+    # load racing this change is discarded
+    state = queue_state.get(*key)
+    if state is None or state.version < version:
+        queue_state.evict(*key)
+
+    queue_broadcaster.publish(key, version)
+
+    if "h" in change:
+        hospital_queue_board.touch(UUID(change["h"]))
+
+    if "n" in change:
+        hospital_load_summary.update(key[0], key[1], change["n"], bool(change["o"]))
+
+    if "cs" in change:
+        wait_time_estimator.observe(
+            key[0],
+            datetime.fromisoformat(change["cs"]),
+            datetime.fromisoformat(change["ce"]),
+        )
+
+
+class QueueChangeListener:
+    """
+    Holds one dedicated connection LISTENing on the queue channel and
+    reconnects if it drops.
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._task: asyncio.Task | None = None
+        self._listening: asyncio.Event | None = None
+
+    def start(self) -> None:
+        self._listening = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def wait_listening(self, timeout: float) -> bool:
+        """
+        Wait until LISTEN is in place; False if it is not within timeout.
+        """
+        if self._listening is None:
+            return False
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                conn = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as e:
+                print(f"[QueueChangeListener] Connect failed, retrying | error={e}")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+                continue
+
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+
+            try:
+                await conn.add_listener(QUEUE_CHANNEL, self._on_notify)
+                # Notifications may have been missed while disconnected
+                queue_state.clear()
+                hospital_queue_board.clear()
+                hospital_load_summary.request_rebuild()
+                queue_broadcaster.publish_all()
+                print(f"[QueueChangeListener] Listening on '{QUEUE_CHANNEL}'")
+                self._listening.set()
+
+                await lost.wait()
+                print("[QueueChangeListener] Connection lost, reconnecting")
+            finally:
+                self._listening.clear()
+                if not conn.is_closed():
+                    await conn.close()
+
+    @staticmethod
+    def _on_notify(conn, pid, channel, payload) -> None:
+        try:
+            handle_queue_change(payload)
+        except (ValueError, KeyError) as e:
+            print(f"[QueueChangeListener] Ignoring malformed payload | error={e}")
+
+
+queue_change_listener = QueueChangeListener(
+    make_url(DATABASE_URL)
+    .set(drivername="postgresql")
+    .render_as_string(hide_password=False)
+)
@@ -0,0 +1,101 @@
+"""
+Maintenance of the monthly doctor_queues / queue_entries partitions.
+
+The partitions themselves are created and detached by the SQL functions
+from migration 008 (create_queue_partitions / archive_queue_partitions);
+this module decides the window: the current month plus MONTHS_AHEAD are
+kept ready, and months older than RETAIN_MONTHS are moved out of the live
+tables into the queue_archive schema. There is no DEFAULT partition, so
+QueueService checks that a month's partition exists before creating a
+queue in it.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.session import AsyncSessionLocal
+
+
+MONTHS_AHEAD = 3
+RETAIN_MONTHS = 12
+
+
+def _add_months(day: date, months: int) -> date:
+    """First day of the month `months` away from `day`'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(parent: str, day: date) -> str:
+    """Name create_queue_partitions gives the partition of day's month."""
+    return f"{parent}_y{day:%Y}m{day:%m}"
+
+
+async def has_queue_partition(db: AsyncSession, queue_date: date) -> bool:
+    return await db.scalar(
+        text("SELECT to_regclass(:name) IS NOT NULL"),
+        {"name": partition_name("doctor_queues", queue_date)},
+    )
+
+
+async def ensure_queue_partitions(
+    months_ahead: int = MONTHS_AHEAD,
+    from_date: Optional[date] = None,
+) -> int:
+    """
+    Create any missing partitions from from_date's month (default: this
+    month) through months_ahead months later. Returns how many were created.
+    """
+    from_date = from_date or datetime.utcnow().date()
+    to_date = _add_months(from_date, months_ahead)
+
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            created = await db.scalar(
+                text("SELECT create_queue_partitions(:from_date, :to_date)"),
+                {"from_date": from_date, "to_date": to_date},
+            )
+
+    if created:
+        print(
+            f"[QueuePartitions] Created {created} partition(s) "
+            f"for {from_date:%Y-%m} .. {to_date:%Y-%m}"
+        )
+    return created
+
+
+async def archive_queue_partitions(
+    retain_months: int = RETAIN_MONTHS,
+    drop: bool = False,
+) -> int:
+    """
+    Detach partitions for months ending before the retention window and
+    move them to queue_archive (or drop them). Returns how many were detached.
+    """
+    before = _add_months(datetime.utcnow().date(), -retain_months)
+
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            archived = await db.scalar(
+                text("SELECT archive_queue_partitions(:before, :drop)"),
+                {"before": before, "drop": drop},
+            )
+
+    print(
+        f"[QueuePartitions] {'Dropped' if drop else 'Archived'} "
+        f"{archived} partition(s) before {before}"
+    )
+    return archived
+
+
+async def ensure_partitions_at_startup() -> None:
+    """
+    Lifespan hook: make sure today's and the coming months' partitions
+    exist. A failure is logged, not raised; existing partitions keep working.
+    """
+    try:
+        await ensure_queue_partitions()
+    except Exception as e:
+        print(f"[QueuePartitions] Startup check failed | error={e}")
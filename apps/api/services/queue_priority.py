@@ -0,0 +1,116 @@
+"""
+Per-hospital priority lanes for the doctor queues.
+
+Each hospital may store a QueuePriorityPolicy (priority class -> rank,
+plus the age from which patients are classed "elderly"). Intake resolves
+an entry's class once and stores its rank on the entry; call_next and
+the patients-ahead figures then order by (rank, token_number). Policies
+are cached per worker for POLICY_TTL_SECONDS, so a change reaches every
+worker within that time and applies to entries registered afterwards.
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.hospital import Hospital
+from models.patient import Patient
+from schemas.hospital import QueuePriorityPolicy
+
+
+POLICY_TTL_SECONDS = 60
+NORMAL = "normal"
+ELDERLY = "elderly"
+
+
+class QueuePriorityPolicies:
+
+    def __init__(self, ttl_seconds: float = POLICY_TTL_SECONDS):
+        self.ttl = ttl_seconds
+        self._cache: Dict[UUID, Tuple[float, QueuePriorityPolicy]] = {}
+
+    async def get(self, db: AsyncSession, hospital_id: UUID) -> QueuePriorityPolicy:
+        cached = self._cache.get(hospital_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        stored = await db.scalar(
+            select(Hospital.queue_priority_policy).where(Hospital.id == hospital_id)
+        )
+        policy = QueuePriorityPolicy.model_validate(stored or {})
+        self._cache[hospital_id] = (time.monotonic() + self.ttl, policy)
+        return policy
+
+    def invalidate(self, hospital_id: UUID) -> None:
+        self._cache.pop(hospital_id, None)
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        hospital_id: UUID,
+        patient_id: UUID,
+        priority: Optional[str] = None,
+    ) -> Tuple[str, int]:
+        """
+        (class, rank) for a new entry: the requested class, else "elderly"
+        by patient age when the policy sets elderly_min_age, else "normal".
+        """
+        policy = await self.get(db, hospital_id)
+
+        if priority is None:
+            priority = NORMAL
+            if policy.elderly_min_age is not None and ELDERLY in policy.ranks:
+                age = await db.scalar(select(Patient.age).where(Patient.id == patient_id))
+                if age is not None and age >= policy.elderly_min_age:
+                    priority = ELDERLY
+
+        if priority not in policy.ranks:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        return priority, policy.ranks[priority]
+
+    async def resolve_many(
+        self,
+        db: AsyncSession,
+        requests: Sequence[Tuple[UUID, UUID, Optional[str]]],
+    ) -> List[Optional[Tuple[str, int]]]:
+        """
+        resolve() for many (hospital_id, patient_id, priority) at once, with
+        one age lookup for all patients that need it. An unknown class
+        yields None in place of (class, rank).
+        """
+        policies = {
+            hospital_id: await self.get(db, hospital_id)
+            for hospital_id in {r[0] for r in requests}
+        }
+
+        needs_age = {
+            patient_id
+            for hospital_id, patient_id, priority in requests
+            if priority is None
+            and policies[hospital_id].elderly_min_age is not None
+            and ELDERLY in policies[hospital_id].ranks
+        }
+        ages: Dict[UUID, Optional[int]] = {}
+        if needs_age:
+            result = await db.execute(
+                select(Patient.id, Patient.age).where(Patient.id.in_(needs_age))
+            )
+            ages = dict(result.all())
+
+        resolved = []
+        for hospital_id, patient_id, priority in requests:
+            policy = policies[hospital_id]
+            if priority is None:
+                priority = NORMAL
+                age = ages.get(patient_id)
+                if patient_id in needs_age and age is not None and age >= policy.elderly_min_age:
+                    priority = ELDERLY
+            rank = policy.ranks.get(priority)
+            resolved.append(None if rank is None else (priority, rank))
+        return resolved
+
+
+queue_priority_policies = QueuePriorityPolicies()
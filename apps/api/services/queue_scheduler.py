@@ -0,0 +1,244 @@
+"""
+Nightly pre-creation of DoctorQueue rows.
+
+Each evening (PRECREATE_AT_UTC) tomorrow's queue is inserted for every
+available doctor in one INSERT .. SELECT, using that weekday's
+DoctorSchedule (or the defaults on the doctor when it has none). The slot
+capacity of the shift is computed once here and stored as max_queue_size,
+so intake admission is a counter comparison. Intake then finds the day's
+row already in place instead of creating it under the first-patient race
+at opening time. Re-runs and concurrent workers are harmless: existing
+queues are skipped via uq_doctor_queue.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, Integer, and_, cast, exists, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db.session import AsyncSessionLocal
+from models.doctor import Doctor
+from models.doctor_queue import DoctorQueue
+from models.doctor_schedule import DoctorSchedule
+from services.hospital_queue_board import hospital_queue_board
+from services.queue_partitions import ensure_queue_partitions
+
+
+PRECREATE_AT_UTC = time(20, 0)
+RETRY_SECONDS = 300
+
+QUEUE_COLUMNS = [
+    "id",
+    "doctor_id",
+    "hospital_id",
+    "queue_date",
+    "shift_start_time",
+    "shift_end_time",
+    "avg_consult_time_minutes",
+    "max_queue_size",
+]
+
+
+def _minutes(start, end):
+    return func.extract("epoch", end - start) / 60
+
+
+def doctor_day_select(queue_date: date, doctor_id: Optional[UUID] = None):
+    """
+    One row per doctor working on queue_date, in QUEUE_COLUMNS order:
+    shift and consult time from that weekday's schedule (falling back to
+    the doctor's defaults), and max_queue_size as the number of whole
+    consult slots in the shift minus its break, capped by max_patients.
+    With doctor_id, only that doctor (whatever their availability);
+    otherwise every available doctor.
+    """
+    any_schedule = exists().where(
+        DoctorSchedule.__table__.alias("any_day").c.doctor_id == Doctor.id
+    )
+
+    shift_start = func.coalesce(DoctorSchedule.shift_start_time, Doctor.shift_start_time)
+    shift_end = func.coalesce(DoctorSchedule.shift_end_time, Doctor.shift_end_time)
+    consult = func.coalesce(
+        DoctorSchedule.avg_consult_time_minutes, Doctor.avg_consult_time_minutes
+    )
+    break_minutes = func.coalesce(
+        _minutes(DoctorSchedule.break_start_time, DoctorSchedule.break_end_time), 0
+    )
+    slots = cast(
+        func.greatest(
+            func.floor(
+                (_minutes(shift_start, shift_end) - break_minutes)
+                / func.nullif(consult, 0)
+            ),
+            0,
+        ),
+        Integer,
+    )
+
+    rows = (
+        select(
+            func.gen_random_uuid(),
+            Doctor.id,
+            Doctor.hospital_id,
+            literal(queue_date, Date),
+            shift_start,
+            shift_end,
+            consult,
+            # LEAST ignores a null max_patients
+            func.least(slots, DoctorSchedule.max_patients),
+        )
+        .select_from(Doctor)
+        .outerjoin(
+            DoctorSchedule,
+            and_(
+                DoctorSchedule.doctor_id == Doctor.id,
+                DoctorSchedule.weekday == queue_date.weekday(),
+            ),
+        )
+        # Scheduled that weekday, or no weekly schedule at all
+        .where(or_(DoctorSchedule.id.isnot(None), ~any_schedule))
+    )
+    if doctor_id is not None:
+        return rows.where(Doctor.id == doctor_id)
+    return rows.where(Doctor.is_available.is_(True))
+
+
+def insert_queues_from_doctors(queue_date: date, doctor_id: Optional[UUID] = None):
+    """
+    INSERT .. SELECT of doctor_day_select, skipping doctors whose queue
+    for queue_date already exists.
+    """
+    rows = doctor_day_select(queue_date, doctor_id)
+
+    return (
+        pg_insert(DoctorQueue)
+        .from_select(QUEUE_COLUMNS, rows)
+        .on_conflict_do_nothing(constraint="uq_doctor_queue")
+    )
+
+
+async def precreate_queues(queue_date: date) -> int:
+    """
+    Create queue_date's queues for all available doctors. Returns the
+    number of queues created.
+    """
+    # The day's partition (and the rolling window after it) must exist
+    await ensure_queue_partitions(from_date=queue_date)
+
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            result = await db.execute(
+                insert_queues_from_doctors(queue_date).returning(
+                    DoctorQueue.hospital_id
+                )
+            )
+            hospital_ids = result.scalars().all()
+
+    if queue_date == datetime.utcnow().date():
+        # Same-day catch-up: today's reception boards gain these queues
+        for hospital_id in set(hospital_ids):
+            hospital_queue_board.touch(hospital_id)
+
+    print(
+        f"[QueueScheduler] Pre-created {len(hospital_ids)} queue(s) for {queue_date}"
+    )
+    return len(hospital_ids)
+
+
+async def refresh_unstarted_queues(db, doctor_id: UUID) -> List[DoctorQueue]:
+    """
+    Re-derive shift, consult time and capacity for a doctor's pre-created
+    queues that have not issued a token yet (e.g. tomorrow's, after a
+    schedule change). queue_open is left as it is (reception may have
+    closed the queue), except that a day no longer worked is closed. Runs
+    in the caller's transaction and returns the queues, still locked, for
+    the caller to record and propagate.
+    """
+    result = await db.execute(
+        select(DoctorQueue)
+        .where(
+            DoctorQueue.doctor_id == doctor_id,
+            DoctorQueue.queue_date >= datetime.utcnow().date(),
+            DoctorQueue.last_token_number == 0,
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    queues = result.scalars().all()
+
+    for queue in queues:
+        day = (await db.execute(doctor_day_select(queue.queue_date, doctor_id))).one_or_none()
+        if day is None:
+            # No longer a working day: stop intake rather than delete the row
+            values = {"queue_open": False}
+        else:
+            values = dict(zip(QUEUE_COLUMNS[4:], day[4:]))
+
+        for column, value in values.items():
+            setattr(queue, column, value)
+
+    return queues
+
+
+class QueueScheduler:
+    """
+    Background task running precreate_queues for tomorrow once a day. On
+    start it also catches up on today (and tomorrow, if the run time has
+    already passed), so a restart never leaves a day without queues.
+    """
+
+    def __init__(self, run_at: time = PRECREATE_AT_UTC):
+        self.run_at = run_at
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _next_run(self, now: datetime) -> datetime:
+        run = datetime.combine(now.date(), self.run_at)
+        return run if run > now else run + timedelta(days=1)
+
+    async def _run(self) -> None:
+        now = datetime.utcnow()
+        pending = {now.date()}
+        if now.time() >= self.run_at:
+            pending.add(now.date() + timedelta(days=1))
+        next_run = self._next_run(now)
+
+        while True:
+            for queue_date in sorted(pending):
+                try:
+                    await precreate_queues(queue_date)
+                    pending.discard(queue_date)
+                except Exception as e:
+                    print(
+                        "[QueueScheduler] Pre-creation failed, will retry | "
+                        f"queue_date={queue_date} error={e}"
+                    )
+
+            now = datetime.utcnow()
+            # A day that has already passed is not worth retrying
+            pending = {d for d in pending if d >= now.date()}
+            wake = next_run
+            if pending:
+                wake = min(wake, now + timedelta(seconds=RETRY_SECONDS))
+            await asyncio.sleep(max((wake - now).total_seconds(), 0))
+
+            now = datetime.utcnow()
+            if now >= next_run:
+                pending.add(next_run.date() + timedelta(days=1))
+                next_run = self._next_run(now)
+
+
+queue_scheduler = QueueScheduler()
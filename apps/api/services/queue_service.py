@@ -1,18 +1,41 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func,asc, literal_column
-from datetime import datetime, timedelta
-
-from agents.queue.schemas import QueueIntakeRequest, QueueIntakeResponse,CallNextResponse,CallNextRequest,EndConsultationResponse,EndConsultationRequest,CheckInResponse,CheckInRequest,SkipResponse,SkipRequest,StartConsultationRequest,StartConsultationResponse,QueueStatusRequest,DoctorQueueStatus,ReceptionQueueStatus,PatientQueueStatus,TokenInfo
+from sqlalchemy import select, update, insert, func,asc, literal, literal_column, and_, tuple_, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+from typing import List
+
+from agents.queue.schemas import QueueIntakeRequest, QueueIntakeResponse,QueueIntakeBatchRequest,QueueIntakeBatchResult,QueueIntakeBatchResponse,CallNextResponse,CallNextRequest,EndConsultationResponse,EndConsultationRequest,CheckInResponse,CheckInRequest,SkipResponse,SkipRequest,StartConsultationRequest,StartConsultationResponse,AdvanceRequest,AdvanceResponse,QueueStatusRequest,DoctorQueueStatus,ReceptionQueueStatus,PatientQueueStatus,TokenInfo,QueuePositionRequest,QueuePositionResponse,AgentSyncStatus,QueueEventsRequest,QueueEventsPage,QueueEventOut
 from models.doctor_queue import DoctorQueue
 from models.queue_entry import QueueEntry
+from models.queue_event import QueueEvent
 from models.visit import Visit
 from models.patient import Patient
 from models.doctor import Doctor
 from models.department import Department
-from agents.doctor_assistance.agent import DoctorAssistanceAgent
-from agents.doctor_assistance.state import DoctorAssistanceState
-from services.agent_session_service import AgentSessionService, agent_sessions
-import uuid
+from services.agent_dispatcher import agent_dispatcher
+from services.queue_state import queue_state, STATUSES
+from services.queue_broadcaster import queue_broadcaster
+from services.hospital_queue_board import hospital_queue_board
+from services.hospital_load_summary import hospital_load_summary
+from services.queue_notifications import notify_queue_change, written_through
+from services.queue_event_log import queue_event_log
+from services.queue_scheduler import insert_queues_from_doctors, refresh_unstarted_queues
+from services.queue_partitions import MONTHS_AHEAD, has_queue_partition
+from services.wait_time_estimator import wait_time_estimator
+from services.queue_priority import queue_priority_policies
+from db.session import AsyncSessionLocal
+import json
+
+
+STREAM_KEEPALIVE_SECONDS = 15
+MAX_EVENTS_PAGE = 500
+# A skipped patient who checks in again rejoins once this many tokens
+# after their own have been called
+REINSERT_AFTER_TOKENS = 2
+# A missing version older than this is treated as lost, not still buffered
+EVENT_GAP_GRACE_SECONDS = 5
 
 
 class QueueService:
@@ -25,94 +48,320 @@ class QueueService:
 
         async with db.begin():  # 🔒 TRANSACTION START
 
-            # 1️⃣ Get or create doctor queue
-            result = await db.execute(
-                select(DoctorQueue).where(
+            # 0️⃣ Priority lane from the hospital's policy (before any lock)
+            priority, priority_rank = await queue_priority_policies.resolve(
+                db, request.hospital_id, request.patient_id, request.priority
+            )
+
+            # 1️⃣ Lock the doctor queue and allocate the next token in one
+            #    round trip (the UPDATE holds the row lock until commit)
+            allocate_token = (
+                update(DoctorQueue)
+                .where(
                     DoctorQueue.doctor_id == request.doctor_id,
                     DoctorQueue.queue_date == request.queue_date,
+                    DoctorQueue.queue_open.is_(True),
                 )
+                .values(last_token_number=DoctorQueue.last_token_number + 1)
+                .returning(DoctorQueue)
+                .execution_options(populate_existing=True)
             )
+            result = await db.execute(allocate_token)
             queue = result.scalar_one_or_none()
 
             if not queue:
-                # MVP: hardcoded shift (can later move to doctor table)
-                queue = DoctorQueue(
-                    doctor_id=request.doctor_id,
-                    hospital_id=request.hospital_id,
-                    queue_date=request.queue_date,
-                    shift_start_time=datetime.strptime("09:00", "%H:%M").time(),
-                    shift_end_time=datetime.strptime("17:00", "%H:%M").time(),
-                    avg_consult_time_minutes=10,
-                    queue_open=True,
+                # Queues are pre-created nightly (QueueScheduler); this only
+                # covers a doctor added since. Racing intakes settle on
+                # uq_doctor_queue.
+                await QueueService._create_queue(
+                    db, request.queue_date, request.doctor_id
                 )
-                db.add(queue)
-                await db.flush()
+                result = await db.execute(allocate_token)
+                queue = result.scalar_one_or_none()
 
             # 2️⃣ Queue open check
-            if not queue.queue_open:
+            if not queue:
                 return QueueIntakeResponse(
                     accepted=False,
                     reason="Doctor queue is closed for today",
                 )
 
-            # 3️⃣ Active queue size
-            result = await db.execute(
-                select(func.count(QueueEntry.id)).where(
-                    QueueEntry.queue_id == queue.id,
-                    QueueEntry.status.in_(["waiting", "present", "in_consultation"]),
+            # 3️⃣ Admission: live counters against the queue's slot capacity,
+            #    precomputed from the doctor's schedule (row is locked)
+            active_count = (
+                queue.waiting_count
+                + queue.present_count
+                + queue.in_consultation_count
+            )
+            shift_full = (
+                queue.max_queue_size is not None
+                and active_count >= queue.max_queue_size
+            )
+            entry = None
+
+            if shift_full:
+                # Hand the allocated token back; we still hold the row lock
+                queue.queue_open = False
+                queue.last_token_number -= 1
+            else:
+                # 4️⃣ Token allocated above (unique across ALL entries)
+                token_number = queue.last_token_number
+
+                entry = QueueEntry(
+                    queue_id=queue.id,
+                    queue_date=queue.queue_date,
+                    visit_id=request.visit_id,
+                    hospital_id=request.hospital_id,
+                    token_number=token_number,
+                    position=token_number,
+                    priority=priority,
+                    priority_rank=priority_rank,
                 )
+                QueueService._set_status(queue, entry, "waiting")
+                db.add(entry)
+
+            event = await QueueService._record_event(
+                db,
+                queue,
+                "QUEUE_CLOSED" if shift_full else "VISIT_ADDED",
+                entry=entry,
+                reason=(
+                    "Doctor shift will end before consultation"
+                    if shift_full else "Within shift capacity"
+                ),
+                actor="queue_agent",
             )
-            active_count = result.scalar() or 0
 
-            # 4️⃣ Expected finish time
-            expected_finish = (
-                datetime.combine(queue.queue_date, queue.shift_start_time)
-                + timedelta(minutes=(active_count + 1) * queue.avg_consult_time_minutes)
+        # 🔓 TRANSACTION COMMIT
+
+        QueueService._after_commit(queue, entry, event)
+
+        if shift_full:
+            return QueueIntakeResponse(
+                accepted=False,
+                reason="Doctor shift will end before consultation",
             )
 
-            shift_end = datetime.combine(
-                queue.queue_date, queue.shift_end_time
+        return QueueIntakeResponse(
+            accepted=True,
+            token_number=token_number,
+            position=token_number,
+            priority=priority,
+            estimated_wait_minutes=wait_time_estimator.estimate(
+                queue.doctor_id, active_count, queue.avg_consult_time_minutes
+            )[0],
+        )
+
+    @staticmethod
+    async def intake_batch(
+        db: AsyncSession,
+        request: QueueIntakeBatchRequest,
+    ) -> QueueIntakeBatchResponse:
+        """
+        Intake for many visits across doctors in one transaction. Visits are
+        grouped per doctor queue; each queue gets a contiguous token range
+        from one UPDATE, one bulk INSERT of its entries and one event. Each
+        queue runs in its own savepoint, so a failing queue rejects only its
+        own visits. Admission is as in intake: visits beyond the queue's
+        slot capacity are rejected and the queue is closed.
+        """
+        visits = request.visits
+        # One result per request position (a visit may be sent twice)
+        results: List[QueueIntakeBatchResult | None] = [None] * len(visits)
+
+        def reject(position, reason):
+            results[position] = QueueIntakeBatchResult(
+                visit_id=visits[position].visit_id, accepted=False, reason=reason
             )
 
-            if expected_finish > shift_end:
-                queue.queue_open = False
-                return QueueIntakeResponse(
-                    accepted=False,
-                    reason="Doctor shift will end before consultation",
-                )
+        committed = []
+
+        async with db.begin():  # 🔒 TRANSACTION START
 
-            # 5️⃣ Assign token (unique across ALL entries)
+            # 0️⃣ Priority lanes for every visit (one age lookup) and visits
+            #    already queued, before any queue lock
+            lanes = await queue_priority_policies.resolve_many(
+                db, [(v.hospital_id, v.patient_id, v.priority) for v in visits]
+            )
             result = await db.execute(
-                select(func.max(QueueEntry.token_number)).where(
-                    QueueEntry.queue_id == queue.id,
+                select(QueueEntry.visit_id).where(
+                    QueueEntry.visit_id.in_({v.visit_id for v in visits}),
+                    QueueEntry.queue_date.in_({v.queue_date for v in visits}),
                 )
             )
-            max_token = result.scalar() or 0
-            token_number = max_token + 1
+            queued = set(result.scalars().all())
+
+            groups = defaultdict(list)
+            seen = set()
+            for position, (visit, lane) in enumerate(zip(visits, lanes)):
+                if visit.visit_id in seen or visit.visit_id in queued:
+                    reject(position, "Visit already queued")
+                elif lane is None:
+                    reject(position, f"Unknown priority class: {visit.priority}")
+                else:
+                    groups[(visit.doctor_id, visit.queue_date)].append(
+                        (position, visit, lane)
+                    )
+                seen.add(visit.visit_id)
+
+            # 1️⃣ One savepoint per queue, in a fixed order so concurrent
+            #    batches lock queue rows without deadlocking
+            for (doctor_id, queue_date) in sorted(groups):
+                group = groups[(doctor_id, queue_date)]
+                try:
+                    async with db.begin_nested():
+                        outcome = await QueueService._intake_group(
+                            db,
+                            doctor_id,
+                            queue_date,
+                            [(visit, lane) for _, visit, lane in group],
+                        )
+                except ValueError as e:
+                    for position, _, _ in group:
+                        reject(position, str(e))
+                    continue
+                except SQLAlchemyError as e:
+                    print(
+                        f"[QueueService] Batch intake failed for queue | "
+                        f"doctor_id={doctor_id} queue_date={queue_date} error={e}"
+                    )
+                    for position, _, _ in group:
+                        reject(position, "Could not add visit to the doctor queue")
+                    continue
+
+                if outcome is None:
+                    for position, _, _ in group:
+                        reject(position, "Doctor queue is closed for today")
+                    continue
+
+                queue, entries, event, active_count = outcome
+                committed.append((queue, entries, event))
+
+                for i, (position, visit, _) in enumerate(group):
+                    if i >= len(entries):
+                        reject(position, "Doctor shift will end before consultation")
+                        continue
+                    entry = entries[i]
+                    results[position] = QueueIntakeBatchResult(
+                        visit_id=visit.visit_id,
+                        accepted=True,
+                        token_number=entry.token_number,
+                        position=entry.position,
+                        priority=entry.priority,
+                        estimated_wait_minutes=wait_time_estimator.estimate(
+                            queue.doctor_id,
+                            active_count + i,
+                            queue.avg_consult_time_minutes,
+                        )[0],
+                    )
+
+        # 🔓 TRANSACTION COMMIT
+
+        for queue, entries, event in committed:
+            QueueService._after_commit(queue, None, event, entries)
 
-            entry = QueueEntry(
-                queue_id=queue.id,
-                visit_id=request.visit_id,
-                hospital_id=request.hospital_id,
-                token_number=token_number,
-                position=token_number,
-                status="waiting",
+        accepted = sum(1 for r in results if r.accepted)
+        return QueueIntakeBatchResponse(
+            results=results,
+            accepted_count=accepted,
+            rejected_count=len(results) - accepted,
+        )
+
+    @staticmethod
+    async def _intake_group(db: AsyncSession, doctor_id, queue_date, group):
+        """
+        Admit one queue's share of a batch: allocate a token range for the
+        whole group, hand back what exceeds capacity, bulk-insert the rest.
+        Returns (queue, entries, event, active_count before the batch), or
+        None if the queue is closed.
+        """
+        n = len(group)
+        allocate_tokens = (
+            update(DoctorQueue)
+            .where(
+                DoctorQueue.doctor_id == doctor_id,
+                DoctorQueue.queue_date == queue_date,
+                DoctorQueue.queue_open.is_(True),
             )
-            db.add(entry)
+            .values(last_token_number=DoctorQueue.last_token_number + n)
+            .returning(DoctorQueue)
+            .execution_options(populate_existing=True)
+        )
+        queue = (await db.execute(allocate_tokens)).scalar_one_or_none()
 
-            queue.last_event_type = "VISIT_ADDED"
-            queue.last_event_reason = "Within shift capacity"
-            queue.last_updated_by = "queue_agent"
+        if not queue:
+            # As in intake: a doctor added since the nightly pre-creation
+            await QueueService._create_queue(db, queue_date, doctor_id)
+            queue = (await db.execute(allocate_tokens)).scalar_one_or_none()
 
-        # 🔓 TRANSACTION COMMIT
+        if not queue:
+            return None
 
-        return QueueIntakeResponse(
-            accepted=True,
-            token_number=token_number,
-            position=token_number,
-            estimated_wait_minutes=active_count * queue.avg_consult_time_minutes,
+        active_count = (
+            queue.waiting_count
+            + queue.present_count
+            + queue.in_consultation_count
         )
-    
+        admitted = n
+        if queue.max_queue_size is not None:
+            admitted = max(min(n, queue.max_queue_size - active_count), 0)
+
+        if admitted < n:
+            # Hand back the unused tail of the range; we hold the row lock
+            queue.queue_open = False
+            queue.last_token_number -= n - admitted
+
+        first_token = queue.last_token_number - admitted + 1
+        entries = []
+        if admitted:
+            result = await db.execute(
+                insert(QueueEntry).returning(QueueEntry, sort_by_parameter_order=True),
+                [
+                    {
+                        "queue_id": queue.id,
+                        "queue_date": queue.queue_date,
+                        "visit_id": visit.visit_id,
+                        "hospital_id": visit.hospital_id,
+                        "token_number": first_token + i,
+                        "position": first_token + i,
+                        "priority": priority,
+                        "priority_rank": priority_rank,
+                        "status": "waiting",
+                    }
+                    for i, (visit, (priority, priority_rank)) in enumerate(group[:admitted])
+                ],
+            )
+            entries = result.scalars().all()
+            queue.waiting_count += admitted
+
+        reason = f"Batch intake: {admitted} of {n} visit(s)"
+        if admitted:
+            reason += f", tokens {first_token}-{queue.last_token_number}"
+        if admitted < n:
+            reason += "; queue closed at shift capacity"
+        event = await QueueService._record_event(
+            db,
+            queue,
+            "VISITS_ADDED" if admitted else "QUEUE_CLOSED",
+            reason=reason,
+            actor="queue_agent",
+        )
+        return queue, entries, event, active_count
+
+    @staticmethod
+    async def _create_queue(db: AsyncSession, queue_date, doctor_id) -> None:
+        """
+        Create a doctor's queue for queue_date from their schedule. Raises
+        ValueError when queue_date's month has no partition yet (partitions
+        are kept MONTHS_AHEAD months ahead), rather than failing in Postgres.
+        """
+        if not await has_queue_partition(db, queue_date):
+            raise ValueError(
+                f"Queues for {queue_date} cannot be booked yet "
+                f"(up to {MONTHS_AHEAD} months ahead)"
+            )
+        await db.execute(insert_queues_from_doctors(queue_date, doctor_id))
+
     @staticmethod
     async def call_next(
         db: AsyncSession,
@@ -126,12 +375,14 @@ class QueueService:
             if not doctor:
                 raise ValueError("Doctor not found")
 
-            # 1️⃣ Fetch queue
+            # 1️⃣ Fetch and lock the queue: concurrent call_next for the same
+            #    doctor queue up here, so only one can pass the check below
             result = await db.execute(
                 select(DoctorQueue).where(
                     DoctorQueue.doctor_id == request.doctor_id,
                     DoctorQueue.queue_date == request.queue_date,
                 )
+                .with_for_update()
             )
             queue = result.scalar_one_or_none()
 
@@ -141,72 +392,45 @@ class QueueService:
             if queue.current_visit_id:
                 raise ValueError("Consultation already in progress")
 
-            # 2️⃣ Pick next entry (present > waiting)
-            result = await db.execute(
-                select(QueueEntry)
-                .where(
-                    QueueEntry.queue_id == queue.id,
-                    QueueEntry.status.in_(["present", "waiting", "called"]),
-                )
-                .order_by(
-                    asc(
-                        QueueEntry.status != "present"
-                    ),  # present first
-                    asc(QueueEntry.token_number),
-                )
-                .limit(1)
-            )
-
-            entry = result.scalar_one_or_none()
+            # 2️⃣ - 5️⃣ Pick, call and make current the next entry
+            entry, reinserted = await QueueService._call_next_entry(db, queue)
 
             if not entry:
                 raise ValueError("No patients waiting in queue")
 
-            # 3️⃣ Mark entry as called (awaiting patient)
-            entry.status = "called"
-            entry.consultation_start_time = datetime.utcnow()
-
-            # 4️⃣ Update queue
-            queue.current_token = entry.token_number
-            queue.current_visit_id = entry.visit_id
-            queue.last_event_type = "CALL_NEXT"
-            queue.last_event_reason = "Doctor called next patient"
-            queue.last_updated_by = "doctor"
+            reason = "Doctor called next patient"
+            if reinserted:
+                reason += f"; reinserted {len(reinserted)} skipped patient(s)"
+            event = await QueueService._record_event(
+                db,
+                queue,
+                "CALL_NEXT",
+                entry=entry,
+                reason=reason,
+                actor="doctor",
+            )
 
-            # 5️⃣ Fetch visit + patient context
-            visit = await db.get(Visit, entry.visit_id)
-            patient = await db.get(Patient, visit.patient_id)
-            doctor = await db.get(Doctor, visit.doctor_id)
-            # Eagerly resolve department name to avoid async lazy-load later
-            if not doctor:
-                raise ValueError("Doctor not found for visit")
-            dept_name = None
-            if doctor.department_id:
-                dept = await db.get(Department, doctor.department_id)
-                if not dept:
-                    raise ValueError("Doctor department not found")
-                dept_name = dept.name
+            # 6️⃣ Fetch visit + patient context
+            visit, patient, dept_name = await QueueService._patient_context(
+                db, entry
+            )
         # 🔓 COMMIT DONE — SAFE TO HANDOFF
 
-        # 6️⃣ Handoff to Doctor Assistance Agent
-        state = DoctorAssistanceState(
-            visit_id=visit.id,
-            patient_id=patient.id,
-            doctor_id=visit.doctor_id,
-            department=dept_name,
-            token_number=entry.token_number,
-            symptoms_summary=visit.symptoms_summary,
-        )
+        QueueService._after_commit(queue, entry, event, reinserted)
 
-        agent = DoctorAssistanceAgent(state, db=db)
-        await agent.handle({})
-        
-        # Save agent state to database for persistence
-        session_id = uuid.uuid4()
-        await AgentSessionService.create(
-            db,
-            agent_name=agent.state.agent_name,
-            state=agent.state.model_dump(),
+        # 7️⃣ Handoff to Doctor Assistance Agent (background)
+        agent_sync = agent_dispatcher.submit(
+            visit.id,
+            "call_next",
+            request.queue_date,
+            {
+                "visit_id": visit.id,
+                "patient_id": patient.id,
+                "doctor_id": visit.doctor_id,
+                "department": dept_name,
+                "token_number": entry.token_number,
+                "symptoms_summary": visit.symptoms_summary,
+            },
         )
 
         return CallNextResponse(
@@ -219,8 +443,132 @@ class QueueService:
             patient_age=patient.age,
             patient_contact=patient.contact_number,
             symptoms_summary=visit.symptoms_summary,
+            agent_sync=agent_sync,
         )
 
+    @staticmethod
+    async def _call_next_entry(
+        db: AsyncSession,
+        queue: DoctorQueue,
+    ) -> tuple[QueueEntry | None, List[QueueEntry]]:
+        """
+        Call the next entry of a locked, idle queue and make it current.
+        Returns (entry, reinserted skipped entries); entry is None when
+        nobody is waiting. No event is recorded.
+        """
+        # Pick next entry (present > waiting, then priority lane, then
+        # token): one LIMIT 1 probe per group, each an ordered index scan
+        # (present on ix_queue_entries_queue_status_rank_token, the rest on
+        # ix_queue_entries_callable_rank). Rows locked by another
+        # transaction (e.g. a check-in in flight) are passed over rather
+        # than waited on.
+        def pick(statuses):
+            return (
+                select(QueueEntry)
+                .where(
+                    QueueEntry.queue_id == queue.id,
+                    QueueEntry.queue_date == queue.queue_date,
+                    QueueEntry.status.in_(statuses),
+                )
+                .order_by(asc(QueueEntry.priority_rank), asc(QueueEntry.token_number))
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+
+        async def pick_next():
+            entry = (await db.execute(pick(["present"]))).scalar_one_or_none()
+            if entry is None:
+                entry = (
+                    await db.execute(pick(["waiting", "called"]))
+                ).scalar_one_or_none()
+            return entry
+
+        entry = await pick_next()
+
+        reinserted = []
+        if not entry and queue.reinsert_pending_count:
+            # Nobody else left: checked-in skipped patients need not wait
+            # for their threshold
+            reinserted = await QueueService._reinsert_skipped(db, queue)
+            entry = await pick_next()
+
+        if not entry:
+            return None, reinserted
+
+        # Mark entry as called (awaiting patient) and make it current
+        QueueService._set_status(queue, entry, "called")
+        entry.consultation_start_time = datetime.utcnow()
+        queue.current_token = entry.token_number
+        queue.current_visit_id = entry.visit_id
+        queue.highest_called_token = max(
+            queue.highest_called_token or 0, entry.token_number
+        )
+
+        # Skipped patients who checked in again rejoin (as present) once
+        # their eligible_after_token has been called
+        if queue.reinsert_pending_count:
+            reinserted += await QueueService._reinsert_skipped(
+                db, queue, queue.highest_called_token
+            )
+
+        return entry, reinserted
+
+    @staticmethod
+    async def _patient_context(db: AsyncSession, entry: QueueEntry):
+        """
+        (visit, patient, department name) of a called entry, resolved
+        eagerly to avoid async lazy-loads after commit.
+        """
+        visit = await db.get(Visit, entry.visit_id)
+        patient = await db.get(Patient, visit.patient_id)
+        doctor = await db.get(Doctor, visit.doctor_id)
+        if not doctor:
+            raise ValueError("Doctor not found for visit")
+        dept_name = None
+        if doctor.department_id:
+            dept = await db.get(Department, doctor.department_id)
+            if not dept:
+                raise ValueError("Doctor department not found")
+            dept_name = dept.name
+        return visit, patient, dept_name
+
+    @staticmethod
+    async def _end_current(db: AsyncSession, queue: DoctorQueue, visit_id):
+        """
+        Complete the locked queue's current consultation (visit_id must be
+        it) and free the queue. Returns (entry, visit); no event recorded.
+        """
+        # Validate visit
+        if queue.current_visit_id != visit_id:
+            raise ValueError("Visit does not match active consultation")
+
+        # Fetch queue entry
+        result = await db.execute(
+            select(QueueEntry).where(
+                QueueEntry.queue_id == queue.id,
+                QueueEntry.queue_date == queue.queue_date,
+                QueueEntry.visit_id == visit_id,
+                QueueEntry.status.in_(["in_consultation", "called"]),
+            )
+        )
+        entry = result.scalar_one_or_none()
+
+        if not entry:
+            raise ValueError("Queue entry not found or already closed")
+
+        # Close queue entry
+        QueueService._set_status(queue, entry, "completed")
+        entry.consultation_end_time = datetime.utcnow()
+
+        # Update visit
+        visit = await db.get(Visit, visit_id)
+        visit.status = "completed"
+
+        # Free doctor queue
+        queue.current_visit_id = None
+        queue.current_token = None
+        return entry, visit
+
     @staticmethod
     async def end_consultation(
         db: AsyncSession,
@@ -235,92 +583,54 @@ class QueueService:
                     DoctorQueue.doctor_id == request.doctor_id,
                     DoctorQueue.queue_date == request.queue_date,
                 )
+                .with_for_update()
             )
             queue = result.scalar_one_or_none()
 
             if not queue or not queue.current_visit_id:
                 raise ValueError("No active consultation for this doctor")
 
-            # 2️⃣ Validate visit
-            if queue.current_visit_id != request.visit_id:
-                raise ValueError("Visit does not match active consultation")
-
-            # 3️⃣ Fetch queue entry
-            result = await db.execute(
-                select(QueueEntry).where(
-                    QueueEntry.queue_id == queue.id,
-                    QueueEntry.visit_id == request.visit_id,
-                    QueueEntry.status.in_(["in_consultation", "called"]),
-                )
+            # 2️⃣ - 6️⃣ Close the entry and visit, free the doctor queue
+            entry, visit = await QueueService._end_current(
+                db, queue, request.visit_id
+            )
+            event = await QueueService._record_event(
+                db,
+                queue,
+                "CONSULTATION_ENDED",
+                entry=entry,
+                reason="Doctor ended consultation",
+                actor="doctor",
+                ended=entry,
             )
-            entry = result.scalar_one_or_none()
-
-            if not entry:
-                raise ValueError("Queue entry not found or already closed")
-
-            # 4️⃣ Close queue entry
-            entry.status = "completed"
-            entry.consultation_end_time = datetime.utcnow()
-
-            # 5️⃣ Update visit
-            visit = await db.get(Visit, request.visit_id)
-            visit.status = "completed"
-
-            # 6️⃣ Free doctor queue
-            queue.current_visit_id = None
-            queue.current_token = None
-            queue.last_event_type = "CONSULTATION_ENDED"
-            queue.last_event_reason = "Doctor ended consultation"
-            queue.last_updated_by = "doctor"
 
         # 🔓 TRANSACTION COMMIT
 
-        print(
-            "[QueueService] Consultation ended successfully | "
-            f"visit_id={request.visit_id} doctor_id={request.doctor_id}"
-        )
+        QueueService._after_commit(queue, entry, event, ended=entry)
 
-        # Notify Doctor Assistance Agent about consultation end
         print(
-            "[QueueService] Notifying Doctor Assistance Agent (end) | "
+            "[QueueService] Consultation ended successfully | "
             f"visit_id={request.visit_id} doctor_id={request.doctor_id}"
         )
 
-        session_result = await db.execute(
-            select(agent_sessions).where(
-                agent_sessions.c.state['visit_id'].astext == str(request.visit_id)
-            ).order_by(agent_sessions.c.created_at.desc()).limit(1)
+        # Notify Doctor Assistance Agent about consultation end (background)
+        agent_sync = agent_dispatcher.submit(
+            request.visit_id,
+            "end_consultation",
+            request.queue_date,
+            {
+                "visit_id": visit.id,
+                "patient_id": visit.patient_id,
+                "doctor_id": request.doctor_id,
+                "token_number": entry.token_number,
+            },
         )
-        session_row = session_result.first()
-
-        if session_row:
-            state = DoctorAssistanceState(**session_row[2])
-            session_id = session_row[0]
-        else:
-            state = DoctorAssistanceState(
-                visit_id=visit.id,
-                patient_id=visit.patient_id,
-                doctor_id=request.doctor_id,
-            )
-            session_id = None
-
-        agent = DoctorAssistanceAgent(state, db=db)
-        await agent.handle({
-            "action": "end_consultation",
-            "skip_queue_call": True,  # Prevent recursion: we are already in QueueService
-        })
-
-        if session_id:
-            await AgentSessionService.update(
-                db,
-                session_id,
-                agent.state.dict(),
-            )
 
         return EndConsultationResponse(
             success=True,
             visit_id=request.visit_id,
             message="Consultation ended successfully",
+            agent_sync=agent_sync,
         )
     
     @staticmethod
@@ -331,19 +641,39 @@ class QueueService:
 
         async with db.begin():  # 🔒 TRANSACTION
 
-            # 1️⃣ Find queue entry for this visit & date
+            # 1️⃣ Find the entry's queue for this visit & date (no lock yet)
+            queue_id = await db.scalar(
+                select(QueueEntry.queue_id).where(
+                    QueueEntry.visit_id == request.visit_id,
+                    QueueEntry.queue_date == request.queue_date,
+                )
+            )
+
+            if not queue_id:
+                raise ValueError("Queue entry not found")
+
+            # Lock queue, then entry: the order every other mutation uses
             result = await db.execute(
-                select(QueueEntry)
-                .join(DoctorQueue, QueueEntry.queue_id == DoctorQueue.id)
+                select(DoctorQueue)
                 .where(
-                    QueueEntry.visit_id == request.visit_id,
+                    DoctorQueue.id == queue_id,
                     DoctorQueue.queue_date == request.queue_date,
                 )
+                .with_for_update()
             )
-            entry = result.scalar_one_or_none()
+            queue = result.scalar_one()
 
-            if not entry:
-                raise ValueError("Queue entry not found")
+            result = await db.execute(
+                select(QueueEntry)
+                .where(
+                    QueueEntry.queue_id == queue_id,
+                    QueueEntry.queue_date == request.queue_date,
+                    QueueEntry.visit_id == request.visit_id,
+                )
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            entry = result.scalar_one()
 
             # 2️⃣ Validate state
             if entry.status == "present":
@@ -354,21 +684,61 @@ class QueueService:
                     status="present",
                 )
 
-            if entry.status != "waiting":
+            if entry.status == "skipped" and entry.reinsert_requested_at:
+                # Idempotent success: already waiting for reinsertion
+                return CheckInResponse(
+                    success=True,
+                    visit_id=request.visit_id,
+                    status="reinsert_pending",
+                )
+
+            if entry.status not in ("waiting", "skipped"):
                 raise ValueError(
                     f"Cannot check-in patient in state '{entry.status}'"
                 )
 
-            # 3️⃣ Mark as present
-            entry.status = "present"
-            entry.check_in_time = datetime.utcnow()
+            now = datetime.utcnow()
+
+            if entry.status == "skipped" and entry.eligible_after_token is None:
+                # Skipped before thresholds were recorded
+                entry.skip_position_token = entry.token_number
+                entry.eligible_after_token = entry.token_number + REINSERT_AFTER_TOKENS
+
+            if entry.status == "skipped" and (
+                (queue.highest_called_token or 0) < entry.eligible_after_token
+            ):
+                # 3️⃣ Skipped patient is back: call_next reinserts them once
+                #    their threshold token has been called
+                entry.reinsert_requested_at = now
+                queue.reinsert_pending_count += 1
+                event = await QueueService._record_event(
+                    db,
+                    queue,
+                    "REINSERT_REQUESTED",
+                    entry=entry,
+                    reason=f"Eligible after token {entry.eligible_after_token}",
+                    actor="patient",
+                )
+                status = "reinsert_pending"
+            else:
+                # 3️⃣ Mark as present (a skipped patient past the threshold
+                #    rejoins straight away)
+                reason = "Reinserted after skip" if entry.status == "skipped" else None
+                QueueService._set_status(queue, entry, "present")
+                entry.check_in_time = now
+                event = await QueueService._record_event(
+                    db, queue, "CHECK_IN", entry=entry, reason=reason, actor="patient"
+                )
+                status = "present"
 
         # 🔓 COMMIT
 
+        QueueService._after_commit(queue, entry, event)
+
         return CheckInResponse(
             success=True,
             visit_id=request.visit_id,
-            status="present",
+            status=status,
         )
     
 
@@ -386,6 +756,7 @@ class QueueService:
                     DoctorQueue.doctor_id == request.doctor_id,
                     DoctorQueue.queue_date == request.queue_date,
                 )
+                .with_for_update()
             )
             queue = result.scalar_one_or_none()
 
@@ -396,6 +767,7 @@ class QueueService:
             result = await db.execute(
                 select(QueueEntry).where(
                     QueueEntry.queue_id == queue.id,
+                    QueueEntry.queue_date == queue.queue_date,
                     QueueEntry.visit_id == request.visit_id,
                 )
             )
@@ -412,25 +784,33 @@ class QueueService:
                 raise ValueError("Cannot skip patient in active consultation. End consultation first.")
 
             # 4️⃣ Mark skipped (terminal)
-            entry.status = "skipped"
+            QueueService._set_status(queue, entry, "skipped")
             entry.skipped_at = datetime.utcnow()
             entry.skip_reason = request.reason
 
-            # 🔮 Store future reinsertion metadata
+            # Reinsertion threshold for a later check-in (see call_next)
             entry.skip_position_token = entry.token_number
-            entry.eligible_after_token = entry.token_number + 2  # UNUSED NOW
+            entry.eligible_after_token = entry.token_number + REINSERT_AFTER_TOKENS
+            entry.reinsert_requested_at = None
 
             # 5️⃣ If this was current visit, free doctor
             if queue.current_visit_id == request.visit_id:
                 queue.current_visit_id = None
                 queue.current_token = None
 
-            queue.last_event_type = "SKIP"
-            queue.last_event_reason = request.reason
-            queue.last_updated_by = "doctor"
+            event = await QueueService._record_event(
+                db,
+                queue,
+                "SKIP",
+                entry=entry,
+                reason=request.reason,
+                actor="doctor",
+            )
 
         # 🔓 COMMIT
 
+        QueueService._after_commit(queue, entry, event)
+
         return SkipResponse(
             success=True,
             visit_id=request.visit_id,
@@ -454,6 +834,7 @@ class QueueService:
                     DoctorQueue.doctor_id == request.doctor_id,
                     DoctorQueue.queue_date == request.queue_date,
                 )
+                .with_for_update()
             )
             queue = result.scalar_one_or_none()
 
@@ -463,6 +844,7 @@ class QueueService:
             result = await db.execute(
                 select(QueueEntry).where(
                     QueueEntry.queue_id == queue.id,
+                    QueueEntry.queue_date == queue.queue_date,
                     QueueEntry.visit_id == request.visit_id,
                     QueueEntry.status == "called",
                 )
@@ -472,11 +854,12 @@ class QueueService:
             if not entry:
                 raise ValueError("Visit is not in called state")
 
-            entry.status = "in_consultation"
+            QueueService._set_status(queue, entry, "in_consultation")
             entry.consultation_start_time = datetime.utcnow()
 
-            queue.last_event_type = "CONSULTATION_STARTED"
-            queue.last_updated_by = "doctor"
+            event = await QueueService._record_event(
+                db, queue, "CONSULTATION_STARTED", entry=entry, actor="doctor"
+            )
             
             # Fetch visit and patient context for Doctor Assistance Agent
             visit = await db.get(Visit, request.visit_id)
@@ -491,193 +874,770 @@ class QueueService:
 
         # 🔓 TRANSACTION COMMIT DONE
 
+        QueueService._after_commit(queue, entry, event)
+
         print(
             "[QueueService] Consultation started successfully | "
             f"visit_id={request.visit_id} status=in_consultation"
         )
         
-        # Notify Doctor Assistance Agent about consultation start
-        print(
-            "[QueueService] Notifying Doctor Assistance Agent | "
-            f"visit_id={request.visit_id} doctor_id={request.doctor_id}"
+        # Notify Doctor Assistance Agent about consultation start (background)
+        agent_sync = agent_dispatcher.submit(
+            request.visit_id,
+            "start_consultation",
+            request.queue_date,
+            {
+                "visit_id": visit.id,
+                "patient_id": patient.id,
+                "doctor_id": request.doctor_id,
+                "department": dept_name,
+                "token_number": entry.token_number,
+                "symptoms_summary": visit.symptoms_summary,
+            },
         )
-        
-        # Load existing doctor assistance state from database
-        # Search for sessions with this visit_id
 
-        session_result = await db.execute(
-            select(agent_sessions).where(
-                agent_sessions.c.state['visit_id'].astext == str(request.visit_id)
-            ).order_by(agent_sessions.c.created_at.desc()).limit(1)
+        return StartConsultationResponse(
+            success=True,
+            visit_id=request.visit_id,
+            status="in_consultation",
+            agent_sync=agent_sync,
         )
-        session_row = session_result.first()
-        
-        if session_row:
-            # Load state from database
-            print(
-                f"[QueueService] Loaded doctor assistance state from DB | visit_id={request.visit_id}"
+
+    @staticmethod
+    async def advance(
+        db: AsyncSession,
+        request: AdvanceRequest,
+    ) -> AdvanceResponse:
+        """
+        The doctor's loop in one transaction: end the open consultation
+        (if any), call the next patient and optionally start their
+        consultation, under a single queue-row lock and with one event.
+        With nobody left to call, the consultation is still ended.
+        """
+        async with db.begin():  # 🔒 TRANSACTION START
+
+            # 1️⃣ Fetch and lock the doctor queue
+            result = await db.execute(
+                select(DoctorQueue).where(
+                    DoctorQueue.doctor_id == request.doctor_id,
+                    DoctorQueue.queue_date == request.queue_date,
+                )
+                .with_for_update()
             )
-            state = DoctorAssistanceState(**session_row[2])  # state is at index 2
-            session_id = session_row[0]  # session_id is at index 0
-        else:
-            # Fallback: create new state if not found
-            print(
-                f"[QueueService] No saved state found, creating new state | visit_id={request.visit_id}"
+            queue = result.scalar_one_or_none()
+
+            if not queue:
+                raise ValueError("No active queue for this doctor")
+
+            # 2️⃣ Close the open consultation
+            ended = ended_visit = None
+            if queue.current_visit_id or request.visit_id:
+                if not queue.current_visit_id:
+                    raise ValueError("No active consultation for this doctor")
+                ended, ended_visit = await QueueService._end_current(
+                    db, queue, request.visit_id
+                )
+
+            # 3️⃣ Call the next patient
+            entry, reinserted = await QueueService._call_next_entry(db, queue)
+
+            if not entry and not ended:
+                raise ValueError("No patients waiting in queue")
+
+            # 4️⃣ Optionally start their consultation straight away
+            if entry and request.start:
+                QueueService._set_status(queue, entry, "in_consultation")
+                entry.consultation_start_time = datetime.utcnow()
+
+            steps = []
+            if ended:
+                steps.append(f"ended token {ended.token_number}")
+            if entry:
+                steps.append(
+                    f"{'started' if request.start else 'called'} token {entry.token_number}"
+                )
+            if reinserted:
+                steps.append(f"reinserted {len(reinserted)} skipped patient(s)")
+
+            event = await QueueService._record_event(
+                db,
+                queue,
+                "ADVANCED" if entry else "CONSULTATION_ENDED",
+                entry=entry or ended,
+                reason="Doctor advanced queue: " + ", ".join(steps),
+                actor="doctor",
+                ended=ended,
+            )
+
+            # 5️⃣ Fetch visit + patient context
+            if entry:
+                visit, patient, dept_name = await QueueService._patient_context(
+                    db, entry
+                )
+
+        # 🔓 TRANSACTION COMMIT
+
+        # The event names one entry; the others it moved go to the state too
+        also_changed = ([ended] if entry and ended else []) + reinserted
+        QueueService._after_commit(
+            queue, entry or ended, event, also_changed, ended=ended
+        )
+
+        # 6️⃣ Doctor Assistance Agent sees the same sequence of actions as
+        #    with the separate endpoints (background)
+        if ended:
+            agent_dispatcher.submit(
+                ended.visit_id,
+                "end_consultation",
+                request.queue_date,
+                {
+                    "visit_id": ended_visit.id,
+                    "patient_id": ended_visit.patient_id,
+                    "doctor_id": request.doctor_id,
+                    "token_number": ended.token_number,
+                },
+            )
+
+        if not entry:
+            return AdvanceResponse(
+                ended_visit_id=ended.visit_id,
+                message="Consultation ended; no patients waiting",
+            )
+
+        context = {
+            "visit_id": visit.id,
+            "patient_id": patient.id,
+            "doctor_id": visit.doctor_id,
+            "department": dept_name,
+            "token_number": entry.token_number,
+            "symptoms_summary": visit.symptoms_summary,
+        }
+        agent_sync = agent_dispatcher.submit(
+            visit.id, "call_next", request.queue_date, context
+        )
+        if request.start:
+            agent_sync = agent_dispatcher.submit(
+                visit.id, "start_consultation", request.queue_date, context
             )
-            state = DoctorAssistanceState(
+
+        return AdvanceResponse(
+            ended_visit_id=ended.visit_id if ended else None,
+            next_patient=CallNextResponse(
                 visit_id=visit.id,
                 patient_id=patient.id,
-                doctor_id=request.doctor_id,
-                department=dept_name,
+                doctor_id=visit.doctor_id,
                 token_number=entry.token_number,
+                status=entry.status,
+                patient_name=patient.full_name,
+                patient_age=patient.age,
+                patient_contact=patient.contact_number,
                 symptoms_summary=visit.symptoms_summary,
-            )
-            session_id = uuid.uuid4()
-        
-        agent = DoctorAssistanceAgent(state, db=db)
-        await agent.handle(
-            {
-                "action": "start_consultation",
-                "queue_date": str(request.queue_date),
-                "skip_queue_call": True,  # Skip queue_client call since we're already in QueueService
-            }
-        )
-        
-        # Update agent state in database
-        await AgentSessionService.update(
-            db,
-            session_id,
-            agent.state.model_dump(),
-        )
-        
-        return StartConsultationResponse(
-            success=True,
-            visit_id=request.visit_id,
-            status="in_consultation",
+                agent_sync=agent_sync,
+            ),
+            message="Queue advanced",
         )
 
     @staticmethod
-    async def get_status(db, request: QueueStatusRequest):
+    def agent_sync_status(visit_id) -> AgentSyncStatus:
+        """
+        Latest Doctor Assistance handoff status for a visit, as tracked by
+        this worker process.
+        """
+        status = agent_dispatcher.status(visit_id)
 
-        # 1️⃣ Fetch queue
-        result = await db.execute(
-            select(DoctorQueue).where(
-                DoctorQueue.doctor_id == request.doctor_id,
-                DoctorQueue.queue_date == request.queue_date,
+        if status is None:
+            raise ValueError("No agent handoff tracked for this visit")
+
+        return status
+
+    @staticmethod
+    async def _record_event(
+        db: AsyncSession,
+        queue: DoctorQueue,
+        event_type: str,
+        entry: QueueEntry | None = None,
+        reason: str | None = None,
+        actor: str | None = None,
+        ended: QueueEntry | None = None,
+    ) -> dict:
+        """
+        Bump the queue version and notify other workers. Runs inside the
+        mutating transaction while the queue row is locked. Returns the
+        queue_events row, which _after_commit hands to the event log.
+        ended is an entry whose consultation this mutation completed.
+        """
+        queue.version += 1
+
+        consultation = None
+        if ended is not None and ended.consultation_start_time is not None:
+            consultation = (ended.consultation_start_time, ended.consultation_end_time)
+        await notify_queue_change(db, queue, event_type, consultation)
+
+        return {
+            "queue_id": queue.id,
+            "hospital_id": queue.hospital_id,
+            "doctor_id": queue.doctor_id,
+            "queue_date": queue.queue_date,
+            "version": queue.version,
+            "event_type": event_type,
+            "visit_id": entry.visit_id if entry is not None else None,
+            "token_number": entry.token_number if entry is not None else None,
+            "entry_status": entry.status if entry is not None else None,
+            "reason": reason,
+            "actor": actor,
+            "occurred_at": datetime.now(timezone.utc),
+        }
+
+    @staticmethod
+    def _after_commit(
+        queue: DoctorQueue,
+        entry: QueueEntry | None = None,
+        event: dict | None = None,
+        also_changed: List[QueueEntry] = (),
+        ended: QueueEntry | None = None,
+    ) -> None:
+        """
+        Propagate a committed mutation to the in-memory queue state, wake
+        any streaming subscribers of that queue, invalidate the hospital's
+        reception dashboard and append the event to the queue log.
+        also_changed lists further entries the same transaction moved
+        (e.g. reinserted skipped patients); ended is an entry whose
+        consultation it completed, for the wait-time estimator.
+        """
+        written_through(queue)
+        if event is not None:
+            queue_event_log.append(event)
+        if ended is not None and ended.consultation_start_time is not None:
+            wait_time_estimator.observe(
+                queue.doctor_id,
+                ended.consultation_start_time,
+                ended.consultation_end_time,
             )
-        )
-        queue = result.scalar_one_or_none()
+        queue_state.apply(queue, entry, also_changed)
+        queue_broadcaster.publish((queue.doctor_id, queue.queue_date), queue.version)
+        hospital_queue_board.touch(queue.hospital_id)
+        hospital_load_summary.apply(queue)
 
-        if not queue:
-            raise ValueError("Queue not found")
+    @staticmethod
+    async def _reinsert_skipped(
+        db: AsyncSession,
+        queue: DoctorQueue,
+        called_token: int | None = None,
+    ) -> List[QueueEntry]:
+        """
+        Put checked-in skipped entries back as present: those whose
+        eligible_after_token is at most called_token, or all of them when
+        called_token is None. One indexed UPDATE on ix_queue_entries_reinsert;
+        rows locked by a check-in in flight wait for the next call. Callers
+        hold the queue row lock.
+        """
+        due = (
+            select(QueueEntry.id)
+            .where(
+                QueueEntry.queue_id == queue.id,
+                QueueEntry.queue_date == queue.queue_date,
+                QueueEntry.status == "skipped",
+                QueueEntry.reinsert_requested_at.isnot(None),
+            )
+            .with_for_update(skip_locked=True)
+        )
+        if called_token is not None:
+            due = due.where(QueueEntry.eligible_after_token <= called_token)
 
-        # 2️⃣ Fetch all queue entries
         result = await db.execute(
-            select(QueueEntry).where(
-                QueueEntry.queue_id == queue.id
+            update(QueueEntry)
+            .where(
+                QueueEntry.id.in_(due.scalar_subquery()),
+                QueueEntry.queue_date == queue.queue_date,
             )
+            .values(
+                status="present",
+                check_in_time=QueueEntry.reinsert_requested_at,
+                reinsert_requested_at=None,
+            )
+            .returning(QueueEntry)
+            .execution_options(populate_existing=True, synchronize_session=False)
         )
         entries = result.scalars().all()
 
-        # ---------- DOCTOR VIEW ----------
-        if request.role == "doctor":
+        queue.skipped_count -= len(entries)
+        queue.present_count += len(entries)
+        queue.reinsert_pending_count -= len(entries)
+        return entries
 
-            called_entry = next(
-                (e for e in entries if e.status == "called"), None
-            )
-
-            next_waiting = [
-                TokenInfo(token_number=e.token_number, status=e.status)
-                for e in sorted(entries, key=lambda x: x.token_number)
-                if e.status in ("present", "waiting")
-            ][:3]
-
-            counts = {
-                "waiting": sum(1 for e in entries if e.status == "waiting"),
-                "present": sum(1 for e in entries if e.status == "present"),
-                "skipped": sum(1 for e in entries if e.status == "skipped"),
-            }
-
-            return DoctorQueueStatus(
-                role="doctor",
-                queue_open=queue.queue_open,
-                current_token=queue.current_token,
-                current_visit_id=queue.current_visit_id,
-                called=(
-                    TokenInfo(
-                        token_number=called_entry.token_number,
-                        status=called_entry.status,
-                    )
-                    if called_entry else None
+    @staticmethod
+    def _set_status(queue: DoctorQueue, entry: QueueEntry, status: str) -> None:
+        """
+        Move an entry to a new status and keep the queue's live per-status
+        counters in step. Callers hold the queue row lock.
+        """
+        if entry.status:
+            previous = f"{entry.status}_count"
+            setattr(queue, previous, getattr(queue, previous) - 1)
+
+        current = f"{status}_count"
+        setattr(queue, current, getattr(queue, current) + 1)
+        entry.status = status
+
+    @staticmethod
+    async def refresh_schedule(db: AsyncSession, doctor_id) -> List[tuple]:
+        """
+        Re-derive the doctor's unstarted queues from their new schedule and
+        record a QUEUE_RESCHEDULED event for each. Runs in the caller's
+        transaction; hand the result to publish_refreshed after the commit.
+        """
+        queues = await refresh_unstarted_queues(db, doctor_id)
+        return [
+            (
+                queue,
+                await QueueService._record_event(
+                    db, queue, "QUEUE_RESCHEDULED", reason="Doctor schedule changed"
                 ),
-                next_waiting=next_waiting,
-                counts=counts,
             )
+            for queue in queues
+        ]
 
-        # ---------- PATIENT VIEW ----------
-        if request.role == "patient":
-
-            if not request.visit_id:
-                raise ValueError("visit_id is required for patient view")
+    @staticmethod
+    def publish_refreshed(refreshed: List[tuple]) -> None:
+        """
+        Propagate committed refresh_schedule changes, as after any mutation.
+        """
+        for queue, event in refreshed:
+            QueueService._after_commit(queue, event=event)
 
-            entry = next(
-                (e for e in entries if e.visit_id == request.visit_id), None
+    @staticmethod
+    async def reconcile_counters(db: AsyncSession, queue_id) -> DoctorQueue:
+        """
+        Rebuild a queue's live counters from its entries.
+        """
+        async with db.begin():
+            result = await db.execute(
+                select(DoctorQueue)
+                .where(DoctorQueue.id == queue_id)
+                .with_for_update()
             )
+            queue = result.scalar_one_or_none()
 
-            if not entry:
-                raise ValueError("Visit not found in queue")
+            if not queue:
+                raise ValueError("Queue not found")
 
-            active_entries = [
-                e for e in entries
-                if e.status in ("waiting", "present", "called")
-            ]
+            result = await db.execute(
+                select(QueueEntry.status, func.count(QueueEntry.id))
+                .where(
+                    QueueEntry.queue_id == queue_id,
+                    QueueEntry.queue_date == queue.queue_date,
+                )
+                .group_by(QueueEntry.status)
+            )
+            counts = dict(result.all())
+
+            for status in STATUSES:
+                setattr(queue, f"{status}_count", counts.get(status, 0))
 
-            # Calculate ahead counts by status
-            present_ahead = sum(
-                1 for e in active_entries
-                if e.token_number < entry.token_number and e.status == "present"
+            queue.reinsert_pending_count = await db.scalar(
+                select(func.count(QueueEntry.id)).where(
+                    QueueEntry.queue_id == queue_id,
+                    QueueEntry.queue_date == queue.queue_date,
+                    QueueEntry.status == "skipped",
+                    QueueEntry.reinsert_requested_at.isnot(None),
+                )
+            )
+            queue.highest_called_token = await db.scalar(
+                select(func.coalesce(func.max(QueueEntry.token_number), 0)).where(
+                    QueueEntry.queue_id == queue_id,
+                    QueueEntry.queue_date == queue.queue_date,
+                    QueueEntry.consultation_start_time.isnot(None),
+                )
             )
 
-            waiting_ahead = sum(
-                1 for e in active_entries
-                if e.token_number < entry.token_number and e.status == "waiting"
+            event = await QueueService._record_event(
+                db, queue, "COUNTERS_RECONCILED", actor="system"
             )
 
-            patients_ahead = present_ahead + waiting_ahead
+        QueueService._after_commit(queue, event=event)
+        return queue
 
-            # Only count present patients for estimated wait (waiting may not show up)
-            estimated_wait = (
-                present_ahead * queue.avg_consult_time_minutes
-            )
+    @staticmethod
+    async def get_status(db, request: QueueStatusRequest):
 
-            return PatientQueueStatus(
-                role="patient",
-                visit_id=request.visit_id,
-                token_number=entry.token_number,
-                status=entry.status,
-                current_token=queue.current_token,
-                patients_ahead=patients_ahead,
-                present_ahead=present_ahead,
-                waiting_ahead=waiting_ahead,
-                estimated_wait_minutes=estimated_wait,
+        # 1️⃣ Serve from the in-memory queue state, hydrating it on a miss
+        state = queue_state.get(request.doctor_id, request.queue_date)
+
+        if state is None and request.role == "receptionist":
+            # Live counters on the queue row answer this view on their own
+            result = await db.execute(
+                select(DoctorQueue).where(
+                    DoctorQueue.doctor_id == request.doctor_id,
+                    DoctorQueue.queue_date == request.queue_date,
+                )
             )
+            queue = result.scalar_one_or_none()
 
-        # ---------- RECEPTION VIEW ----------
-        if request.role == "receptionist":
+            if not queue:
+                raise ValueError("Queue not found")
 
             return ReceptionQueueStatus(
                 role="receptionist",
                 queue_date=request.queue_date,
                 doctor_id=request.doctor_id,
-                total_visits=len(entries),
-                completed=sum(1 for e in entries if e.status == "completed"),
-                in_progress=sum(
-                    1 for e in entries
-                    if e.status in ("called", "in_consultation")
+                total_visits=sum(
+                    getattr(queue, f"{status}_count") for status in STATUSES
                 ),
-                waiting=sum(1 for e in entries if e.status == "waiting"),
-                skipped=sum(1 for e in entries if e.status == "skipped"),
+                completed=queue.completed_count,
+                in_progress=queue.called_count + queue.in_consultation_count,
+                waiting=queue.waiting_count,
+                skipped=queue.skipped_count,
+            )
+
+        if state is None and request.role == "doctor":
+            return await QueueService._doctor_view_from_sql(
+                db, request.doctor_id, request.queue_date
+            )
+
+        if state is None:
+            state = await QueueService._hydrate_state(
+                db, request.doctor_id, request.queue_date
             )
 
+        # ---------- DOCTOR VIEW ----------
+        if request.role == "doctor":
+            return state.doctor_view()
+
+        # ---------- PATIENT VIEW ----------
+        if request.role == "patient":
+
+            if not request.visit_id:
+                raise ValueError("visit_id is required for patient view")
+
+            if not state.covers(request.visit_id):
+                # Finished visit on a warm-started (active entries only) queue
+                position = await QueueService._position_from_sql(
+                    db, request.doctor_id, request.queue_date, request.visit_id
+                )
+                return PatientQueueStatus(role="patient", **position.model_dump())
+
+            return state.patient_view(request.visit_id)
+
+        # ---------- RECEPTION VIEW ----------
+        if request.role == "receptionist":
+            return state.reception_view()
+
         raise ValueError("Invalid role")
-        
\ No newline at end of file
+
+    @staticmethod
+    async def get_events(
+        db: AsyncSession,
+        request: QueueEventsRequest,
+    ) -> QueueEventsPage:
+        """
+        A queue's events after a version cursor, oldest first.
+
+        Events reach queue_events in batches, so rows flushed from the
+        database are merged with this worker's unflushed buffer. The page
+        stops at the first missing version while that event may still sit
+        in another worker's buffer, so a client that advances to
+        next_cursor never skips one.
+        """
+        state = queue_state.get(request.doctor_id, request.queue_date)
+
+        if state is not None:
+            queue_id = state.queue_id
+        else:
+            queue_id = await db.scalar(
+                select(DoctorQueue.id).where(
+                    DoctorQueue.doctor_id == request.doctor_id,
+                    DoctorQueue.queue_date == request.queue_date,
+                )
+            )
+            if queue_id is None:
+                raise ValueError("Queue not found")
+
+        limit = max(1, min(request.limit, MAX_EVENTS_PAGE))
+
+        result = await db.execute(
+            select(
+                QueueEvent.version,
+                QueueEvent.event_type,
+                QueueEvent.visit_id,
+                QueueEvent.token_number,
+                QueueEvent.entry_status,
+                QueueEvent.reason,
+                QueueEvent.actor,
+                QueueEvent.occurred_at,
+            )
+            .where(
+                QueueEvent.queue_id == queue_id,
+                QueueEvent.version > request.after,
+            )
+            .order_by(QueueEvent.version)
+            .limit(limit)
+        )
+        events = {row.version: QueueEventOut(**row._mapping) for row in result}
+
+        for pending in queue_event_log.pending(queue_id, request.after):
+            events.setdefault(pending["version"], QueueEventOut(**pending))
+
+        page = []
+        cursor = request.after
+        grace_cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=EVENT_GAP_GRACE_SECONDS
+        )
+
+        for version in sorted(events)[:limit]:
+            event = events[version]
+            if version != cursor + 1 and event.occurred_at > grace_cutoff:
+                break
+            page.append(event)
+            cursor = version
+
+        return QueueEventsPage(queue_id=queue_id, events=page, next_cursor=cursor)
+
+    @staticmethod
+    async def get_position(
+        db: AsyncSession,
+        request: QueuePositionRequest,
+    ) -> QueuePositionResponse:
+        """
+        Patient tracker poll: token, status and patients ahead.
+
+        Answered from the in-memory sorted (rank, token) lists when the
+        queue is held (and covers the visit); otherwise from one statement
+        whose ahead-counts are range scans on
+        ix_queue_entries_queue_status_rank_token. The queue is not
+        hydrated here, so a burst of tracker polls never loads the whole
+        waiting room.
+        """
+        state = queue_state.get(request.doctor_id, request.queue_date)
+
+        if state is not None and state.covers(request.visit_id):
+            return state.position_view(request.visit_id)
+
+        return await QueueService._position_from_sql(
+            db, request.doctor_id, request.queue_date, request.visit_id
+        )
+
+    @staticmethod
+    async def _position_from_sql(
+        db, doctor_id, queue_date, visit_id
+    ) -> QueuePositionResponse:
+        ahead = aliased(QueueEntry)
+        ahead_counts = (
+            select(
+                func.count().filter(ahead.status == "present").label("present_ahead"),
+                func.count().filter(ahead.status == "waiting").label("waiting_ahead"),
+            )
+            .where(
+                ahead.queue_id == QueueEntry.queue_id,
+                ahead.queue_date == QueueEntry.queue_date,
+                ahead.status.in_(("present", "waiting")),
+                tuple_(ahead.priority_rank, ahead.token_number)
+                < tuple_(QueueEntry.priority_rank, QueueEntry.token_number),
+            )
+            .correlate(QueueEntry)
+            .lateral("ahead_counts")
+        )
+
+        result = await db.execute(
+            select(
+                QueueEntry.token_number,
+                QueueEntry.status,
+                DoctorQueue.current_token,
+                DoctorQueue.avg_consult_time_minutes,
+                ahead_counts.c.present_ahead,
+                ahead_counts.c.waiting_ahead,
+            )
+            .join(
+                DoctorQueue,
+                and_(
+                    DoctorQueue.id == QueueEntry.queue_id,
+                    DoctorQueue.queue_date == QueueEntry.queue_date,
+                ),
+            )
+            .join(ahead_counts, literal_column("true"))
+            .where(
+                DoctorQueue.doctor_id == doctor_id,
+                DoctorQueue.queue_date == queue_date,
+                QueueEntry.queue_date == queue_date,
+                QueueEntry.visit_id == visit_id,
+            )
+        )
+        row = result.one_or_none()
+
+        if not row:
+            raise ValueError("Visit not found in queue")
+
+        # Only count present patients for estimated wait (waiting may not show up)
+        wait, wait_p90 = wait_time_estimator.estimate(
+            doctor_id, row.present_ahead, row.avg_consult_time_minutes or 10
+        )
+
+        return QueuePositionResponse(
+            visit_id=visit_id,
+            token_number=row.token_number,
+            status=row.status,
+            current_token=row.current_token,
+            patients_ahead=row.present_ahead + row.waiting_ahead,
+            present_ahead=row.present_ahead,
+            waiting_ahead=row.waiting_ahead,
+            estimated_wait_minutes=wait,
+            estimated_wait_p90_minutes=wait_p90,
+        )
+
+    @staticmethod
+    async def _doctor_view_from_sql(db, doctor_id, queue_date) -> DoctorQueueStatus:
+        """
+        Doctor view for a queue not held in memory, in one round trip:
+        counters from the queue row, the called token and the next three
+        tokens in call_next order (present first, then waiting, each by
+        lane and token), from up to three of each. Only plain columns come
+        back; no QueueEntry objects are built.
+        """
+        called_token = (
+            select(func.min(QueueEntry.token_number))
+            .where(
+                QueueEntry.queue_id == DoctorQueue.id,
+                QueueEntry.queue_date == DoctorQueue.queue_date,
+                QueueEntry.status == "called",
+            )
+            .correlate(DoctorQueue)
+            .scalar_subquery()
+        )
+
+        def next_in(status, group):
+            return (
+                select(
+                    literal(group).label("status_group"),
+                    QueueEntry.token_number,
+                    QueueEntry.status,
+                    QueueEntry.priority_rank,
+                )
+                .where(
+                    QueueEntry.queue_id == DoctorQueue.id,
+                    QueueEntry.queue_date == DoctorQueue.queue_date,
+                    QueueEntry.status == status,
+                )
+                .order_by(QueueEntry.priority_rank, QueueEntry.token_number)
+                .limit(3)
+                .correlate(DoctorQueue)
+            )
+
+        next_tokens = union_all(
+            next_in("present", 0), next_in("waiting", 1)
+        ).lateral("next_tokens")
+
+        result = await db.execute(
+            select(
+                DoctorQueue.queue_open,
+                DoctorQueue.current_token,
+                DoctorQueue.current_visit_id,
+                DoctorQueue.waiting_count,
+                DoctorQueue.present_count,
+                DoctorQueue.skipped_count,
+                called_token.label("called_token"),
+                next_tokens.c.token_number,
+                next_tokens.c.status,
+            )
+            .outerjoin(next_tokens, literal_column("true"))
+            .where(
+                DoctorQueue.doctor_id == doctor_id,
+                DoctorQueue.queue_date == queue_date,
+            )
+            # call_next order, as in QueueState.next_waiting
+            .order_by(
+                next_tokens.c.status_group,
+                next_tokens.c.priority_rank,
+                next_tokens.c.token_number,
+            )
+        )
+        rows = result.all()[:3]
+
+        if not rows:
+            raise ValueError("Queue not found")
+
+        head = rows[0]
+
+        return DoctorQueueStatus(
+            role="doctor",
+            queue_open=bool(head.queue_open),
+            current_token=head.current_token,
+            current_visit_id=head.current_visit_id,
+            called=(
+                TokenInfo(token_number=head.called_token, status="called")
+                if head.called_token is not None else None
+            ),
+            next_waiting=[
+                TokenInfo(token_number=row.token_number, status=row.status)
+                for row in rows
+                if row.token_number is not None
+            ],
+            counts={
+                "waiting": head.waiting_count,
+                "present": head.present_count,
+                "skipped": head.skipped_count,
+            },
+        )
+
+    @staticmethod
+    async def _hydrate_state(db, doctor_id, queue_date):
+        """
+        Load one queue and its entries into the in-memory queue state.
+        """
+        epoch = queue_state.epoch(doctor_id, queue_date)
+
+        result = await db.execute(
+            select(DoctorQueue).where(
+                DoctorQueue.doctor_id == doctor_id,
+                DoctorQueue.queue_date == queue_date,
+            )
+        )
+        queue = result.scalar_one_or_none()
+
+        if not queue:
+            raise ValueError("Queue not found")
+
+        result = await db.execute(
+            select(
+                QueueEntry.visit_id,
+                QueueEntry.token_number,
+                QueueEntry.status,
+                QueueEntry.priority_rank,
+            ).where(
+                QueueEntry.queue_id == queue.id,
+                QueueEntry.queue_date == queue.queue_date,
+            )
+        )
+
+        return queue_state.install(queue, result.all(), epoch)
+
+    @staticmethod
+    async def stream_status(request: QueueStatusRequest, is_disconnected):
+        """
+        Server-sent events: push a status snapshot whenever a mutation
+        touches this doctor's queue, with a keep-alive comment in between.
+        """
+        key = (request.doctor_id, request.queue_date)
+        view = (request.role, request.visit_id)
+
+        async def build() -> str:
+            async with AsyncSessionLocal() as db:
+                try:
+                    status = await QueueService.get_status(db, request)
+                except ValueError as e:
+                    return f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return f"event: status\ndata: {status.model_dump_json()}\n\n"
+
+        queue_broadcaster.subscribe(key)
+        try:
+            seen = None
+            while not await is_disconnected():
+                version = queue_broadcaster.version(key)
+
+                if version != seen:
+                    seen = version
+                    yield await queue_broadcaster.snapshot(key, view, version, build)
+                else:
+                    yield ": keep-alive\n\n"
+
+                await queue_broadcaster.wait(key, seen, timeout=STREAM_KEEPALIVE_SECONDS)
+        finally:
+            queue_broadcaster.unsubscribe(key)
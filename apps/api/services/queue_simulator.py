@@ -0,0 +1,246 @@
+"""
+What-if simulation of a hospital's doctor queues for one day.
+
+Each doctor is a single server working through the patients still ahead
+of them. Consultation durations are resampled from the doctor's recent
+history (wait_time_estimator), or drawn from a lognormal around the
+configured consult time when there is too little. A what-if consult time
+rescales the observed distribution to the new mean. All trials of a doctor
+are one (trials x patients) matrix, so finish times are a cumulative sum
+along the patient axis. The sampling runs in a worker thread; MAX_CELLS
+bounds the work of the whole request, and the thread gives up between
+doctors once SIMULATION_BUDGET_SECONDS have passed.
+"""
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.doctor import Doctor
+from models.doctor_queue import DoctorQueue
+from models.queue_entry import QueueEntry
+from schemas.hospital import (
+    DoctorQueueSimulation,
+    HospitalQueueSimulation,
+    QueueSimulationRequest,
+)
+from services.wait_time_estimator import wait_time_estimator
+
+
+SIMULATION_BUDGET_SECONDS = 2.0
+# Upper bound on trials x patients summed over the hospital's doctors;
+# trials are cut to fit
+MAX_CELLS = 2_000_000
+# Spread of the fallback lognormal (coefficient of variation)
+DEFAULT_CV = 0.35
+SYNTHETIC_POOL = 1000
+
+
+def _utc(moment: datetime) -> datetime:
+    """Naive timestamps in this codebase are UTC (datetime.utcnow())."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _duration_pool(
+    rng: np.random.Generator,
+    history: List[float],
+    default_minutes: float,
+    mean_minutes: Optional[float],
+) -> np.ndarray:
+    """
+    Durations to resample from: the observed ones (rescaled to mean_minutes
+    when given), else a lognormal sample with mean mean_minutes or default.
+    """
+    if history:
+        pool = np.asarray(history, dtype=float)
+        if mean_minutes is not None:
+            pool *= mean_minutes / pool.mean()
+        return pool
+
+    mean = mean_minutes or default_minutes
+    sigma2 = np.log1p(DEFAULT_CV**2)
+    return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), SYNTHETIC_POOL)
+
+
+def simulate_doctor(
+    rng: np.random.Generator,
+    pool: np.ndarray,
+    patients: int,
+    trials: int,
+    elapsed_minutes: Optional[float],
+    minutes_to_shift_end: float,
+) -> dict:
+    """
+    Monte Carlo of one doctor's remaining day, in minutes from now.
+    elapsed_minutes is how long the open consultation has run (None if
+    none); its remainder is drawn from the durations longer than that.
+    """
+    residual = np.zeros(trials)
+    if elapsed_minutes is not None:
+        longer = pool[pool > elapsed_minutes]
+        if longer.size:
+            residual = rng.choice(longer, trials) - elapsed_minutes
+
+    # (trials, patients): completion time of each remaining patient
+    done = residual[:, None] + np.cumsum(rng.choice(pool, (trials, patients)), axis=1)
+    finish = done[:, -1] if patients else residual
+
+    overtime = np.maximum(finish - minutes_to_shift_end, 0)
+    return {
+        "finish": np.quantile(finish, [0.1, 0.5, 0.9]),
+        "overrun_probability": float((finish > minutes_to_shift_end).mean()),
+        "expected_overtime_minutes": float(overtime.mean()),
+        "expected_unserved_at_shift_end": float(
+            (done > minutes_to_shift_end).sum(axis=1).mean() if patients else 0.0
+        ),
+    }
+
+
+async def _load_queues(db: AsyncSession, hospital_id: UUID, queue_date: date, doctor_ids):
+    query = (
+        select(DoctorQueue, Doctor.name)
+        .join(Doctor, Doctor.id == DoctorQueue.doctor_id)
+        .where(
+            DoctorQueue.hospital_id == hospital_id,
+            DoctorQueue.queue_date == queue_date,
+        )
+        .order_by(Doctor.name)
+    )
+    if doctor_ids:
+        query = query.where(DoctorQueue.doctor_id.in_(doctor_ids))
+    queues = (await db.execute(query)).all()
+
+    # Start of each open consultation, for its remaining duration
+    result = await db.execute(
+        select(QueueEntry.queue_id, QueueEntry.consultation_start_time)
+        .join(
+            DoctorQueue,
+            and_(
+                DoctorQueue.id == QueueEntry.queue_id,
+                DoctorQueue.queue_date == QueueEntry.queue_date,
+            ),
+        )
+        .where(
+            DoctorQueue.hospital_id == hospital_id,
+            DoctorQueue.queue_date == queue_date,
+            QueueEntry.queue_date == queue_date,
+            QueueEntry.status == "in_consultation",
+        )
+    )
+    started = dict(result.all())
+    return queues, started
+
+
+async def simulate_hospital_queues(
+    db: AsyncSession,
+    hospital_id: UUID,
+    request: QueueSimulationRequest,
+) -> HospitalQueueSimulation:
+    """
+    Completion-time distribution and closing-time risk of every doctor's
+    queue for request.queue_date. Raises asyncio.TimeoutError past the budget.
+    """
+    started_at = time.perf_counter()
+    deadline = started_at + SIMULATION_BUDGET_SECONDS
+    now = datetime.utcnow()
+    queue_date = request.queue_date or now.date()
+    queues, consult_started = await _load_queues(
+        db, hospital_id, queue_date, request.doctor_ids
+    )
+
+    jobs = []
+    for queue, doctor_name in queues:
+        shift_start = datetime.combine(queue_date, queue.shift_start_time)
+        shift_end = datetime.combine(queue_date, queue.shift_end_time)
+        # Remaining work starts now, or at the shift start for a later day
+        origin = max(now, shift_start)
+
+        elapsed = None
+        consult_start = consult_started.get(queue.id)
+        if consult_start is not None:
+            elapsed = max((now - _utc(consult_start)).total_seconds() / 60, 0)
+
+        patients = (
+            queue.waiting_count
+            + queue.present_count
+            + queue.called_count
+            + queue.reinsert_pending_count
+            + request.extra_patients.get(queue.doctor_id, 0)
+        )
+        jobs.append(
+            {
+                "queue": queue,
+                "doctor_name": doctor_name,
+                "history": wait_time_estimator.recent_durations(queue.doctor_id),
+                "patients": patients,
+                "elapsed": elapsed,
+                "origin": origin,
+                "shift_end": shift_end,
+            }
+        )
+
+    # Same trials for every doctor, with the cell budget shared between them
+    cells_per_trial = sum(max(job["patients"], 1) for job in jobs)
+    trials = max(min(request.trials, MAX_CELLS // max(cells_per_trial, 1)), 1)
+
+    def run() -> List[DoctorQueueSimulation]:
+        rng = np.random.default_rng(request.seed)
+        results = []
+        for job in jobs:
+            # Stop the thread itself: abandoning the await would leave it running
+            if time.perf_counter() > deadline:
+                raise asyncio.TimeoutError()
+            queue = job["queue"]
+            pool = _duration_pool(
+                rng,
+                job["history"],
+                queue.avg_consult_time_minutes or 10,
+                request.consult_minutes.get(queue.doctor_id),
+            )
+            origin = job["origin"]
+            outcome = simulate_doctor(
+                rng,
+                pool,
+                job["patients"],
+                trials,
+                job["elapsed"],
+                (job["shift_end"] - origin).total_seconds() / 60,
+            )
+            p10, p50, p90 = (origin + timedelta(minutes=float(m)) for m in outcome["finish"])
+            results.append(
+                DoctorQueueSimulation(
+                    doctor_id=queue.doctor_id,
+                    doctor_name=job["doctor_name"],
+                    patients_remaining=job["patients"],
+                    trials=trials,
+                    mean_consult_minutes=round(float(pool.mean()), 1),
+                    history_samples=len(job["history"]),
+                    shift_end=job["shift_end"],
+                    finish_p10=p10,
+                    finish_p50=p50,
+                    finish_p90=p90,
+                    overrun_probability=round(outcome["overrun_probability"], 3),
+                    expected_overtime_minutes=round(outcome["expected_overtime_minutes"], 1),
+                    expected_unserved_at_shift_end=round(
+                        outcome["expected_unserved_at_shift_end"], 2
+                    ),
+                )
+            )
+        return results
+
+    doctors = await asyncio.to_thread(run)
+
+    return HospitalQueueSimulation(
+        hospital_id=hospital_id,
+        queue_date=queue_date,
+        simulated_at=now,
+        elapsed_ms=round((time.perf_counter() - started_at) * 1000, 1),
+        doctors=doctors,
+    )
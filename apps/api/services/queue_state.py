@@ -0,0 +1,309 @@
+"""
+Process-local queue state engine.
+
+Holds every active (doctor_id, queue_date) queue in memory so the
+doctor, patient and receptionist status views are answered without
+touching Postgres. QueueService writes through after each committed
+mutation; a queue that is not held yet is hydrated on its first read, or
+bulk-loaded at startup by services.queue_warmup.
+"""
+import bisect
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from agents.queue.schemas import (
+    DoctorQueueStatus,
+    PatientQueueStatus,
+    QueuePositionResponse,
+    ReceptionQueueStatus,
+    TokenInfo,
+)
+from services.wait_time_estimator import wait_time_estimator
+
+
+STATUSES = (
+    "waiting",
+    "present",
+    "called",
+    "in_consultation",
+    "skipped",
+    "completed",
+)
+
+# Statuses kept as sorted (priority_rank, token) lists (everything that
+# can still be called)
+ORDERED_STATUSES = ("waiting", "present", "called")
+
+# Rank of entries loaded without one (QueuePriorityPolicy "normal" default)
+NORMAL_RANK = 3
+
+# Entries a partially loaded queue holds (see QueueState.complete)
+ACTIVE_STATUSES = ("waiting", "present", "called", "in_consultation")
+
+QueueKey = Tuple[UUID, date]
+
+
+class QueueState:
+    """
+    In-memory mirror of one doctor's queue for one day.
+    """
+
+    def __init__(
+        self,
+        queue_id: UUID,
+        doctor_id: UUID,
+        queue_date: date,
+        complete: bool = True,
+    ):
+        self.queue_id = queue_id
+        self.doctor_id = doctor_id
+        self.queue_date = queue_date
+        # False when only ACTIVE_STATUSES entries were loaded; finished
+        # visits may then be missing from `entries`
+        self.complete = complete
+
+        self.version = 0
+        self.queue_open = True
+        self.avg_consult_time_minutes = 10
+        self.current_token: Optional[int] = None
+        self.current_visit_id: Optional[UUID] = None
+
+        # visit_id -> (token_number, status, priority_rank)
+        self.entries: Dict[UUID, Tuple[int, str, int]] = {}
+        # status -> sorted (priority_rank, token_number): call order, and
+        # patients ahead by bisection
+        self.tokens: Dict[str, List[Tuple[int, int]]] = {s: [] for s in ORDERED_STATUSES}
+        # Mirrors the live counters on the queue row
+        self.counts: Dict[str, int] = {s: 0 for s in STATUSES}
+
+    # -------------------------------------------------
+    # Mutations
+    # -------------------------------------------------
+
+    def sync_queue(self, queue) -> None:
+        self.version = queue.version or 0
+        self.queue_open = bool(queue.queue_open)
+        self.avg_consult_time_minutes = queue.avg_consult_time_minutes or 10
+        self.current_token = queue.current_token
+        self.current_visit_id = queue.current_visit_id
+        for status in STATUSES:
+            self.counts[status] = getattr(queue, f"{status}_count") or 0
+
+    def covers(self, visit_id: UUID) -> bool:
+        """
+        Whether this state can answer for a visit without going to Postgres.
+        """
+        return self.complete or visit_id in self.entries
+
+    def upsert(
+        self,
+        visit_id: UUID,
+        token_number: int,
+        status: str,
+        priority_rank: int = NORMAL_RANK,
+    ) -> None:
+        previous = self.entries.get(visit_id)
+
+        if previous == (token_number, status, priority_rank):
+            return
+
+        if previous:
+            old_token, old_status, old_rank = previous
+            if old_status in self.tokens:
+                tokens = self.tokens[old_status]
+                index = bisect.bisect_left(tokens, (old_rank, old_token))
+                if index < len(tokens) and tokens[index] == (old_rank, old_token):
+                    del tokens[index]
+
+        self.entries[visit_id] = (token_number, status, priority_rank)
+        if status in self.tokens:
+            bisect.insort(self.tokens[status], (priority_rank, token_number))
+
+    # -------------------------------------------------
+    # Views
+    # -------------------------------------------------
+
+    def next_waiting(self, limit: int = 3) -> List[TokenInfo]:
+        # call_next order: present patients first, each group by lane
+        candidates = chain(
+            ((key, "present") for key in self.tokens["present"]),
+            ((key, "waiting") for key in self.tokens["waiting"]),
+        )
+        return [
+            TokenInfo(token_number=token, status=status)
+            for (_, token), status in islice(candidates, limit)
+        ]
+
+    def doctor_view(self) -> DoctorQueueStatus:
+        called = self.tokens["called"]
+
+        return DoctorQueueStatus(
+            role="doctor",
+            queue_open=self.queue_open,
+            current_token=self.current_token,
+            current_visit_id=self.current_visit_id,
+            called=(
+                TokenInfo(token_number=called[0][1], status="called")
+                if called else None
+            ),
+            next_waiting=self.next_waiting(),
+            counts={
+                "waiting": self.counts["waiting"],
+                "present": self.counts["present"],
+                "skipped": self.counts["skipped"],
+            },
+        )
+
+    def position_view(self, visit_id: UUID) -> QueuePositionResponse:
+        entry = self.entries.get(visit_id)
+
+        if not entry:
+            raise ValueError("Visit not found in queue")
+
+        token_number, status, priority_rank = entry
+        key = (priority_rank, token_number)
+
+        present_ahead = bisect.bisect_left(self.tokens["present"], key)
+        waiting_ahead = bisect.bisect_left(self.tokens["waiting"], key)
+
+        # Only count present patients for estimated wait (waiting may not show up)
+        wait, wait_p90 = wait_time_estimator.estimate(
+            self.doctor_id, present_ahead, self.avg_consult_time_minutes
+        )
+
+        return QueuePositionResponse(
+            visit_id=visit_id,
+            token_number=token_number,
+            status=status,
+            current_token=self.current_token,
+            patients_ahead=present_ahead + waiting_ahead,
+            present_ahead=present_ahead,
+            waiting_ahead=waiting_ahead,
+            estimated_wait_minutes=wait,
+            estimated_wait_p90_minutes=wait_p90,
+        )
+
+    def patient_view(self, visit_id: UUID) -> PatientQueueStatus:
+        return PatientQueueStatus(
+            role="patient", **self.position_view(visit_id).model_dump()
+        )
+
+    def reception_view(self) -> ReceptionQueueStatus:
+        return ReceptionQueueStatus(
+            role="receptionist",
+            queue_date=self.queue_date,
+            doctor_id=self.doctor_id,
+            total_visits=sum(self.counts.values()),
+            completed=self.counts["completed"],
+            in_progress=self.counts["called"] + self.counts["in_consultation"],
+            waiting=self.counts["waiting"],
+            skipped=self.counts["skipped"],
+        )
+
+
+class QueueStateEngine:
+    """
+    Registry of QueueState objects keyed by (doctor_id, queue_date).
+
+    Each key carries an epoch that is bumped whenever a mutation lands on
+    a queue that is not held in memory, so a hydration racing with that
+    mutation is discarded instead of caching a stale snapshot.
+    """
+
+    def __init__(self):
+        self._queues: Dict[QueueKey, QueueState] = {}
+        self._epochs: Dict[QueueKey, int] = {}
+
+    def get(self, doctor_id: UUID, queue_date: date) -> Optional[QueueState]:
+        return self._queues.get((doctor_id, queue_date))
+
+    def epoch(self, doctor_id: UUID, queue_date: date) -> int:
+        return self._epochs.get((doctor_id, queue_date), 0)
+
+    def epochs(self) -> Dict[QueueKey, int]:
+        """
+        Snapshot of every epoch, for bulk loads whose keys are not known
+        until the query returns.
+        """
+        return dict(self._epochs)
+
+    def install(
+        self,
+        queue,
+        rows: Iterable[Tuple[UUID, int, str, int]],
+        epoch: int,
+        complete: bool = True,
+    ) -> QueueState:
+        """
+        Build a QueueState from a queue row and its (visit_id, token, status,
+        priority_rank) rows. The state is only cached if no mutation raced
+        the load.
+        """
+        state = QueueState(queue.id, queue.doctor_id, queue.queue_date, complete)
+        state.sync_queue(queue)
+        for visit_id, token_number, status, priority_rank in rows:
+            state.upsert(visit_id, token_number, status, priority_rank)
+
+        key = (queue.doctor_id, queue.queue_date)
+        if self._epochs.get(key, 0) == epoch:
+            self._evict_past_days()
+            self._queues[key] = state
+
+        return state
+
+    def apply(self, queue, entry=None, also_changed=()) -> None:
+        """
+        Write-through hook, called by QueueService after a commit.
+        also_changed holds further entries moved by the same mutation.
+        """
+        key = (queue.doctor_id, queue.queue_date)
+        state = self._queues.get(key)
+
+        if state is None:
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+            return
+
+        # A gap means another worker's mutation has not reached us yet
+        if queue.version != state.version + 1:
+            self.evict(*key)
+            return
+
+        state.sync_queue(queue)
+        for changed in (entry, *also_changed):
+            if changed is not None:
+                state.upsert(
+                    changed.visit_id,
+                    changed.token_number,
+                    changed.status,
+                    changed.priority_rank,
+                )
+
+    def evict(self, doctor_id: UUID, queue_date: date) -> None:
+        key = (doctor_id, queue_date)
+        self._queues.pop(key, None)
+        self._epochs[key] = self._epochs.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """
+        Drop every held queue, e.g. after missing cross-worker notifications.
+        """
+        for key in self._queues:
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+        self._queues.clear()
+
+    def _evict_past_days(self) -> None:
+        """
+        Drop queues of past days. Their epochs are kept a day longer, since
+        a late mutation (e.g. ending a consultation after midnight) must
+        still invalidate a hydration in flight.
+        """
+        today = datetime.utcnow().date()
+        for key in [k for k in self._queues if k[1] < today]:
+            del self._queues[key]
+        for key in [k for k in self._epochs if k[1] < today - timedelta(days=1)]:
+            del self._epochs[key]
+
+
+queue_state = QueueStateEngine()
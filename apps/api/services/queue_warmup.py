@@ -0,0 +1,129 @@
+"""
+Startup warm-up of the in-memory queue state.
+
+Loads today's live queues and their active entries (one bulk query per
+hospital) into queue_state before the worker takes traffic, so the first
+dashboard and tracker polls after a deploy are served from memory.
+Finished visits are not loaded; QueueState.covers() sends lookups for
+them to Postgres.
+"""
+import time
+from datetime import date, datetime
+from typing import Dict
+
+from sqlalchemy import and_, or_, select
+
+from db.session import AsyncSessionLocal
+from models.doctor_queue import DoctorQueue
+from models.queue_entry import QueueEntry
+from services.queue_notifications import queue_change_listener
+from services.queue_state import ACTIVE_STATUSES, queue_state
+
+
+LISTENER_WAIT_SECONDS = 5
+
+
+def _is_live(queue_date: date):
+    """Today's queues that are open or still have patients to see."""
+    return and_(
+        DoctorQueue.queue_date == queue_date,
+        or_(
+            DoctorQueue.queue_open.is_(True),
+            DoctorQueue.waiting_count
+            + DoctorQueue.present_count
+            + DoctorQueue.called_count
+            + DoctorQueue.in_consultation_count
+            > 0,
+        ),
+    )
+
+
+async def warm_queue_state(queue_date: date | None = None) -> Dict[str, float]:
+    """
+    Populate queue_state for one day (default: today, UTC as used by
+    registration). Returns counts and timing for the startup log.
+    """
+    queue_date = queue_date or datetime.utcnow().date()
+    started = time.perf_counter()
+    stats = {"hospitals": 0, "queues": 0, "entries": 0}
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DoctorQueue.hospital_id).where(_is_live(queue_date)).distinct()
+        )
+        hospital_ids = result.scalars().all()
+
+        for hospital_id in hospital_ids:
+            # Taken before the read: a change landing meanwhile bumps the
+            # key's epoch and that queue is left to hydrate on demand
+            epochs = queue_state.epochs()
+
+            result = await db.execute(
+                select(
+                    DoctorQueue,
+                    QueueEntry.visit_id,
+                    QueueEntry.token_number,
+                    QueueEntry.status,
+                    QueueEntry.priority_rank,
+                )
+                .outerjoin(
+                    QueueEntry,
+                    and_(
+                        QueueEntry.queue_id == DoctorQueue.id,
+                        QueueEntry.queue_date == DoctorQueue.queue_date,
+                        QueueEntry.status.in_(ACTIVE_STATUSES),
+                    ),
+                )
+                .where(
+                    DoctorQueue.hospital_id == hospital_id,
+                    _is_live(queue_date),
+                )
+            )
+
+            queues = {}
+            rows = {}
+            for queue, visit_id, token_number, status, priority_rank in result:
+                queues[queue.id] = queue
+                entries = rows.setdefault(queue.id, [])
+                if visit_id is not None:
+                    entries.append((visit_id, token_number, status, priority_rank))
+
+            for queue_id, queue in queues.items():
+                key = (queue.doctor_id, queue.queue_date)
+                queue_state.install(
+                    queue, rows[queue_id], epochs.get(key, 0), complete=False
+                )
+                stats["entries"] += len(rows[queue_id])
+
+            stats["hospitals"] += 1
+            stats["queues"] += len(queues)
+
+            # Queue rows are not needed once copied into memory
+            db.expunge_all()
+
+    stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    print(
+        "[QueueWarmup] Loaded "
+        f"{stats['queues']} queue(s) / {stats['entries']} active entries "
+        f"across {stats['hospitals']} hospital(s) for {queue_date} "
+        f"in {stats['elapsed_ms']} ms"
+    )
+    return stats
+
+
+async def warm_start(listener_timeout: float = LISTENER_WAIT_SECONDS) -> Dict[str, float] | None:
+    """
+    Lifespan hook: warm up once cross-worker LISTEN is in place, so no
+    change made elsewhere can slip between the bulk read and the listener.
+    A failed warm-up only means queues hydrate on demand.
+    """
+    if not await queue_change_listener.wait_listening(listener_timeout):
+        print("[QueueWarmup] Skipped: queue change listener not connected")
+        return None
+
+    try:
+        return await warm_queue_state()
+    except Exception as e:
+        print(f"[QueueWarmup] Failed, queues will hydrate on demand | error={e}")
+        return None
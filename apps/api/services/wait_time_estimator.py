@@ -0,0 +1,236 @@
+"""
+In-memory consultation-duration statistics for wait-time estimates.
+
+Every ended consultation feeds its duration into per-doctor statistics,
+both for the time-of-day bucket it started in and for the doctor overall:
+an EWMA (the point estimate) and a sliding window of recent durations
+(for quantiles). Estimates fall back from the bucket to the doctor-wide
+figures to the queue's configured avg_consult_time_minutes until enough
+samples exist. Each worker learns from its own end_consultation calls and
+from other workers' via the queue_changes NOTIFY; at startup a backfill
+replays recent completed entries.
+"""
+import asyncio
+import bisect
+import math
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, select
+
+from db.session import AsyncSessionLocal
+from models.doctor_queue import DoctorQueue
+from models.queue_entry import QueueEntry
+
+
+EWMA_ALPHA = 0.2
+QUANTILE_WINDOW = 200
+MIN_SAMPLES = 5
+TIME_BUCKET_HOURS = 2
+# Durations outside this range (e.g. a consultation never ended) are ignored
+MIN_CONSULT_MINUTES = 0.5
+MAX_CONSULT_MINUTES = 180
+BACKFILL_DAYS = 28
+BACKFILL_BATCH = 5000
+
+
+def _utc(moment: datetime) -> datetime:
+    """Naive timestamps in this codebase are UTC (datetime.utcnow())."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class DurationStats:
+
+    def __init__(self):
+        self.count = 0
+        self.ewma: float | None = None
+        self._window: Deque[float] = deque()
+        self._sorted: List[float] = []
+
+    def observe(self, minutes: float) -> None:
+        self.count += 1
+        if self.ewma is None:
+            self.ewma = minutes
+        else:
+            self.ewma += EWMA_ALPHA * (minutes - self.ewma)
+
+        self._window.append(minutes)
+        bisect.insort(self._sorted, minutes)
+        if len(self._window) > QUANTILE_WINDOW:
+            oldest = self._window.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+
+    def quantile(self, q: float) -> float:
+        # Nearest-rank quantile
+        index = max(math.ceil(q * len(self._sorted)) - 1, 0)
+        return self._sorted[index]
+
+
+class WaitTimeEstimator:
+
+    def __init__(self):
+        # (doctor_id, bucket) -> stats; bucket None holds the doctor-wide figures
+        self._stats: Dict[Tuple[UUID, Optional[int]], DurationStats] = {}
+        # Live observations made while a backfill runs, replayed after it
+        self._replay: List[Tuple[UUID, datetime, datetime]] | None = None
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _bucket(moment: datetime) -> int:
+        return _utc(moment).hour // TIME_BUCKET_HOURS
+
+    def observe(self, doctor_id: UUID, started_at: datetime, ended_at: datetime) -> None:
+        if self._replay is not None:
+            self._replay.append((doctor_id, started_at, ended_at))
+        self._observe(self._stats, doctor_id, started_at, ended_at)
+
+    def _observe(self, target, doctor_id, started_at, ended_at) -> None:
+        minutes = (_utc(ended_at) - _utc(started_at)).total_seconds() / 60
+        if not MIN_CONSULT_MINUTES <= minutes <= MAX_CONSULT_MINUTES:
+            return
+
+        for bucket in (self._bucket(started_at), None):
+            stats = target.get((doctor_id, bucket))
+            if stats is None:
+                stats = target[(doctor_id, bucket)] = DurationStats()
+            stats.observe(minutes)
+
+    def _stats_for(self, doctor_id: UUID, at: datetime) -> Optional[DurationStats]:
+        for bucket in (self._bucket(at), None):
+            stats = self._stats.get((doctor_id, bucket))
+            if stats is not None and stats.count >= MIN_SAMPLES:
+                return stats
+        return None
+
+    def consult_minutes(
+        self,
+        doctor_id: UUID,
+        default: float,
+        at: Optional[datetime] = None,
+    ) -> float:
+        """Expected duration of the doctor's next consultation."""
+        stats = self._stats_for(doctor_id, at or datetime.utcnow())
+        return stats.ewma if stats else default
+
+    def recent_durations(self, doctor_id: UUID) -> List[float]:
+        """
+        The doctor's recent consultation durations in minutes (the quantile
+        window, all times of day), or [] until there are enough samples.
+        """
+        stats = self._stats.get((doctor_id, None))
+        if stats is None or stats.count < MIN_SAMPLES:
+            return []
+        return list(stats._window)
+
+    def estimate(
+        self,
+        doctor_id: UUID,
+        patients_ahead: int,
+        default: float,
+        at: Optional[datetime] = None,
+    ) -> Tuple[int, Optional[int]]:
+        """
+        (expected, p90) wait in minutes for patients_ahead consultations.
+        The p90 is None until the doctor has enough samples.
+        """
+        stats = self._stats_for(doctor_id, at or datetime.utcnow())
+        if stats is None:
+            return round(patients_ahead * default), None
+
+        return (
+            round(patients_ahead * stats.ewma),
+            round(patients_ahead * stats.quantile(0.9)),
+        )
+
+    # -------------------------------------------------
+    # Startup backfill
+    # -------------------------------------------------
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._backfill_in_background())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _backfill_in_background(self) -> None:
+        try:
+            await self.backfill()
+        except Exception as e:
+            print(f"[WaitTimeEstimator] Backfill failed, learning live only | error={e}")
+
+    async def backfill(self, days: int = BACKFILL_DAYS, until: Optional[date] = None) -> int:
+        """
+        Rebuild the statistics from completed consultations of the last
+        `days` days, oldest first, in batches streamed from Postgres. Live
+        observations made meanwhile are applied on top before the rebuilt
+        statistics replace the current ones. Returns the row count.
+        """
+        until = until or datetime.utcnow().date()
+        since = until - timedelta(days=days)
+        started = time.perf_counter()
+        rows = 0
+        stats: Dict[Tuple[UUID, Optional[int]], DurationStats] = {}
+        self._replay = []
+
+        try:
+            rows = await self._load_history(stats, since, until)
+            for observation in self._replay:
+                self._observe(stats, *observation)
+            self._stats = stats
+        finally:
+            self._replay = None
+
+        print(
+            f"[WaitTimeEstimator] Backfilled {rows} consultation(s) since {since} "
+            f"in {round((time.perf_counter() - started) * 1000, 1)} ms"
+        )
+        return rows
+
+    async def _load_history(self, stats, since: date, until: date) -> int:
+        rows = 0
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(
+                    DoctorQueue.doctor_id,
+                    QueueEntry.consultation_start_time,
+                    QueueEntry.consultation_end_time,
+                )
+                .join(
+                    DoctorQueue,
+                    and_(
+                        DoctorQueue.id == QueueEntry.queue_id,
+                        DoctorQueue.queue_date == QueueEntry.queue_date,
+                    ),
+                )
+                .where(
+                    QueueEntry.queue_date.between(since, until),
+                    DoctorQueue.queue_date.between(since, until),
+                    QueueEntry.status == "completed",
+                    QueueEntry.consultation_start_time.isnot(None),
+                    QueueEntry.consultation_end_time.isnot(None),
+                )
+                .order_by(QueueEntry.consultation_end_time)
+                .execution_options(yield_per=BACKFILL_BATCH)
+            )
+            async for batch in result.partitions():
+                for doctor_id, started_at, ended_at in batch:
+                    self._observe(stats, doctor_id, started_at, ended_at)
+                rows += len(batch)
+                # Let request handlers run between batches
+                await asyncio.sleep(0)
+
+        return rows
+
+
+wait_time_estimator = WaitTimeEstimator()
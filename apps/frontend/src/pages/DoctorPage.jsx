@@ -48,6 +48,15 @@ const DoctorPage = () => {
     setState("callNext");
   }, [navigate]);
 
+  const applyQueueStats = (stats) => {
+    setQueueStats({
+      waiting: stats.counts?.waiting || 0,
+      present: stats.counts?.present || 0,
+      skipped: stats.counts?.skipped || 0,
+      nextWaiting: stats.next_waiting || []
+    });
+  };
+
   // Fetch queue statistics
   const fetchQueueStats = async () => {
     if (!doctorId) return;
@@ -59,26 +68,43 @@ const DoctorPage = () => {
         role: "doctor"
       });
       
-      setQueueStats({
-        waiting: stats.counts?.waiting || 0,
-        present: stats.counts?.present || 0,
-        skipped: stats.counts?.skipped || 0,
-        nextWaiting: stats.next_waiting || []
-      });
+      applyQueueStats(stats);
     } catch (err) {
       console.error("Failed to fetch queue stats:", err);
       // Don't show error to user for stats fetch, just log it
     }
   };
 
-  // Fetch queue stats when doctor is set and periodically
+  // Fetch queue stats when doctor is set, then follow the SSE stream
   useEffect(() => {
     if (doctorId) {
       fetchQueueStats();
-      
-      // Refresh stats every 30 seconds
-      const interval = setInterval(fetchQueueStats, 30000);
-      return () => clearInterval(interval);
+
+      // Fallback: refresh stats every 30 seconds if streaming is unavailable
+      let interval = null;
+      const startPolling = () => {
+        if (!interval) interval = setInterval(fetchQueueStats, 30000);
+      };
+      const stopPolling = () => {
+        if (interval) {
+          clearInterval(interval);
+          interval = null;
+        }
+      };
+
+      const unsubscribe = DoctorService.streamQueueStatus(
+        { doctor_id: doctorId, queue_date: queueDate, role: "doctor" },
+        applyQueueStats,
+        startPolling,
+        stopPolling
+      );
+
+      if (!unsubscribe) startPolling();
+
+      return () => {
+        unsubscribe?.();
+        if (interval) clearInterval(interval);
+      };
     }
   }, [doctorId, queueDate]);
 
@@ -54,12 +54,11 @@ const QueuePage = () => {
     setError("");
 
     try {
-      const status = await QueueService.getQueueStatus({
+      const status = await QueueService.getQueuePosition({
         visit_id: queueData.visitId,
         doctor_id: queueData.doctorId,
         queue_date:
           queueData.queueDate || new Date().toISOString().split("T")[0],
-        role: "patient",
       });
 
       setQueueStatus(status);
@@ -71,14 +70,47 @@ const QueuePage = () => {
     }
   };
 
-  // Auto-poll every 10 seconds
+  // Live updates over SSE; fall back to polling every 10 seconds
   useEffect(() => {
     if (!queueData.visitId) return;
 
     fetchQueueStatus(true);
-    const interval = setInterval(() => fetchQueueStatus(false), 10000);
 
-    return () => clearInterval(interval);
+    let interval = null;
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(() => fetchQueueStatus(false), 10000);
+      }
+    };
+    const stopPolling = () => {
+      if (interval) {
+        clearInterval(interval);
+        interval = null;
+      }
+    };
+
+    const unsubscribe = QueueService.streamQueueStatus(
+      {
+        visit_id: queueData.visitId,
+        doctor_id: queueData.doctorId,
+        queue_date:
+          queueData.queueDate || new Date().toISOString().split("T")[0],
+        role: "patient",
+      },
+      (status) => {
+        setError("");
+        setQueueStatus(status);
+      },
+      startPolling,
+      stopPolling
+    );
+
+    if (!unsubscribe) startPolling();
+
+    return () => {
+      unsubscribe?.();
+      if (interval) clearInterval(interval);
+    };
   }, [queueData.visitId]);
 
   // Redirect to home when consultation is completed
@@ -36,6 +36,73 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Transport errors in a row before giving the stream up for polling
+const STREAM_MAX_FAILURES = 3;
+// How long to poll before trying the stream again
+const STREAM_RETRY_MS = 60000;
+
+/**
+ * Open an EventSource on the queue status stream.
+ * Shared by the patient and doctor queue services.
+ * A dropped connection is left to EventSource's own reconnect; only when
+ * the browser gives up, or after repeated failures, is onError called
+ * (callers poll meanwhile) and the stream retried later. onRecover is
+ * called when a retried stream delivers again.
+ * @private
+ */
+const subscribeQueueStream = (params, onStatus, onError, onRecover) => {
+  if (typeof EventSource === 'undefined') return null;
+
+  const queryString = new URLSearchParams(params).toString();
+  const url = `${API_BASE_URL}/agents/queue/stream?${queryString}`;
+
+  let source = null;
+  let retryTimer = null;
+  let failures = 0;
+  let degraded = false;
+  let closed = false;
+
+  const open = () => {
+    if (closed) return;
+    source = new EventSource(url);
+
+    source.addEventListener('status', (event) => {
+      failures = 0;
+      if (degraded) {
+        degraded = false;
+        onRecover?.();
+      }
+      onStatus(JSON.parse(event.data));
+    });
+    source.addEventListener('error', (event) => {
+      if (event.data) {
+        // Server-sent error event (e.g. queue not created yet) - stream stays open
+        console.error('Queue stream error:', JSON.parse(event.data));
+        return;
+      }
+      failures += 1;
+      if (source.readyState !== EventSource.CLOSED && failures < STREAM_MAX_FAILURES) {
+        return; // EventSource reconnects by itself
+      }
+      source.close();
+      degraded = true;
+      onError?.(event);
+      retryTimer = setTimeout(() => {
+        failures = 0;
+        open();
+      }, STREAM_RETRY_MS);
+    });
+  };
+
+  open();
+
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source?.close();
+  };
+};
+
 /**
  * Registration Agent API Service
  * Maps to: POST /agents/registration/message
@@ -353,6 +420,38 @@ class QueueService {
     }
   }
 
+  /**
+   * Get a patient's position in the queue (lightweight tracker poll)
+   * Maps to: GET /agents/queue/position
+   * @param {Object} params - Query parameters
+   * @param {string} params.visit_id - Visit ID
+   * @param {string} params.doctor_id - Doctor ID
+   * @param {string} params.queue_date - Queue date (YYYY-MM-DD)
+   * @returns {Promise<Object>} Token, status and patients ahead
+   */
+  static async getQueuePosition(params) {
+    try {
+      const queryString = new URLSearchParams(params).toString();
+      const response = await apiClient.get(`/agents/queue/position?${queryString}`);
+      return response.data;
+    } catch (error) {
+      throw this._handleError(error);
+    }
+  }
+
+  /**
+   * Subscribe to server-pushed queue status snapshots (SSE)
+   * Maps to: GET /agents/queue/stream
+   * @param {Object} params - Same query parameters as getQueueStatus
+   * @param {Function} onStatus - Called with each status snapshot
+   * @param {Function} onError - Called when the stream fails (caller falls back to polling)
+   * @param {Function} onRecover - Called when the stream works again (caller stops polling)
+   * @returns {Function|null} Unsubscribe function, or null if SSE is unsupported
+   */
+  static streamQueueStatus(params, onStatus, onError, onRecover) {
+    return subscribeQueueStream(params, onStatus, onError, onRecover);
+  }
+
   /**
    * Check in patient
    * @param {Object} payload - Check-in payload
@@ -536,6 +635,18 @@ class DoctorService {
     }
   }
 
+  /**
+   * Subscribe to server-pushed queue status snapshots (doctor view)
+   * @param {Object} params - Same query parameters as getQueueStatus
+   * @param {Function} onStatus - Called with each status snapshot
+   * @param {Function} onError - Called when the stream fails (caller falls back to polling)
+   * @param {Function} onRecover - Called when the stream works again (caller stops polling)
+   * @returns {Function|null} Unsubscribe function, or null if SSE is unsupported
+   */
+  static streamQueueStatus(params, onStatus, onError, onRecover) {
+    return subscribeQueueStream(params, onStatus, onError, onRecover);
+  }
+
   /**
    * Handle API errors
    * @private
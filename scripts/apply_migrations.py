@@ -0,0 +1,54 @@
+"""
+Apply pending SQL migrations from apps/api/db/migrations in filename order.
+
+db/schema.sql describes a fresh database; the migrations bring an existing
+database up to the same shape. Applied files are recorded in
+schema_migrations so re-running the script is a no-op.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from db.session import engine
+
+MIGRATIONS_DIR = api_path / "db" / "migrations"
+
+
+async def apply_migrations():
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection
+
+        await pg.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ DEFAULT now()
+            )
+            """
+        )
+        applied = {
+            r["name"] for r in await pg.fetch("SELECT name FROM schema_migrations")
+        }
+
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            if path.name in applied:
+                continue
+
+            print(f"Applying {path.name} ...")
+            async with pg.transaction():
+                await pg.execute(path.read_text())
+                await pg.execute(
+                    "INSERT INTO schema_migrations (name) VALUES ($1)", path.name
+                )
+
+    print("✅ Migrations up to date")
+
+
+asyncio.run(apply_migrations())
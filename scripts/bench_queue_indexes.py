@@ -0,0 +1,165 @@
+"""
+Query-plan benchmark for the queue hot-path indexes (migration 004).
+
+Builds a scratch schema with index-free copies of doctor_queues and
+queue_entries (the shape create_tables.py produces from the models before
+migration 004), seeds ~1M entries, and prints EXPLAIN ANALYZE for each
+QueueService hot-path lookup before and after replaying
+db/migrations/004_queue_indexes.sql. The scratch schema is dropped at
+the end.
+
+Usage: python scripts/bench_queue_indexes.py [queues] [entries_per_queue]
+Defaults: 2000 queues x 500 entries = 1,000,000 entries.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from db.session import engine
+
+SCHEMA = "bench_queue"
+MIGRATION = api_path / "db" / "migrations" / "004_queue_indexes.sql"
+
+STATUS_MIX = (
+    "CASE WHEN t <= e.n * 0.6 THEN 'completed' "
+    "WHEN t <= e.n * 0.65 THEN 'skipped' "
+    "WHEN t = floor(e.n * 0.65) + 1 THEN 'called' "
+    "WHEN t % 3 = 0 THEN 'present' "
+    "ELSE 'waiting' END"
+)
+
+# name -> (sql, parameter builder from a sample row)
+QUERIES = {
+    "queue lookup (doctor_id, queue_date)": (
+        "SELECT * FROM doctor_queues WHERE doctor_id = $1 AND queue_date = $2",
+        lambda s: (s["doctor_id"], s["queue_date"]),
+    ),
+    "call_next pick": (
+        "SELECT * FROM queue_entries "
+        "WHERE queue_id = $1 AND status IN ('present', 'waiting', 'called') "
+        "ORDER BY status <> 'present', token_number LIMIT 1",
+        lambda s: (s["queue_id"],),
+    ),
+    "entry by (queue_id, visit_id)": (
+        "SELECT * FROM queue_entries WHERE queue_id = $1 AND visit_id = $2",
+        lambda s: (s["queue_id"], s["visit_id"]),
+    ),
+    "waiting ahead of token": (
+        "SELECT count(*) FROM queue_entries "
+        "WHERE queue_id = $1 AND status = 'waiting' AND token_number < $2",
+        lambda s: (s["queue_id"], s["token_number"]),
+    ),
+    "check_in entry by visit_id": (
+        "SELECT * FROM queue_entries WHERE visit_id = $1",
+        lambda s: (s["visit_id"],),
+    ),
+}
+
+
+async def explain_all(pg, sample, label):
+    print(f"\n==================== {label} ====================")
+    for name, (sql, params) in QUERIES.items():
+        rows = await pg.fetch(
+            f"EXPLAIN (ANALYZE, BUFFERS) {sql}", *params(sample)
+        )
+        print(f"\n--- {name}")
+        for row in rows:
+            print(row[0])
+
+
+async def run(queue_count: int, entries_per_queue: int):
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection
+
+        await pg.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pg.execute(f"CREATE SCHEMA {SCHEMA}")
+        await pg.execute(f"SET search_path TO {SCHEMA}, public")
+
+        try:
+            await pg.execute(
+                "CREATE TABLE doctor_queues (LIKE public.doctor_queues INCLUDING DEFAULTS)"
+            )
+            await pg.execute(
+                "CREATE TABLE queue_entries (LIKE public.queue_entries INCLUDING DEFAULTS)"
+            )
+
+            started = time.perf_counter()
+            await pg.execute(
+                """
+                INSERT INTO doctor_queues (
+                    id, doctor_id, hospital_id, queue_date,
+                    shift_start_time, shift_end_time
+                )
+                SELECT
+                    gen_random_uuid(),
+                    ('00000000-0000-0000-0000-' || lpad((g % 100)::text, 12, '0'))::uuid,
+                    '00000000-0000-0000-0000-000000000000',
+                    current_date - (g / 100),
+                    '09:00', '17:00'
+                FROM generate_series(0, $1 - 1) AS g
+                """,
+                queue_count,
+            )
+            await pg.execute(
+                f"""
+                INSERT INTO queue_entries (
+                    id, queue_id, queue_date, visit_id, hospital_id,
+                    token_number, position, status
+                )
+                SELECT
+                    gen_random_uuid(), e.id, e.queue_date, gen_random_uuid(),
+                    e.hospital_id, t, t, {STATUS_MIX}
+                FROM (
+                    SELECT id, queue_date, hospital_id, $1::int AS n FROM doctor_queues
+                ) e,
+                generate_series(1, e.n) AS t
+                """,
+                entries_per_queue,
+            )
+            await pg.execute("ANALYZE doctor_queues")
+            await pg.execute("ANALYZE queue_entries")
+            total = await pg.fetchval("SELECT count(*) FROM queue_entries")
+            print(
+                f"Seeded {queue_count} queues / {total} entries "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+            # Today's queue for one doctor, and a waiting entry in it
+            sample = await pg.fetchrow(
+                """
+                SELECT q.id AS queue_id, q.doctor_id, q.queue_date,
+                       e.visit_id, e.token_number
+                FROM doctor_queues q
+                JOIN queue_entries e ON e.queue_id = q.id
+                WHERE q.queue_date = current_date AND e.status = 'waiting'
+                ORDER BY e.token_number DESC
+                LIMIT 1
+                """
+            )
+
+            await explain_all(pg, sample, "BEFORE (no indexes)")
+
+            started = time.perf_counter()
+            await pg.execute(MIGRATION.read_text())
+            await pg.execute("ANALYZE doctor_queues")
+            await pg.execute("ANALYZE queue_entries")
+            print(f"\nApplied {MIGRATION.name} in {time.perf_counter() - started:.1f}s")
+
+            await explain_all(pg, sample, f"AFTER ({MIGRATION.name})")
+        finally:
+            await pg.execute("SET search_path TO public")
+            await pg.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    queues = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per_queue = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(run(queues, per_queue))
@@ -0,0 +1,39 @@
+"""
+Roll the monthly doctor_queues / queue_entries partition window.
+
+Creates the partitions for this month and the next few, then detaches
+months older than the retention window into the queue_archive schema
+(or drops them with --drop). Safe to run repeatedly, e.g. from a daily cron.
+
+Usage: python scripts/maintain_queue_partitions.py [months_ahead] [retain_months] [--drop]
+Defaults: 3 months ahead, 12 months retained, archive instead of drop.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from services.queue_partitions import (
+    MONTHS_AHEAD,
+    RETAIN_MONTHS,
+    archive_queue_partitions,
+    ensure_queue_partitions,
+)
+
+
+async def maintain(months_ahead: int, retain_months: int, drop: bool):
+    created = await ensure_queue_partitions(months_ahead)
+    archived = await archive_queue_partitions(retain_months, drop=drop)
+    print(f"✅ Queue partitions: {created} created, {archived} detached")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--drop"]
+    ahead = int(args[0]) if len(args) > 0 else MONTHS_AHEAD
+    retain = int(args[1]) if len(args) > 1 else RETAIN_MONTHS
+    asyncio.run(maintain(ahead, retain, "--drop" in sys.argv[1:]))
@@ -0,0 +1,34 @@
+"""
+Pre-create DoctorQueue rows for one day from each available doctor's
+shift and consult-time defaults (what QueueScheduler does every evening).
+Queues that already exist are left untouched.
+
+Usage: python scripts/precreate_doctor_queues.py [YYYY-MM-DD]
+Defaults to tomorrow (UTC).
+"""
+
+import asyncio
+import sys
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from services.queue_scheduler import precreate_queues
+
+
+async def precreate(queue_date: date):
+    created = await precreate_queues(queue_date)
+    print(f"✅ {created} queue(s) created for {queue_date}")
+
+
+if __name__ == "__main__":
+    target = (
+        date.fromisoformat(sys.argv[1])
+        if len(sys.argv) > 1
+        else datetime.utcnow().date() + timedelta(days=1)
+    )
+    asyncio.run(precreate(target))
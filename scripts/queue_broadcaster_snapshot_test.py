@@ -0,0 +1,55 @@
+"""
+Snapshot cache test: a failed build is not served to later subscribers.
+
+The first build of a view raises; a second request for the same view and
+version must run the build again and get its result, which is then shared.
+Needs no database.
+
+Usage: python scripts/queue_broadcaster_snapshot_test.py
+"""
+
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+from uuid import uuid4
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from services.queue_broadcaster import QueueBroadcaster
+
+
+async def test():
+    broadcaster = QueueBroadcaster()
+    key = (uuid4(), date.today())
+    calls = []
+
+    async def build():
+        calls.append(len(calls) + 1)
+        await asyncio.sleep(0)
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        return "snapshot"
+
+    try:
+        await broadcaster.snapshot(key, "doctor", 1, build)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("first build should have raised")
+
+    second = await broadcaster.snapshot(key, "doctor", 1, build)
+    third = await broadcaster.snapshot(key, "doctor", 1, build)
+
+    assert second == "snapshot", second
+    assert third == "snapshot", third
+    assert calls == [1, 2], f"builds run: {calls}"
+
+    print("✅ Failed snapshot build retried; successful one shared")
+
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,75 @@
+"""
+Doctor view test: next_waiting follows call_next order on both read paths.
+
+Seeds a scratch doctor (reusing the stress harness), registers three
+normal patients and then an emergency one, who gets the highest token,
+and checks in token 2. The doctor view built by SQL (cache miss) and the
+one served from the in-memory queue state must both list the present
+patient first, then the emergency token, and agree.
+
+Usage: python scripts/queue_doctor_view_order_test.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from agents.queue.schemas import CheckInRequest, QueueIntakeRequest
+from db.session import AsyncSessionLocal
+from services.queue_event_log import queue_event_log
+from services.queue_partitions import ensure_queue_partitions
+from services.queue_service import QueueService
+from services.queue_state import queue_state
+from stress_queue_concurrency import DEFAULT_HOSPITAL_ID, QUEUE_DATE, cleanup, seed
+
+
+async def test():
+    await ensure_queue_partitions(months_ahead=0, from_date=QUEUE_DATE)
+    department_id, doctor_id, visits = await seed(4)
+    queue_event_log.start()
+
+    try:
+        for i, (visit_id, patient_id) in enumerate(visits):
+            async with AsyncSessionLocal() as db:
+                await QueueService.intake(
+                    db,
+                    QueueIntakeRequest(
+                        visit_id=visit_id,
+                        patient_id=patient_id,
+                        doctor_id=doctor_id,
+                        hospital_id=DEFAULT_HOSPITAL_ID,
+                        queue_date=QUEUE_DATE,
+                        priority="emergency" if i == len(visits) - 1 else "normal",
+                    ),
+                )
+
+        async with AsyncSessionLocal() as db:
+            await QueueService.check_in(
+                db, CheckInRequest(visit_id=visits[1][0], queue_date=QUEUE_DATE)
+            )
+
+        queue_state.evict(doctor_id, QUEUE_DATE)
+        async with AsyncSessionLocal() as db:
+            from_sql = await QueueService._doctor_view_from_sql(db, doctor_id, QUEUE_DATE)
+            state = await QueueService._hydrate_state(db, doctor_id, QUEUE_DATE)
+        from_memory = state.doctor_view()
+    finally:
+        await queue_event_log.stop()
+        await cleanup(department_id, doctor_id, [v for v, _ in visits])
+
+    sql_tokens = [t.token_number for t in from_sql.next_waiting]
+    memory_tokens = [t.token_number for t in from_memory.next_waiting]
+
+    assert sql_tokens == [2, 4, 1], f"SQL view order: {sql_tokens}"
+    assert memory_tokens == sql_tokens, f"in-memory {memory_tokens} != SQL {sql_tokens}"
+
+    print("✅ Present, then emergency token listed first by both doctor-view paths")
+
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,82 @@
+"""
+Batch intake test: a visit sent twice in one /intake/batch call.
+
+Seeds a scratch doctor with two visits (reusing the stress harness), sends
+[visit 1, visit 1, visit 2] and asserts that the second copy is rejected
+in its own result slot, the others get tokens 1 and 2, the counts match
+and only two entries exist.
+
+Usage: python scripts/queue_intake_batch_test.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from sqlalchemy import func, select
+
+from agents.queue.schemas import QueueIntakeBatchRequest, QueueIntakeRequest
+from db.session import AsyncSessionLocal
+from models.queue_entry import QueueEntry
+from services.queue_event_log import queue_event_log
+from services.queue_partitions import ensure_queue_partitions
+from services.queue_service import QueueService
+from stress_queue_concurrency import DEFAULT_HOSPITAL_ID, QUEUE_DATE, cleanup, seed
+
+
+async def test():
+    await ensure_queue_partitions(months_ahead=0, from_date=QUEUE_DATE)
+    department_id, doctor_id, visits = await seed(2)
+    queue_event_log.start()
+
+    def intake(visit_id, patient_id):
+        return QueueIntakeRequest(
+            visit_id=visit_id,
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            hospital_id=DEFAULT_HOSPITAL_ID,
+            queue_date=QUEUE_DATE,
+        )
+
+    try:
+        first, second = visits
+        async with AsyncSessionLocal() as db:
+            response = await QueueService.intake_batch(
+                db,
+                QueueIntakeBatchRequest(
+                    visits=[intake(*first), intake(*first), intake(*second)]
+                ),
+            )
+
+        async with AsyncSessionLocal() as db:
+            entries = await db.scalar(
+                select(func.count())
+                .select_from(QueueEntry)
+                .where(
+                    QueueEntry.visit_id.in_([first[0], second[0]]),
+                    QueueEntry.queue_date == QUEUE_DATE,
+                )
+            )
+    finally:
+        await queue_event_log.stop()
+        await cleanup(department_id, doctor_id, [v for v, _ in visits])
+
+    results = response.results
+    assert [r.visit_id for r in results] == [first[0], first[0], second[0]]
+    assert results[0].accepted and results[0].token_number == 1, results[0]
+    assert not results[1].accepted, results[1]
+    assert results[1].reason == "Visit already queued", results[1]
+    assert results[2].accepted and results[2].token_number == 2, results[2]
+    assert (response.accepted_count, response.rejected_count) == (2, 1), response
+    assert entries == 2, f"{entries} entries for 2 visits"
+
+    print("✅ Duplicate visit rejected in its own slot; counts and tokens correct")
+
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,50 @@
+"""
+Rebuild the live per-status counters on doctor_queues from queue_entries.
+
+Usage: python scripts/reconcile_queue_counters.py [YYYY-MM-DD]
+Defaults to today's queues.
+"""
+
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
+from models.doctor_queue import DoctorQueue
+from services.queue_event_log import queue_event_log
+from services.queue_service import QueueService
+
+
+async def reconcile(queue_date: date):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DoctorQueue.id).where(DoctorQueue.queue_date == queue_date)
+        )
+        queue_ids = result.scalars().all()
+
+    for queue_id in queue_ids:
+        async with AsyncSessionLocal() as db:
+            queue = await QueueService.reconcile_counters(db, queue_id)
+            print(
+                f"{queue_id}: waiting={queue.waiting_count} present={queue.present_count} "
+                f"called={queue.called_count} in_consultation={queue.in_consultation_count} "
+                f"completed={queue.completed_count} skipped={queue.skipped_count}"
+            )
+
+    # Persist the COUNTERS_RECONCILED events buffered above
+    await queue_event_log.flush()
+
+    print(f"✅ Reconciled {len(queue_ids)} queue(s) for {queue_date}")
+
+
+if __name__ == "__main__":
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    asyncio.run(reconcile(target))
@@ -0,0 +1,297 @@
+"""
+Concurrency stress harness for QueueService.call_next / end_consultation.
+
+Creates a scratch department, doctor, patients and visits under the
+default hospital, registers every visit concurrently, then lets N
+parallel "doctor clicks" race call_next until the queue is drained. Every
+successful call is followed by a double-clicked end_consultation. A
+monitor polls the database throughout. The harness asserts:
+
+  * intake hands out unique, contiguous tokens
+  * at most one entry is called / in consultation at any moment
+  * every visit is called exactly once
+  * exactly one of each duplicated end_consultation succeeds
+  * live counters, version and current_visit_id are consistent at the end
+
+Scratch rows are deleted afterwards. The queue date is ten years out so
+real queues are never touched; its (empty) monthly partitions are created
+on first run and left in place.
+
+Usage: python scripts/stress_queue_concurrency.py [patients] [parallel]
+Defaults: 40 patients, 8 parallel callers.
+"""
+
+import asyncio
+import random
+import sys
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add apps/api to Python path so we can import db module
+repo_root = Path(__file__).resolve().parents[1]
+api_path = repo_root / "apps" / "api"
+sys.path.insert(0, str(api_path))
+
+from sqlalchemy import delete, func, select
+
+from agents.queue.schemas import (
+    CallNextRequest,
+    EndConsultationRequest,
+    QueueIntakeRequest,
+)
+from db.session import AsyncSessionLocal
+from models.department import Department
+from models.doctor import Doctor
+from models.doctor_queue import DoctorQueue
+from models.patient import Patient
+from models.queue_entry import QueueEntry
+from models.queue_event import QueueEvent
+from models.visit import Visit
+from services.agent_dispatcher import agent_dispatcher
+from services.agent_session_service import agent_sessions
+from services.queue_event_log import queue_event_log
+from services.queue_partitions import ensure_queue_partitions
+from services.queue_service import QueueService
+from services.queue_state import STATUSES
+
+DEFAULT_HOSPITAL_ID = uuid.UUID("00000000-0000-0000-0000-000000000000")
+QUEUE_DATE = date.today() + timedelta(days=3650)
+
+
+async def seed(patient_count: int):
+    suffix = uuid.uuid4().hex[:8]
+    department_id = uuid.uuid4()
+    doctor_id = uuid.uuid4()
+    visits = []
+
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            db.add(
+                Department(
+                    id=department_id,
+                    name=f"stress-{suffix}",
+                    hospital_id=DEFAULT_HOSPITAL_ID,
+                )
+            )
+            await db.flush()
+            db.add(
+                Doctor(
+                    id=doctor_id,
+                    name=f"Dr Stress {suffix}",
+                    hospital_id=DEFAULT_HOSPITAL_ID,
+                    department_id=department_id,
+                )
+            )
+            await db.flush()
+
+            for i in range(patient_count):
+                patient = Patient(
+                    id=uuid.uuid4(),
+                    hospital_id=DEFAULT_HOSPITAL_ID,
+                    full_name=f"Stress Patient {i}",
+                    contact_number=f"9{random.randrange(10**9):09d}",
+                )
+                visit = Visit(
+                    id=uuid.uuid4(),
+                    hospital_id=DEFAULT_HOSPITAL_ID,
+                    patient_id=patient.id,
+                    doctor_id=doctor_id,
+                )
+                db.add(patient)
+                visits.append(visit)
+            await db.flush()
+            db.add_all(visits)
+
+    return department_id, doctor_id, [(v.id, v.patient_id) for v in visits]
+
+
+async def intake_all(doctor_id, visits):
+    async def intake(visit_id, patient_id):
+        async with AsyncSessionLocal() as db:
+            return await QueueService.intake(
+                db,
+                QueueIntakeRequest(
+                    visit_id=visit_id,
+                    patient_id=patient_id,
+                    doctor_id=doctor_id,
+                    hospital_id=DEFAULT_HOSPITAL_ID,
+                    queue_date=QUEUE_DATE,
+                ),
+            )
+
+    results = await asyncio.gather(*(intake(v, p) for v, p in visits))
+    tokens = sorted(r.token_number for r in results if r.accepted)
+
+    assert tokens == list(range(1, len(tokens) + 1)), f"token gap/duplicate: {tokens}"
+    print(f"Intake: {len(tokens)} accepted, {len(results) - len(tokens)} rejected")
+    return len(tokens)
+
+
+async def race(doctor_id, parallel: int):
+    called = Counter()
+    end_results = Counter()
+    stop = asyncio.Event()
+    max_active = 0
+
+    async def end(visit_id):
+        async with AsyncSessionLocal() as db:
+            try:
+                await QueueService.end_consultation(
+                    db,
+                    EndConsultationRequest(
+                        doctor_id=doctor_id, visit_id=visit_id, queue_date=QUEUE_DATE
+                    ),
+                )
+                return True
+            except ValueError:
+                return False
+
+    async def clicker():
+        while True:
+            async with AsyncSessionLocal() as db:
+                try:
+                    response = await QueueService.call_next(
+                        db, CallNextRequest(doctor_id=doctor_id, queue_date=QUEUE_DATE)
+                    )
+                except ValueError as e:
+                    if "No patients waiting" in str(e):
+                        return
+                    if "already in progress" in str(e):
+                        await asyncio.sleep(random.uniform(0, 0.01))
+                        continue
+                    raise
+
+            called[response.visit_id] += 1
+            # Double click on "end": exactly one of these may win
+            outcomes = await asyncio.gather(end(response.visit_id), end(response.visit_id))
+            end_results[outcomes.count(True)] += 1
+
+    async def monitor(queue_id):
+        nonlocal max_active
+        async with AsyncSessionLocal() as db:
+            while not stop.is_set():
+                active = await db.scalar(
+                    select(func.count())
+                    .select_from(QueueEntry)
+                    .where(
+                        QueueEntry.queue_id == queue_id,
+                        QueueEntry.queue_date == QUEUE_DATE,
+                        QueueEntry.status.in_(["called", "in_consultation"]),
+                    )
+                )
+                await db.rollback()
+                max_active = max(max_active, active)
+                await asyncio.sleep(0.002)
+
+    async with AsyncSessionLocal() as db:
+        queue_id = await db.scalar(
+            select(DoctorQueue.id).where(
+                DoctorQueue.doctor_id == doctor_id,
+                DoctorQueue.queue_date == QUEUE_DATE,
+            )
+        )
+
+    watcher = asyncio.create_task(monitor(queue_id))
+    try:
+        await asyncio.gather(*(clicker() for _ in range(parallel)))
+    finally:
+        stop.set()
+        await watcher
+
+    return queue_id, called, end_results, max_active
+
+
+async def check_final(queue_id, accepted: int, called, end_results, max_active):
+    async with AsyncSessionLocal() as db:
+        queue = await db.scalar(
+            select(DoctorQueue).where(
+                DoctorQueue.id == queue_id,
+                DoctorQueue.queue_date == QUEUE_DATE,
+            )
+        )
+        result = await db.execute(
+            select(QueueEntry.status, func.count())
+            .where(
+                QueueEntry.queue_id == queue_id,
+                QueueEntry.queue_date == QUEUE_DATE,
+            )
+            .group_by(QueueEntry.status)
+        )
+        actual = dict(result.all())
+
+    failures = []
+
+    if max_active > 1:
+        failures.append(f"{max_active} entries were called/in consultation at once")
+    if len(called) != accepted:
+        failures.append(f"{len(called)} of {accepted} visits were called")
+    if any(n > 1 for n in called.values()):
+        failures.append(f"visits called twice: {[v for v, n in called.items() if n > 1]}")
+    if set(end_results) != {1}:
+        failures.append(f"duplicate end_consultation outcomes: {dict(end_results)}")
+    for status in STATUSES:
+        counter = getattr(queue, f"{status}_count")
+        if counter != actual.get(status, 0):
+            failures.append(f"{status}_count={counter}, entries={actual.get(status, 0)}")
+    if queue.completed_count != accepted:
+        failures.append(f"completed_count={queue.completed_count}, expected {accepted}")
+    if queue.current_visit_id is not None:
+        failures.append(f"current_visit_id left set: {queue.current_visit_id}")
+    # One event per intake, call_next and end_consultation
+    if queue.version != 3 * accepted:
+        failures.append(f"version={queue.version}, expected {3 * accepted}")
+
+    return failures
+
+
+async def cleanup(department_id, doctor_id, visit_ids):
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            result = await db.execute(
+                select(Visit.patient_id).where(Visit.doctor_id == doctor_id)
+            )
+            patient_ids = result.scalars().all()
+
+            await db.execute(
+                delete(agent_sessions).where(agent_sessions.c.visit_id.in_(visit_ids))
+            )
+            await db.execute(delete(QueueEvent).where(QueueEvent.doctor_id == doctor_id))
+            await db.execute(delete(DoctorQueue).where(DoctorQueue.doctor_id == doctor_id))
+            await db.execute(delete(Visit).where(Visit.doctor_id == doctor_id))
+            await db.execute(delete(Patient).where(Patient.id.in_(patient_ids)))
+            await db.execute(delete(Doctor).where(Doctor.id == doctor_id))
+            await db.execute(delete(Department).where(Department.id == department_id))
+
+
+async def run(patient_count: int, parallel: int):
+    await ensure_queue_partitions(months_ahead=0, from_date=QUEUE_DATE)
+    department_id, doctor_id, visits = await seed(patient_count)
+    agent_dispatcher.start()
+    queue_event_log.start()
+    try:
+        accepted = await intake_all(doctor_id, visits)
+        queue_id, called, end_results, max_active = await race(doctor_id, parallel)
+        failures = await check_final(queue_id, accepted, called, end_results, max_active)
+    finally:
+        # Background agent handoffs must land before their sessions are deleted
+        await agent_dispatcher.stop()
+        await queue_event_log.stop()
+        await cleanup(department_id, doctor_id, [v for v, _ in visits])
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+
+    print(
+        f"✅ {accepted} patients called exactly once by {parallel} parallel callers; "
+        "counters, version and locks consistent"
+    )
+
+
+if __name__ == "__main__":
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    asyncio.run(run(patients, parallel))